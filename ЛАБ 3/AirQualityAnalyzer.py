@@ -1,56 +1,347 @@
+import os
+import threading
+
 import pandas as pd
-import numpy as np
+from aqi_engine import AQI_TABLE_VERSION, PM_POLLUTANTS
+from alerts import AlertEngine, LatestIndex
+from ingest import (DEFAULT_CHUNKSIZE, complete_prefix_size, concat_frames, file_signature, open_prefix,
+                    preprocess_frame, read_header, read_tail, read_weather_csv)
+from filter_index import FilterIndex, sort_appended, sort_for_index
+from metrics import PipelineMetrics
+from partitions import (build_manifest, latest_partitions, manifest_countries, manifest_locations,
+                        select_partitions)
+from rollup_cube import AqiCube
+from shared_store import attach, load_descriptor, publish
+from snapshot_cache import load_snapshot, save_snapshot, snapshot_path, source_key
+
+# Дочитані рядки накопичуються в окремому впорядкованому сегменті й зливаються з основною таблицею, коли
+# сегмент перевищує DELTA_MIN_ROWS рядків і 1/DELTA_FRACTION її розміру
+DELTA_MIN_ROWS = 50_000
+DELTA_FRACTION = 16
 
 class AirQualityAnalyzer:
-    def __init__(self):
+    def __init__(self, data_path='GlobalWeatherRepository.csv', pollutants=PM_POLLUTANTS, cache_dir=None,
+                 lean=False, chunksize=DEFAULT_CHUNKSIZE, progress=None,
+                 country=None, start_date=None, end_date=None, metrics=None, shared=None):
+        self.data_path = data_path
+        # Забруднювачі, що враховуються в AQI (ALL_POLLUTANTS — усі наявні в CSV)
+        self.pollutants = pollutants
+        # Каталог знімків попередньо оброблених даних (None — без кешування)
+        self.cache_dir = cache_dir
+        # Компактне подання: float32, категорії та datetime64 замість об'єктів Python
+        self.lean = lean
+        self.chunksize = chunksize
+        # Статистика пам'яті почастинного читання (лише для компактного подання)
+        self.ingest_stats = None
+        # Зміщення (у байтах) уже прочитаної частини файлу, його ознака (inode і хеш початку) та назви стовпців
+        self._read_offset = None
+        self._source_signature = None
+        self._source_columns = None
+        # Для каталогу розділів: стартове вікно, опис розділів і зміщення прочитаної частини відкритих розділів
+        self.window = {'country': country, 'start_date': start_date, 'end_date': end_date}
+        self._manifest = None
+        self.loaded_partitions = {}
+        # Опис таблиці у спільній пам'яті (словник або JSON-файл), до якої слід приєднатися замість читання
+        self.shared = shared
+        self._shared_frame = None
+        # Сповіщення за правилами за замовчуванням; скидаються, коли з'являються нові дані
+        self._alerts = None
+        # Функція progress(message, fraction) для показу стану завантаження
+        self.progress = progress
+        # Час, кількість рядків і пам'ять етапів обробки та запитів
+        self.metrics = metrics if metrics is not None else PipelineMetrics()
+        # Виняток останнього невдалого завантаження (None — завантаження успішне)
+        self.load_error = None
+        # Захищає заміну даних та індексів під час дочитування з інших потоків
+        self._lock = threading.RLock()
         # Ініціалізація з завантаженням даних
-        self.data = self.load_and_preprocess_data()
+        self._data = self.index = self._delta_index = None
+        data = self.load_and_preprocess_data()
+        self._report('Побудова індексів', 0.9)
+        self._build_indexes(data)
+        self._report('Дані завантажено', 1.0)
+
+    def _report(self, message, fraction=None):
+        """Повідомлення про стан завантаження, якщо задано функцію progress"""
+        if self.progress is not None:
+            self.progress(message, fraction)
+
+    def _build_indexes(self, data):
+        """Побудова індексів над новими даними та їх заміна разом із таблицею"""
+        rows = 0 if data is None else len(data)
+        attached = self._shared_frame is not None and data is self._shared_frame.data
+        with self.metrics.stage('index_build', rows):
+            if attached and self._shared_frame.index_arrays is not None:
+                # Масиви індексу теж беруться зі спільної пам'яті
+                index = FilterIndex.from_state(data, self._shared_frame.index_arrays,
+                                               self._shared_frame.index_meta)
+            else:
+                index = FilterIndex(data) if data is not None else None
+        # Таблиця й індекс замінюються одним присвоєнням, щоб запити не бачили нову таблицю зі старим індексом
+        with self._lock:
+            self._data, self.index, self._delta_index = data, index, None
+        self._cube = self._latest = self._alerts = None
+        if not attached:
+            # Процес-власник будує куб і останні вимірювання одразу; приєднаний — лише під час першого запиту,
+            # щоб процеси, яким потрібна тільки фільтрація, не тримали власних копій
+            self._cube, self._latest = self.cube, self.latest
+
+    @property
+    def data(self):
+        """Уся таблиця, впорядкована за (країна, місто, datetime), разом із ще не злитими дочитаними рядками"""
+        with self._lock:
+            self._compact()
+            return self._data
+
+    @property
+    def cube(self):
+        """Куб агрегатів AQI, з якого відповідають агреговані запити без сканування рядків"""
+        if self._cube is None and self._data is not None:
+            with self._lock:
+                if self._cube is None:
+                    data = self.data
+                    with self.metrics.stage('cube_build', len(data)):
+                        self._cube = AqiCube(data)
+        return self._cube
+
+    @property
+    def latest(self):
+        """Останні вимірювання кожного міста для поточних категорій і сповіщень"""
+        if self._latest is None:
+            with self._lock:
+                if self._latest is None:
+                    data = self.data
+                    with self.metrics.stage('latest_build', 0 if data is None else len(data)):
+                        self._latest = LatestIndex(data)
+        return self._latest
 
     def load_and_preprocess_data(self):
-        """Завантаження та попередня обробка даних із CSV-файлу"""
+        """Завантаження та попередня обробка даних із CSV-файлу або каталогу розділів"""
         try:
-            # Читаємо CSV-файл із даними про погоду та якість повітря
-            df = pd.read_csv('GlobalWeatherRepository.csv')  # Шлях у корені проєкту
-            # Конвертація стовпця 'last_updated' у формат datetime
-            df['datetime'] = pd.to_datetime(df['last_updated'])
-            # Витягуємо дату, час, годину, місяць і рік із datetime
-            df['date'] = df['datetime'].dt.date
-            df['time'] = df['datetime'].dt.time
-            df['hour'] = df['datetime'].dt.hour
-            df['month'] = df['datetime'].dt.month
-            df['year'] = df['datetime'].dt.year
-            # Визначаємо сезон на основі місяця
-            df['season'] = df['month'].apply(
-                lambda m: 'Зима' if m in [12, 1, 2] else
-                'Весна' if m in [3, 4, 5] else
-                'Літо' if m in [6, 7, 8] else 'Осінь'
-            )
-            # Розраховуємо AQI (Індекс якості повітря) для кожного рядка
-            df['aqi'] = df.apply(self.calculate_aqi, axis=1)
-            # Класифікуємо якість повітря на основі AQI
-            conditions = [
-                (df['aqi'] <= 50),
-                (df['aqi'] <= 100),
-                (df['aqi'] <= 150),
-                (df['aqi'] <= 200),
-                (df['aqi'] <= 300),
-                (df['aqi'] > 300)
-            ]
-            choices = [
-                'Добре',
-                'Помірне',
-                'Шкідливе для чутливих груп',
-                'Шкідливе',
-                'Дуже шкідливе',
-                'Небезпечне'
-            ]
-            df['air_quality_category'] = np.select(conditions, choices, default='Невідомо')
+            with self.metrics.stage('load') as record:
+                df = self._load_data()
+                record.rows = 0 if df is None else len(df)
+            self.load_error = None
             return df
         except Exception as e:
-            # Виводимо помилку, якщо дані не вдалося завантажити
-            print(f"Помилка завантаження даних: {e}")
+            # Виводимо помилку, якщо дані не вдалося завантажити; виняток зберігається в load_error
+            self.load_error = e
+            print(f"Помилка завантаження даних: {type(e).__name__}: {e}")
             return None
 
+    def _load_data(self):
+        """Вибір способу завантаження залежно від джерела даних"""
+        if self.shared is not None:
+            # Стовпці — подання лише для читання над пам'яттю, спільною з процесом-власником
+            self._shared_frame = attach(load_descriptor(self.shared))
+            return self._shared_frame.data
+        if os.path.isdir(self.data_path):
+            # Відкриваються лише розділи, що перетинаються зі стартовим вікном
+            self._manifest = build_manifest(self.data_path)
+            frames = self._load_partitions(self.window)
+            return sort_for_index(concat_frames(frames)) if frames else None
+        if not os.path.isfile(self.data_path):
+            # Віддалене джерело (URL тощо) читається повністю, без дочитування
+            self._report('Читання CSV-файлу', None)
+            return sort_for_index(self._read_source(self.data_path))
+        self._source_columns = read_header(self.data_path)
+        df, self._read_offset = self._load_file(self.data_path)
+        self._source_signature = file_signature(self.data_path, self._read_offset)
+        return df
+
+    def _load_file(self, path, snapshot_name=None):
+        """Обробка локального CSV-файлу зі знімком у cache_dir; повертає таблицю та зміщення прочитаної частини"""
+        # Читаємо лише до останнього повного рядка; решту дочитає ingest_new_rows
+        limit = complete_prefix_size(path)
+        if self.cache_dir:
+            # Знімок дійсний, лише поки не змінились файл і таблиці AQI
+            key = source_key(path, limit, aqi_table_version=AQI_TABLE_VERSION,
+                             pollutants=list(self.pollutants), lean=self.lean)
+            snapshot = snapshot_path(self.cache_dir, snapshot_name or path)
+            self._report('Завантаження знімка даних', 0.1)
+            with self.metrics.stage('snapshot_load') as record:
+                df = load_snapshot(snapshot, key)
+                record.rows = 0 if df is None else len(df)
+            if df is not None:
+                return df, limit
+        # Читаємо CSV-файл із даними про погоду та якість повітря
+        self._report('Читання CSV-файлу', None)
+        with open_prefix(path, limit) as source:
+            df = self._read_source(source)
+        # Рядки впорядковуються для індексу ще до збереження знімка
+        with self.metrics.stage('sort', len(df)):
+            df = sort_for_index(df)
+        if self.cache_dir:
+            self._report('Збереження знімка даних', 0.8)
+            with self.metrics.stage('snapshot_save', len(df)):
+                save_snapshot(snapshot, key, df)
+        return df, limit
+
+    def _load_partitions(self, window, latest=False):
+        """Обробка ще не відкритих розділів, що можуть містити рядки для фільтрів window
+
+        Використовується опис, збережений під час завантаження або останнього ingest_new_rows, тож запити
+        не звертаються до файлової системи. latest — лише розділи з найновішими рядками кожного міста.
+        """
+        if latest:
+            selected = latest_partitions(self._manifest, window.get('country'), window.get('location'))
+        else:
+            selected = select_partitions(self._manifest, **window)
+        entries = [entry for entry in selected if entry['path'] not in self.loaded_partitions]
+        frames = []
+        for number, entry in enumerate(entries):
+            self._report(f"Завантаження розділу {entry['path']}", number / len(entries))
+            # Знімки розділів розрізняються за відносним шляхом
+            df, self.loaded_partitions[entry['path']] = self._load_file(os.path.join(self.data_path, entry['path']),
+                                                                         entry['path'].replace(os.sep, '__'))
+            frames.append(df)
+        return frames
+
+    def _ingest_partitions(self):
+        """Оновлення опису розділів: нові розділи стартового вікна відкриваються, відкриті — дочитуються
+
+        Незмінені розділи беруться з попереднього опису за розміром і часом зміни.
+        """
+        manifest = build_manifest(self.data_path)
+        if manifest != self._manifest:
+            # Нові розділи можуть містити найновіші вимірювання міст
+            self._manifest, self._alerts = manifest, None
+        frames = []
+        for entry in self._manifest['partitions']:
+            offset = self.loaded_partitions.get(entry['path'])
+            if offset is not None and entry['size'] > offset:
+                # Розділи лише доповнюються, тож дочитуються тільки нові рядки
+                path = os.path.join(self.data_path, entry['path'])
+                tail, self.loaded_partitions[entry['path']] = read_tail(path, offset, read_header(path))
+                if tail is not None and not tail.empty:
+                    frames.append(self.preprocess(tail))
+        frames.extend(self._load_partitions(self.window))
+        if not frames:
+            return 0
+        new_rows = concat_frames(frames)
+        self._merge_rows(new_rows)
+        return len(new_rows)
+
+    def _ensure_partitions(self, latest=False, **window):
+        """Довантаження розділів, потрібних для запиту (лише для каталогу розділів)"""
+        if self._manifest is None:
+            return
+        with self._lock:
+            frames = self._load_partitions(window, latest)
+            if frames:
+                self._merge_rows(concat_frames(frames))
+
+    def _merge_rows(self, new_rows):
+        """Додавання оброблених рядків до даних, індексу та куба
+
+        Нові рядки потрапляють у невеликий впорядкований сегмент зі своїм FilterIndex, який запити переглядають
+        разом з основним, тож кожне опитування коштує O(розмір сегмента), а не O(N). Злиття з основною таблицею
+        за O(N) відбувається лише після накопичення DELTA_MIN_ROWS рядків і 1/DELTA_FRACTION таблиці.
+        Куб і останні вимірювання оновлюються лише новими рядками.
+        """
+        if self._data is None:
+            self._build_indexes(sort_for_index(new_rows))
+            return
+        delta = new_rows if self._delta_index is None else concat_frames([self._delta_index.data, new_rows])
+        delta_index = FilterIndex(sort_appended(delta) if self._delta_index is not None else sort_for_index(delta))
+        with self._lock:
+            self._delta_index = delta_index
+        if len(delta) > max(DELTA_MIN_ROWS, len(self._data) // DELTA_FRACTION):
+            self._compact()
+        # Ще не побудовані куб і останні вимірювання врахують нові рядки під час побудови
+        if self._cube is not None:
+            self._cube.add(new_rows)
+        if self._latest is not None:
+            self._latest.update(new_rows)
+        self._alerts = None
+
+    def _compact(self):
+        """Злиття сегмента дочитаних рядків з основною таблицею та перебудова її індексу"""
+        if self._delta_index is None:
+            return
+        with self.metrics.stage('compact', len(self._delta_index.data)):
+            # Рядки, що йдуть після наявних ключів своїх груп, лише зливаються, без повного сортування
+            data = sort_appended(concat_frames([self._data, self._delta_index.data]))
+            index = FilterIndex(data)
+        with self._lock:
+            self._data, self.index, self._delta_index = data, index, None
+
+    def publish_shared(self, name=None):
+        """Публікація даних та індексу у спільній пам'яті для інших процесів
+
+        Повертає SharedFrame: його descriptor передається іншим процесам (параметр shared),
+        а close() звільняє блок, коли вони завершать роботу.
+        """
+        with self._lock:
+            data = self.data
+            if data is None:
+                raise ValueError("Немає завантажених даних для публікації")
+            return publish(data, self.index, name)
+
+    def get_countries(self):
+        """Список країн (для каталогу розділів — з опису, без читання даних)"""
+        if self._manifest is not None:
+            return manifest_countries(self._manifest)
+        with self._lock:
+            indexes = [index for index in (self.index, self._delta_index) if index is not None]
+        return sorted({country for index in indexes for country in index.countries()})
+
+    def get_locations(self, country=None):
+        """Список міст усіх або заданої країни"""
+        if self._manifest is not None:
+            return manifest_locations(self._manifest, country)
+        with self._lock:
+            indexes = [index for index in (self.index, self._delta_index) if index is not None]
+        return sorted({location for index in indexes for location in index.locations(country)})
+
+    def _read_source(self, source):
+        """Читання та обробка CSV у звичайному або компактному поданні"""
+        if self.lean:
+            df, self.ingest_stats = read_weather_csv(source, self.pollutants, self.chunksize,
+                                                     progress=self.progress, metrics=self.metrics)
+            return df
+        with self.metrics.stage('read_csv') as record:
+            df = pd.read_csv(source)
+            record.rows = len(df)
+        return self.preprocess(df)
+
+    def ingest_new_rows(self):
+        """Дочитування рядків, дописаних у CSV-файл (або в розділи) після останнього читання; повертає їх кількість"""
+        with self._lock:
+            if self._manifest is not None:
+                with self.metrics.stage('ingest_partitions') as record:
+                    record.rows = self._ingest_partitions()
+                return record.rows
+            if self._data is None or self._read_offset is None:
+                return 0
+            if os.path.getsize(self.data_path) < self._read_offset or \
+                    file_signature(self.data_path, self._read_offset) != self._source_signature:
+                # Файл обрізано, замінено чи перезаписано — повне перезавантаження
+                self._build_indexes(self.load_and_preprocess_data())
+                return 0 if self._data is None else len(self._data)
+            with self.metrics.stage('ingest_tail') as record:
+                tail, self._read_offset = read_tail(self.data_path, self._read_offset, self._source_columns)
+                self._source_signature = file_signature(self.data_path, self._read_offset)
+                if tail is None or tail.empty:
+                    return 0
+                # Похідні стовпці обчислюються лише для нових рядків
+                new_rows = self.preprocess(tail)
+                self._merge_rows(new_rows)
+                record.rows = len(new_rows)
+            return len(new_rows)
+
+    def follow(self, poll_interval=5.0, on_update=None, stop_event=None):
+        """Режим стеження: періодичне дочитування нових рядків, доки не встановлено stop_event"""
+        stop_event = stop_event or threading.Event()
+        while not stop_event.wait(poll_interval):
+            added = self.ingest_new_rows()
+            if added and on_update is not None:
+                on_update(added)
+
+    def preprocess(self, df):
+        """Обчислення похідних стовпців: дата, сезон, AQI та категорія якості повітря"""
+        return preprocess_frame(df, self.pollutants, lean=self.lean, metrics=self.metrics)
+
     def calculate_aqi(self, row):
         """Розрахунок AQI на основі PM2.5 і PM10"""
         pm25 = row['air_quality_PM2.5']
@@ -93,32 +384,52 @@ class AirQualityAnalyzer:
 
     def get_filtered_data(self, country=None, location=None, start_date=None, end_date=None):
         """Фільтрація даних за країною, містом і діапазоном дат"""
-        if self.data is None:
+        self._ensure_partitions(country=country, location=location, start_date=start_date, end_date=end_date)
+        # Індекс містить таблицю, над якою побудований, тож одне читання дає узгоджену пару (і сегмент)
+        with self._lock:
+            index, delta_index = self.index, self._delta_index
+        if index is None:
             return pd.DataFrame()
 
-        filtered_data = self.data.copy()
-
-        # Фільтрація за країною
-        if country:
-            filtered_data = filtered_data[filtered_data['country'] == country]
+        # Країна і місто — суцільні діапазони індексу, межі дат — двійковий пошук за datetime
+        with self.metrics.stage('filter') as record:
+            result = index.select(country, location, start_date, end_date)
+            if delta_index is not None:
+                recent = delta_index.select(country, location, start_date, end_date)
+                if len(recent):
+                    result = sort_appended(concat_frames([result, recent]))
+            record.rows = len(result)
+        return result
 
-        # Фільтрація за містом
-        if location:
-            filtered_data = filtered_data[filtered_data['location_name'] == location]
+    def get_aggregates(self, by='date', country=None, location=None, start_date=None, end_date=None):
+        """Агрегати AQI (кількість, сума, середнє, мінімум, максимум, категорії) з куба"""
+        self._ensure_partitions(country=country, location=location, start_date=start_date, end_date=end_date)
+        if self.cube is None:
+            return pd.DataFrame()
+        with self.metrics.stage('aggregate') as record:
+            result = self.cube.aggregate(by, country, location, start_date, end_date)
+            record.rows = len(result)
+        return result
 
-        # Фільтрація за діапазоном дат
-        if start_date:
-            try:
-                start_date = pd.to_datetime(start_date).date()
-                filtered_data = filtered_data[filtered_data['date'] >= start_date]
-            except ValueError:
-                pass  # Ігноруємо некоректний формат дати
+    def get_latest(self, country=None, location=None):
+        """Останнє вимірювання та категорія якості повітря кожного міста"""
+        # Для каталогу розділів достатньо найновіших розділів кожного міста, а не всіх місяців
+        self._ensure_partitions(latest=True, country=country, location=location)
+        return self.latest.frame(country, location)
 
-        if end_date:
-            try:
-                end_date = pd.to_datetime(end_date).date()
-                filtered_data = filtered_data[filtered_data['date'] <= end_date]
-            except ValueError:
-                pass  # Ігноруємо некоректний формат дати
+    def get_alerts(self, engine=None):
+        """Сповіщення за правилами engine (AlertEngine з правилами за замовчуванням) для всіх міст
 
-        return filtered_data
+        Сповіщення за правилами за замовчуванням обчислюються один раз після завантаження чи дочитування
+        нових рядків, тож повторні запити їх не перераховують.
+        """
+        with self._lock:
+            if engine is None and self._alerts is not None:
+                return self._alerts
+            self._ensure_partitions(latest=True)
+            with self.metrics.stage('alerts') as record:
+                result = (engine or AlertEngine()).evaluate(self.latest)
+                record.rows = len(result)
+            if engine is None:
+                self._alerts = result
+            return result
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+from aqi_engine import AQI_CATEGORIES, UNKNOWN_CATEGORY, category_codes
+from filter_index import sort_for_index
+from recommendations import RECOMMENDATIONS
+
+# Кількість останніх вимірювань кожного міста, що зберігаються для правил
+DEFAULT_DEPTH = 8
+_NAT = np.iinfo(np.int64).min
+_LABELS = np.array(AQI_CATEGORIES + [UNKNOWN_CATEGORY], dtype=object)
+_ADVICE = np.array([RECOMMENDATIONS.get(label) for label in _LABELS], dtype=object)
+_UNKNOWN_CODE = len(AQI_CATEGORIES)
+# Повідомлення для кожної пари категорій (попередня, поточна), щоб не форматувати рядки для кожного міста
+_TRANSITION_TEXT = np.array([[f"Категорія змінилася: {before} → {after}" for after in _LABELS] for before in _LABELS],
+                            dtype=object)
+
+
+def _recent_readings(df, depth):
+    """Країна, місто та останні depth вимірювань кожного міста: час у нс (G, depth) і AQI (G, depth)
+
+    Таблиця має бути впорядкована sort_for_index. Найновіше вимірювання — в останньому стовпці,
+    відсутні заповнюються NaT/NaN ліворуч; рядки без дати не враховуються.
+    """
+    country_codes, _ = pd.factorize(df['country'])
+    location_codes, _ = pd.factorize(df['location_name'])
+    changes = (np.diff(country_codes) != 0) | (np.diff(location_codes) != 0)
+    starts = np.concatenate([[0], np.flatnonzero(changes) + 1])
+    stamps = df['datetime'].to_numpy().astype('datetime64[ns]').view(np.int64)
+    # Рядки без дати стоять у кінці своєї групи, тож дійсні вимірювання групи йдуть поспіль
+    valid_count = np.add.reduceat((stamps != _NAT).astype(np.int64), starts)
+    positions = (starts + valid_count - 1)[:, None] - np.arange(depth - 1, -1, -1)
+    present = positions >= starts[:, None]
+    positions = np.where(present, positions, 0)
+    times = np.where(present, stamps[positions], _NAT)
+    aqi = np.where(present, df['aqi'].to_numpy(dtype=np.float64)[positions], np.nan)
+    return (np.asarray(df['country'], dtype=object)[starts], np.asarray(df['location_name'], dtype=object)[starts],
+            times, aqi)
+
+
+class LatestIndex:
+    """Останні вимірювання кожного міста; будується під час завантаження й оновлюється новими рядками"""
+
+    def __init__(self, data=None, depth=DEFAULT_DEPTH):
+        self.depth = depth
+        self.countries = np.empty(0, dtype=object)
+        self.locations = np.empty(0, dtype=object)
+        self.times = np.empty((0, depth), dtype=np.int64)
+        self.aqi = np.empty((0, depth))
+        self._lookup = {}
+        if data is not None and len(data):
+            self._append(*_recent_readings(data, depth))
+
+    def _append(self, countries, locations, times, aqi):
+        start = len(self.countries)
+        self.countries = np.concatenate([self.countries, countries])
+        self.locations = np.concatenate([self.locations, locations])
+        self.times = np.concatenate([self.times, times])
+        self.aqi = np.concatenate([self.aqi, aqi])
+        self._lookup.update((key, start + number) for number, key in enumerate(zip(countries, locations)))
+
+    def update(self, new_rows):
+        """Злиття вимірювань нових рядків (у довільному порядку) з наявними"""
+        if new_rows is None or not len(new_rows):
+            return
+        countries, locations, times, aqi = _recent_readings(sort_for_index(new_rows), self.depth)
+        rows = np.array([self._lookup.get(key, -1) for key in zip(countries, locations)], dtype=np.int64)
+        known = rows >= 0
+        if known.any():
+            # Для відомих міст з обох історій лишаються depth найновіших вимірювань
+            target = rows[known]
+            merged_times = np.concatenate([self.times[target], times[known]], axis=1)
+            merged_aqi = np.concatenate([self.aqi[target], aqi[known]], axis=1)
+            order = np.argsort(merged_times, axis=1, kind='stable')[:, -self.depth:]
+            self.times[target] = np.take_along_axis(merged_times, order, axis=1)
+            self.aqi[target] = np.take_along_axis(merged_aqi, order, axis=1)
+        if not known.all():
+            new = ~known
+            self._append(countries[new], locations[new], times[new], aqi[new])
+
+    def __len__(self):
+        return len(self.countries)
+
+    def frame(self, country=None, location=None):
+        """Останнє вимірювання та категорія кожного міста (або лише заданої країни/міста)"""
+        keep = np.ones(len(self), dtype=bool)
+        if country:
+            keep &= self.countries == country
+        if location:
+            keep &= self.locations == location
+        aqi = self.aqi[keep, -1]
+        return pd.DataFrame({
+            'country': self.countries[keep],
+            'location_name': self.locations[keep],
+            'datetime': self.times[keep, -1].view('datetime64[ns]'),
+            'aqi': aqi,
+            'air_quality_category': _LABELS[category_codes(aqi)],
+        })
+
+
+class CategoryTransition:
+    """Зміна категорії якості повітря між двома останніми вимірюваннями"""
+
+    name = 'category_transition'
+    readings = 2
+
+    def __init__(self, worsening_only=False):
+        self.worsening_only = worsening_only
+
+    def evaluate(self, aqi):
+        codes = category_codes(aqi[:, -2:])
+        previous, current = codes[:, 0], codes[:, 1]
+        changed = (previous != _UNKNOWN_CODE) & (current != _UNKNOWN_CODE)
+        changed &= (current > previous) if self.worsening_only else (current != previous)
+        return changed, _TRANSITION_TEXT[previous[changed], current[changed]]
+
+
+class SustainedExceedance:
+    """AQI вище порогу в кожному з останніх readings вимірювань"""
+
+    name = 'sustained_exceedance'
+
+    def __init__(self, threshold=150.0, readings=3):
+        self.threshold = threshold
+        self.readings = readings
+
+    def evaluate(self, aqi):
+        # NaN не перевищує поріг, тож пропуск перериває серію
+        exceeded = np.all(aqi[:, -self.readings:] > self.threshold, axis=1)
+        message = f"AQI вище {self.threshold:g} протягом {self.readings} вимірювань поспіль"
+        return exceeded, np.full(exceeded.sum(), message, dtype=object)
+
+
+DEFAULT_RULES = (CategoryTransition(), SustainedExceedance(150.0, 3))
+
+
+class AlertEngine:
+    """Перевірка правил для всіх міст одночасно над історіями LatestIndex"""
+
+    def __init__(self, rules=DEFAULT_RULES):
+        self.rules = list(rules)
+
+    def evaluate(self, latest):
+        """Сповіщення: місто, останнє вимірювання, правило, повідомлення та порада для поточної категорії"""
+        for rule in self.rules:
+            if rule.readings > latest.depth:
+                raise ValueError(f"Правилу {rule.name} потрібно {rule.readings} вимірювань, "
+                                 f"а індекс зберігає {latest.depth}")
+        codes = category_codes(latest.aqi[:, -1])
+        frames = []
+        for rule in self.rules:
+            mask, messages = rule.evaluate(latest.aqi)
+            rows = np.flatnonzero(mask)
+            # Рядкові стовпці лишаються об'єктними: перетворення на рядковий тип pandas повільніше за саму перевірку
+            frames.append(pd.DataFrame({
+                'country': pd.Series(latest.countries[rows], dtype=object),
+                'location_name': pd.Series(latest.locations[rows], dtype=object),
+                'datetime': latest.times[rows, -1].view('datetime64[ns]'),
+                'aqi': latest.aqi[rows, -1],
+                'air_quality_category': pd.Series(_LABELS[codes[rows]], dtype=object),
+                'rule': pd.Series(np.full(len(rows), rule.name, dtype=object), dtype=object),
+                'message': pd.Series(messages, dtype=object),
+                'recommendation': pd.Series(_ADVICE[codes[rows]], dtype=object),
+            }))
+        return pd.concat(frames, ignore_index=True)
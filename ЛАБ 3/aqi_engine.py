@@ -0,0 +1,104 @@
+import numpy as np
+
+# Версія таблиць розрахунку AQI (змінюється разом із таблицями нижче)
+AQI_TABLE_VERSION = 1
+
+# Межі індексу AQI, спільні для всіх забруднювачів
+_INDEX_LOW = np.array([0, 51, 101, 151, 201, 301], dtype=np.float64)
+_INDEX_HIGH = np.array([50, 100, 150, 200, 300, 500], dtype=np.float64)
+
+# Таблиці концентрацій: (назва, стовпець CSV, множник перерахунку з мкг/м³, нижні межі, верхні межі)
+# PM2.5 і PM10 збігаються з calculate_aqi; газові межі EPA задані в ppb (CO — у ppm)
+_TABLES = [
+    ('PM2.5', 'air_quality_PM2.5', 1.0,
+     [0, 12.1, 35.5, 55.5, 150.5, 250.5],
+     [12.0, 35.4, 55.4, 150.4, 250.4, 500.4]),
+    ('PM10', 'air_quality_PM10', 1.0,
+     [0, 55, 155, 255, 355, 425],
+     [54, 154, 254, 354, 424, 604]),
+    ('O3', 'air_quality_Ozone', 24.45 / 48.00,
+     [0, 55, 71, 86, 106, 201],
+     [54, 70, 85, 105, 200, 604]),
+    ('NO2', 'air_quality_Nitrogen_dioxide', 24.45 / 46.01,
+     [0, 54, 101, 361, 650, 1250],
+     [53, 100, 360, 649, 1249, 2049]),
+    ('SO2', 'air_quality_Sulphur_dioxide', 24.45 / 64.07,
+     [0, 36, 76, 186, 305, 605],
+     [35, 75, 185, 304, 604, 1004]),
+    ('CO', 'air_quality_Carbon_Monoxide', 24.45 / 28.01 / 1000.0,
+     [0, 4.5, 9.5, 12.5, 15.5, 30.5],
+     [4.4, 9.4, 12.4, 15.4, 30.4, 50.4]),
+]
+
+AQI_BREAKPOINTS = {
+    name: {
+        'column': column,
+        'factor': factor,
+        'low': np.array(low, dtype=np.float64),
+        'high': np.array(high, dtype=np.float64),
+    }
+    for name, column, factor, low, high in _TABLES
+}
+
+PM_POLLUTANTS = ('PM2.5', 'PM10')
+ALL_POLLUTANTS = tuple(name for name, *_ in _TABLES)
+
+# Категорії якості повітря та їхні верхні межі AQI
+AQI_CATEGORIES = [
+    'Добре',
+    'Помірне',
+    'Шкідливе для чутливих груп',
+    'Шкідливе',
+    'Дуже шкідливе',
+    'Небезпечне'
+]
+UNKNOWN_CATEGORY = 'Невідомо'
+_CATEGORY_LIMITS = np.array([50, 100, 150, 200, 300], dtype=np.float64)
+
+
+def component_aqi(values, pollutant):
+    """Розрахунок AQI окремого забруднювача для цілого стовпця"""
+    table = AQI_BREAKPOINTS[pollutant]
+    cp = np.asarray(values, dtype=np.float64)
+    if table['factor'] != 1.0:
+        cp = cp * table['factor']
+    # Номер інтервалу: перша верхня межа, не менша за концентрацію
+    # (вище за останню межу — екстраполяція останнього інтервалу, як у calculate_aqi)
+    bucket = np.searchsorted(table['high'], cp, side='left')
+    bucket = np.minimum(bucket, len(table['high']) - 1)
+    bp_low = table['low'][bucket]
+    bp_high = table['high'][bucket]
+    i_low = _INDEX_LOW[bucket]
+    i_high = _INDEX_HIGH[bucket]
+    return ((i_high - i_low) / (bp_high - bp_low)) * (cp - bp_low) + i_low
+
+
+def compute_aqi(df, pollutants=PM_POLLUTANTS):
+    """Векторний розрахунок AQI та домінантного забруднювача для всіх рядків"""
+    aqi = None
+    dominant = None
+    for code, pollutant in enumerate(pollutants):
+        component = component_aqi(df[AQI_BREAKPOINTS[pollutant]['column']], pollutant)
+        if aqi is None:
+            aqi = component
+            dominant = np.where(np.isnan(component), -1, code)
+            continue
+        # Порівняння як у вбудованому max(): новий компонент виграє лише якщо він більший
+        better = component > aqi
+        aqi = np.where(better, component, aqi)
+        dominant = np.where(better, code, dominant)
+    names = np.array(list(pollutants) + [None], dtype=object)
+    return aqi, names[dominant]
+
+
+def category_codes(aqi):
+    """Номери категорій AQI_CATEGORIES для значень AQI; len(AQI_CATEGORIES) — невідома категорія"""
+    aqi = np.asarray(aqi, dtype=np.float64)
+    codes = np.searchsorted(_CATEGORY_LIMITS, aqi, side='left')
+    return np.where(np.isnan(aqi), len(AQI_CATEGORIES), codes)
+
+
+def categorize_aqi(aqi):
+    """Класифікація якості повітря на основі AQI"""
+    labels = np.array(AQI_CATEGORIES + [UNKNOWN_CATEGORY], dtype=object)
+    return labels[category_codes(aqi)]
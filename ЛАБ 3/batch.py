@@ -0,0 +1,112 @@
+import argparse
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from aqi_engine import ALL_POLLUTANTS, PM_POLLUTANTS
+from ingest import preprocess_frame, read_header
+from rollup_cube import AqiCube
+from snapshot_cache import save_snapshot
+
+DEFAULT_SHARD_BYTES = 64 << 20
+
+
+def plan_shards(path, shard_bytes=DEFAULT_SHARD_BYTES):
+    """Поділ CSV-файлу на діапазони байтів [start, stop) приблизно однакового розміру"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header_end = len(f.readline())
+    if size <= header_end:
+        return []
+    bounds = list(range(header_end, size, max(shard_bytes, 1))) + [size]
+    return [(path, start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def read_shard(path, start, stop, columns):
+    """Сирі рядки, що починаються в межах [start, stop) (рядки з переносами в лапках не підтримуються)"""
+    with open(path, 'rb') as f:
+        f.seek(max(start - 1, 0))
+        # Частковий рядок на початку належить попередньому шматку
+        if start > 0:
+            f.readline()
+        position = f.tell()
+        if position >= stop:
+            return pd.DataFrame(columns=columns)
+        block = f.read(stop - position)
+        if not block.endswith(b'\n'):
+            block += f.readline()
+    return pd.read_csv(io.BytesIO(block), header=None, names=columns)
+
+
+def process_shard(task):
+    """Обробка одного шматка в окремому процесі: похідні стовпці, AQI та комірки агрегатів"""
+    path, start, stop, columns, pollutants, output_dir, output_format, name = task
+    # Компактне подання: дата й час як datetime64, що однаково записуються в обидва формати
+    df = preprocess_frame(read_shard(path, start, stop, columns), pollutants, lean=True)
+    write_frame(df, os.path.join(output_dir, 'enriched', name), output_format)
+    return name, len(df), AqiCube(df).cells
+
+
+def write_frame(df, path, output_format):
+    """Запис таблиці у стовпцевому форматі: Parquet (потрібен pyarrow) або каталог .npy"""
+    if output_format == 'parquet':
+        df.to_parquet(path + '.parquet', index=False)
+    else:
+        save_snapshot(path, {'rows': len(df)}, df)
+
+
+def run_batch(inputs, output_dir, workers=None, shard_bytes=DEFAULT_SHARD_BYTES, pollutants=PM_POLLUTANTS,
+              output_format='npy'):
+    """Паралельна обробка файлів: збагачені шматки та підсумкові агрегати у output_dir"""
+    os.makedirs(os.path.join(output_dir, 'enriched'), exist_ok=True)
+    tasks = []
+    for number, path in enumerate(inputs):
+        columns = read_header(path)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for shard, (_, start, stop) in enumerate(plan_shards(path, shard_bytes)):
+            name = f"{number:03d}-{stem}-{shard:05d}"
+            tasks.append((path, start, stop, columns, tuple(pollutants), output_dir, output_format, name))
+
+    rows = 0
+    shard_cells = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for _, count, cells in pool.map(process_shard, tasks):
+            rows += count
+            shard_cells.append(cells)
+    # Комірки всіх шматків зливаються в спільний куб одним групуванням
+    cube = AqiCube()
+    if shard_cells:
+        cube.merge_cells(pd.concat(shard_cells))
+
+    summary = {'rows': rows, 'shards': len(tasks)}
+    for by in ('date', 'country', 'location_name', 'month', 'season', 'hour'):
+        aggregates = cube.aggregate(by).reset_index()
+        write_frame(aggregates, os.path.join(output_dir, f"summary_by_{by}"), output_format)
+    write_frame(cube.cells.reset_index(), os.path.join(output_dir, 'summary_cells'), output_format)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Пакетний розрахунок AQI для CSV-файлів GlobalWeatherRepository')
+    parser.add_argument('inputs', nargs='+', help='вхідні CSV-файли')
+    parser.add_argument('-o', '--output', required=True, help='каталог результатів')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='кількість процесів (усі ядра за замовчуванням)')
+    parser.add_argument('--shard-mb', type=float, default=DEFAULT_SHARD_BYTES / (1 << 20),
+                        help='розмір шматка великого файлу, МБ')
+    parser.add_argument('--all-pollutants', action='store_true', help='враховувати O3, NO2, SO2 і CO')
+    parser.add_argument('--format', choices=['npy', 'parquet'], default='npy', help='формат результатів')
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.inputs, args.output, workers=args.workers,
+                        shard_bytes=int(args.shard_mb * (1 << 20)),
+                        pollutants=ALL_POLLUTANTS if args.all_pollutants else PM_POLLUTANTS,
+                        output_format=args.format)
+    print(f"Оброблено рядків: {summary['rows']}, шматків: {summary['shards']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,247 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from AirQualityAnalyzer import AirQualityAnalyzer
+from aqi_engine import PM_POLLUTANTS, compute_aqi
+from metrics import PipelineMetrics
+from synthetic import location_table, write_weather_csv
+
+try:
+    from table_model import DataFrameTableModel
+except ImportError:  # Без PyQt5 вимірювання таблиці пропускається
+    DataFrameTableModel = None
+
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+DEFAULT_THRESHOLD = 0.25
+# Різниця часу, меншу за цю (с), не вважаємо погіршенням: для малих наборів це шум вимірювання
+MIN_TIME_DELTA = 0.01
+# Кількість рядків таблиці, видимих на екрані одночасно
+VISIBLE_ROWS = 50
+_START, _END = pd.Timestamp('2023-01-01'), pd.Timestamp('2024-12-31')
+
+
+class BenchmarkContext:
+    """Дані одного розміру набору: CSV-файл і аналізатор, створений за потреби"""
+
+    def __init__(self, csv_path, rows):
+        self.csv_path = csv_path
+        self.rows = rows
+        self._analyzer = None
+
+    @property
+    def analyzer(self):
+        if self._analyzer is None:
+            self._analyzer = AirQualityAnalyzer(self.csv_path)
+        return self._analyzer
+
+    def broad_filter(self):
+        """Фільтр без країни на середню половину періоду"""
+        span = _END - _START
+        return {'start_date': str((_START + span / 4).date()), 'end_date': str((_END - span / 4).date())}
+
+    def selective_filter(self):
+        """Фільтр одного міста за тиждень у середині періоду"""
+        country, location = location_table()
+        middle = _START + (_END - _START) / 2
+        return {'country': country[0], 'location': location[0],
+                'start_date': str(middle.date()), 'end_date': str((middle + pd.Timedelta(days=7)).date())}
+
+
+# Кожен випадок готує дані поза вимірюванням і повертає функцію, що повертає кількість оброблених рядків
+
+def case_csv_load_preprocess(ctx):
+    def run():
+        ctx._analyzer = AirQualityAnalyzer(ctx.csv_path)
+        return len(ctx._analyzer.data)
+    return run
+
+
+def case_csv_load_preprocess_lean(ctx):
+    def run():
+        return len(AirQualityAnalyzer(ctx.csv_path, lean=True).data)
+    return run
+
+
+def case_aqi(ctx):
+    frame = ctx.analyzer.data[['air_quality_PM2.5', 'air_quality_PM10']]
+    return lambda: (compute_aqi(frame, PM_POLLUTANTS), len(frame))[1]
+
+
+def case_filter_selective(ctx):
+    filters = ctx.selective_filter()
+    return lambda: len(ctx.analyzer.get_filtered_data(**filters))
+
+
+def case_filter_broad(ctx):
+    filters = ctx.broad_filter()
+    return lambda: len(ctx.analyzer.get_filtered_data(**filters))
+
+
+def case_plot_groupby(ctx):
+    # Середній AQI за датами безпосередньо з відфільтрованих рядків
+    frame = ctx.analyzer.get_filtered_data(**ctx.broad_filter())
+    return lambda: (frame.groupby('date')['aqi'].mean(), len(frame))[1]
+
+
+def case_plot_aggregates(ctx):
+    # Ті самі середні з куба агрегатів, як їх отримує головне вікно
+    filters = ctx.broad_filter()
+    return lambda: int(ctx.analyzer.get_aggregates('date', **filters)['count'].sum())
+
+
+def case_table_population(ctx):
+    if DataFrameTableModel is None:
+        return None
+    frame = ctx.analyzer.get_filtered_data(**ctx.broad_filter())
+    model = DataFrameTableModel()
+
+    def run():
+        model.set_frame(frame)
+        # Форматуються лише клітинки видимої частини таблиці
+        for row in range(min(VISIBLE_ROWS, model.rowCount())):
+            for column in range(model.columnCount()):
+                model.data(model.index(row, column))
+        return len(frame)
+    return run
+
+
+CASES = {
+    'csv_load_preprocess': case_csv_load_preprocess,
+    'csv_load_preprocess_lean': case_csv_load_preprocess_lean,
+    'aqi': case_aqi,
+    'filter_selective': case_filter_selective,
+    'filter_broad': case_filter_broad,
+    'plot_groupby': case_plot_groupby,
+    'plot_aggregates': case_plot_aggregates,
+    'table_population': case_table_population,
+}
+
+
+def dataset_path(data_dir, rows):
+    """Шлях до синтетичного CSV-файлу; файл створюється, якщо його ще немає"""
+    path = os.path.join(data_dir, f"synthetic_{rows}.csv")
+    if not os.path.exists(path):
+        write_weather_csv(path, rows)
+    return path
+
+
+def measure_case(run, repeat=3, memory=True):
+    """Найменший час із repeat запусків і пікова пам'ять окремого запуску під tracemalloc"""
+    metrics = PipelineMetrics()
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        with metrics.stage('run') as record:
+            record.rows = run()
+        timings.append(record.seconds)
+    seconds = min(timings)
+    result = {'rows': int(record.rows), 'seconds': seconds,
+              'rows_per_second': record.rows / seconds if seconds else None}
+    if memory:
+        # Окремий запуск: tracemalloc сповільнює код і спотворив би вимірювання часу
+        gc.collect()
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        try:
+            with metrics.stage('run_traced') as record:
+                run()
+            result['peak_alloc_bytes'] = record.peak_alloc_bytes
+        finally:
+            if started:
+                tracemalloc.stop()
+    return result
+
+
+def run_benchmarks(sizes, data_dir, cases=None, repeat=3, memory=True, log=print):
+    """Вимірювання випадків CASES для кожного розміру набору; повертає результати для JSON"""
+    results = {}
+    for label, rows in sizes.items():
+        ctx = BenchmarkContext(dataset_path(data_dir, rows), rows)
+        results[label] = {}
+        for name in cases or CASES:
+            run = CASES[name](ctx)
+            if run is None:
+                continue
+            results[label][name] = measure_case(run, repeat, memory)
+            if log is not None:
+                entry = results[label][name]
+                log(f"{label:>4} {name:<26} {entry['seconds']:9.4f} с {entry['rows_per_second'] or 0:14,.0f} рядків/с")
+    return {'meta': environment(), 'results': results}
+
+
+def environment():
+    """Версії Python і бібліотек, з якими отримано результати"""
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'machine': platform.machine(), 'system': platform.system(), 'cpus': os.cpu_count()}
+
+
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD, memory_threshold=None,
+                    min_delta=MIN_TIME_DELTA):
+    """Перелік погіршень: час або пікова пам'ять більші за базові більш ніж на threshold"""
+    memory_threshold = threshold if memory_threshold is None else memory_threshold
+    regressions = []
+    for label, cases in current['results'].items():
+        for name, entry in cases.items():
+            base = baseline.get('results', {}).get(label, {}).get(name)
+            if base is None:
+                continue
+            if entry['seconds'] > base['seconds'] * (1 + threshold) and entry['seconds'] - base['seconds'] > min_delta:
+                regressions.append(f"{label}/{name}: час {entry['seconds']:.4f} с проти {base['seconds']:.4f} с")
+            peak, base_peak = entry.get('peak_alloc_bytes'), base.get('peak_alloc_bytes')
+            if peak and base_peak and peak > base_peak * (1 + memory_threshold):
+                regressions.append(f"{label}/{name}: пам'ять {peak} Б проти {base_peak} Б")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Вимірювання продуктивності обробки даних про якість повітря')
+    parser.add_argument('--sizes', nargs='+', default=['10k'], choices=list(SIZES), help='розміри наборів')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), help='лише задані випадки')
+    parser.add_argument('--data-dir', default='.bench_data', help='каталог синтетичних CSV-файлів')
+    parser.add_argument('--baseline', default='bench_baseline.json', help='файл базових результатів')
+    parser.add_argument('--output', help='файл результатів поточного запуску')
+    parser.add_argument('--update-baseline', action='store_true', help='записати результати як базові')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='допустиме погіршення часу')
+    parser.add_argument('--memory-threshold', type=float, default=None, help='допустиме погіршення пам\'яті')
+    parser.add_argument('--repeat', type=int, default=3, help='кількість запусків кожного випадку')
+    parser.add_argument('--no-memory', action='store_true', help='не вимірювати пікову пам\'ять')
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks({label: SIZES[label] for label in args.sizes}, args.data_dir, args.cases,
+                             args.repeat, not args.no_memory)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=1)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    if args.update_baseline or baseline is None:
+        # Нові розміри й випадки додаються до наявних базових результатів
+        merged = baseline or {'results': {}}
+        merged['meta'] = current['meta']
+        for label, cases in current['results'].items():
+            merged['results'].setdefault(label, {}).update(cases)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(merged, f, ensure_ascii=False, indent=1)
+        print(f"Базові результати записано у {args.baseline}")
+        return 0
+
+    regressions = compare_results(current, baseline, args.threshold, args.memory_threshold)
+    for line in regressions:
+        print('Погіршення:', line)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+_NAT = np.iinfo(np.int64).min
+
+
+def _index_keys(df):
+    """Коди країн і міст (у порядку сортування) та час у секундах для кожного рядка"""
+    country_codes, countries = pd.factorize(df['country'], sort=True)
+    location_codes, locations = pd.factorize(df['location_name'], sort=True)
+    # Пропуски (-1) переносимо в кінець порядку сортування
+    country_codes = np.where(country_codes < 0, len(countries), country_codes)
+    location_codes = np.where(location_codes < 0, len(locations), location_codes)
+    seconds = df['datetime'].to_numpy().astype('datetime64[s]').astype(np.int64)
+    return country_codes, countries, location_codes, locations, seconds
+
+
+def sort_for_index(df):
+    """Впорядкування рядків за (країна, місто, datetime) — один раз під час завантаження"""
+    country_codes, _, location_codes, _, seconds = _index_keys(df)
+    # NaT іде в кінець своєї групи
+    seconds = np.where(seconds == _NAT, np.iinfo(np.int64).max, seconds)
+    order = np.lexsort((seconds, location_codes, country_codes))
+    if np.array_equal(order, np.arange(len(df))):
+        return df
+    return df.take(order).reset_index(drop=True)
+
+
+def sort_appended(df):
+    """Впорядкування, як у sort_for_index, таблиці з уже впорядкованим початком і дописаними рядками
+
+    Рядки кодуються одним ключем (група, час), тож стабільне сортування (timsort) лише зливає впорядкований
+    початок із новими рядками — O(N) замість повного lexsort за O(N log N).
+    """
+    country_codes, countries, location_codes, locations, seconds = _index_keys(df)
+    valid = seconds != _NAT
+    min_second = int(seconds[valid].min()) if valid.any() else 0
+    span = (int(seconds[valid].max()) if valid.any() else 0) - min_second + 2
+    if (len(countries) + 1) * (len(locations) + 1) * span >= 2 ** 63:
+        return sort_for_index(df)  # Ключ не вміщується в int64
+    groups = country_codes.astype(np.int64) * (len(locations) + 1) + location_codes
+    # NaT іде в кінець своєї групи
+    keys = groups * span + np.where(valid, seconds - min_second, span - 1)
+    if np.all(keys[1:] >= keys[:-1]):
+        return df
+    order = np.argsort(keys, kind='stable')
+    return df.take(order).reset_index(drop=True)
+
+
+class FilterIndex:
+    """Індекс таблиці, відсортованої за (країна, місто, datetime), для фільтрації без сканування"""
+
+    def __init__(self, data):
+        self.data = data
+        country_codes, countries, location_codes, locations, seconds = _index_keys(data)
+        self._country_lookup = {value: code for code, value in enumerate(countries)}
+        self._location_lookup = {value: code for code, value in enumerate(locations)}
+
+        # Межі груп (країна, місто): рядки кожної групи йдуть поспіль
+        n = len(data)
+        changes = np.flatnonzero((np.diff(country_codes) != 0) | (np.diff(location_codes) != 0)) + 1
+        self.group_starts = np.concatenate([[0], changes]) if n else np.array([], dtype=np.int64)
+        self.group_country = country_codes[self.group_starts]
+        self.group_location = location_codes[self.group_starts]
+
+        # Складений ключ group * span + зсув часу: одним searchsorted знаходимо межі дат у всіх групах
+        valid = seconds != _NAT
+        self._min_second = int(seconds[valid].min()) if valid.any() else 0
+        max_second = int(seconds[valid].max()) if valid.any() else 0
+        self._span = max_second - self._min_second + 2
+        offsets = np.where(valid, seconds - self._min_second, self._span - 1)
+        group_ids = np.repeat(np.arange(len(self.group_starts)), np.diff(np.append(self.group_starts, n)))
+        self._keys = group_ids * self._span + offsets
+
+    # Масиви індексу, які можна зберегти поза процесом (наприклад, у спільній пам'яті)
+    STATE_ARRAYS = ('group_starts', 'group_country', 'group_location', '_keys')
+
+    def state(self):
+        """Масиви та параметри індексу для відновлення без повторної побудови"""
+        arrays = {name: getattr(self, name) for name in self.STATE_ARRAYS}
+        meta = {'countries': list(self._country_lookup), 'locations': list(self._location_lookup),
+                'min_second': self._min_second, 'span': self._span}
+        return arrays, meta
+
+    @classmethod
+    def from_state(cls, data, arrays, meta):
+        """Індекс над data із масивів state() без копіювання"""
+        index = cls.__new__(cls)
+        index.data = data
+        for name in cls.STATE_ARRAYS:
+            setattr(index, name, arrays[name])
+        index._country_lookup = {value: code for code, value in enumerate(meta['countries'])}
+        index._location_lookup = {value: code for code, value in enumerate(meta['locations'])}
+        index._min_second = meta['min_second']
+        index._span = meta['span']
+        return index
+
+    def countries(self):
+        """Список країн у порядку сортування"""
+        return list(self._country_lookup)
+
+    def locations(self, country=None):
+        """Список міст (усіх або лише заданої країни)"""
+        groups = self._groups(country, None)
+        if groups is None:
+            return []
+        names = list(self._location_lookup)
+        return sorted({names[code] for code in self.group_location[groups] if code < len(names)})
+
+    def _groups(self, country, location):
+        """Номери груп, що відповідають країні та/або місту; None — жодної"""
+        groups = np.arange(len(self.group_starts))
+        if country:
+            code = self._country_lookup.get(country)
+            if code is None:
+                return None
+            lo = np.searchsorted(self.group_country, code, side='left')
+            hi = np.searchsorted(self.group_country, code, side='right')
+            groups = groups[lo:hi]
+        if location:
+            code = self._location_lookup.get(location)
+            if code is None:
+                return None
+            groups = groups[self.group_location[groups] == code]
+        return groups
+
+    def _offset(self, value, shift_days=0):
+        """Зсув дати відносно найменшого часу індексу; None для некоректної дати"""
+        try:
+            moment = pd.to_datetime(value).normalize() + pd.Timedelta(days=shift_days)
+        except ValueError:
+            return None  # Ігноруємо некоректний формат дати
+        second = int(moment.to_datetime64().astype('datetime64[s]').astype(np.int64))
+        return int(np.clip(second - self._min_second, 0, self._span - 1))
+
+    def ranges(self, country=None, location=None, start_date=None, end_date=None):
+        """Межі [start, stop) відібраних рядків у відсортованій таблиці"""
+        groups = self._groups(country, location)
+        if groups is None or len(groups) == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        start = self._offset(start_date) if start_date else None
+        end = self._offset(end_date, shift_days=1) if end_date else None
+        if start is None and end is None:
+            # Без фільтра дат беремо групи цілком (разом із рядками без дати)
+            low, high = 0, self._span
+        else:
+            low = start if start is not None else 0
+            high = end if end is not None else self._span - 1
+        base = groups * self._span
+        starts = np.searchsorted(self._keys, base + low, side='left')
+        stops = np.searchsorted(self._keys, base + high, side='left')
+        keep = stops > starts
+        starts, stops = starts[keep], stops[keep]
+        # Суміжні діапазони зливаються в один
+        if len(starts) > 1:
+            joined = starts[1:] == stops[:-1]
+            starts = starts[np.concatenate([[True], ~joined])]
+            stops = stops[np.concatenate([~joined, [True]])]
+        return starts, stops
+
+    def select(self, country=None, location=None, start_date=None, end_date=None):
+        """Відібрані рядки: зріз для суцільного діапазону або вибірка лише потрібних рядків"""
+        starts, stops = self.ranges(country, location, start_date, end_date)
+        if len(starts) == 0:
+            return self.data.iloc[0:0]
+        if len(starts) == 1:
+            return self.data.iloc[starts[0]:stops[0]]
+        lengths = stops - starts
+        positions = np.repeat(starts - np.cumsum(np.concatenate([[0], lengths[:-1]])), lengths)
+        positions += np.arange(lengths.sum())
+        return self.data.take(positions)
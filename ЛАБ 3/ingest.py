@@ -0,0 +1,232 @@
+import csv
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from aqi_engine import AQI_CATEGORIES, ALL_POLLUTANTS, PM_POLLUTANTS, UNKNOWN_CATEGORY, compute_aqi, categorize_aqi
+from metrics import measure
+
+SEASONS = ['Зима', 'Весна', 'Літо', 'Осінь']
+# Сезон за номером місяця (індекс 0 не використовується)
+SEASON_BY_MONTH = np.array([None, 'Зима', 'Зима', 'Весна', 'Весна', 'Весна', 'Літо',
+                             'Літо', 'Літо', 'Осінь', 'Осінь', 'Осінь', 'Зима'], dtype=object)
+
+# Компактна схема відомих стовпців GlobalWeatherRepository.csv
+LEAN_SCHEMA = {
+    'country': 'category',
+    'location_name': 'category',
+    'timezone': 'category',
+    'condition_text': 'category',
+    'wind_direction': 'category',
+    'moon_phase': 'category',
+    'air_quality_PM2.5': 'float32',
+    'air_quality_PM10': 'float32',
+    'air_quality_Carbon_Monoxide': 'float32',
+    'air_quality_Ozone': 'float32',
+    'air_quality_Nitrogen_dioxide': 'float32',
+    'air_quality_Sulphur_dioxide': 'float32',
+    'air_quality_us-epa-index': 'int8',
+    'air_quality_gb-defra-index': 'int8',
+    'humidity': 'int16',
+    'cloud': 'int16',
+    'wind_degree': 'int16',
+}
+
+_DERIVED_SCHEMA = {
+    'hour': 'int8',
+    'month': 'int8',
+    'year': 'int16',
+}
+
+_FIXED_CATEGORIES = {
+    'season': SEASONS,
+    'air_quality_category': AQI_CATEGORIES + [UNKNOWN_CATEGORY],
+    'dominant_pollutant': list(ALL_POLLUTANTS),
+}
+
+DEFAULT_CHUNKSIZE = 100_000
+_TAIL_BLOCK = 1 << 16
+# Скільки байтів початку файлу хешується, щоб помітити його заміну
+_SIGNATURE_BLOCK = 1 << 12
+
+
+def preprocess_frame(df, pollutants=PM_POLLUTANTS, lean=False, metrics=None):
+    """Обчислення похідних стовпців: дата, сезон, AQI та категорія якості повітря"""
+    rows = len(df)
+    # Конвертація стовпця 'last_updated' у формат datetime
+    with measure(metrics, 'to_datetime', rows):
+        df['datetime'] = pd.to_datetime(df['last_updated'])
+    # Витягуємо дату, час, годину, місяць і рік із datetime
+    with measure(metrics, 'datetime_parts', rows):
+        if lean:
+            # Дата й час лишаються типами datetime64/timedelta64 замість об'єктів Python
+            df['date'] = df['datetime'].dt.normalize()
+            df['time'] = df['datetime'] - df['date']
+        else:
+            df['date'] = df['datetime'].dt.date
+            df['time'] = df['datetime'].dt.time
+        df['hour'] = df['datetime'].dt.hour
+        df['month'] = df['datetime'].dt.month
+        df['year'] = df['datetime'].dt.year
+    # Визначаємо сезон на основі місяця
+    with measure(metrics, 'season', rows):
+        df['season'] = SEASON_BY_MONTH[df['month'].fillna(0).astype(int).to_numpy()]
+    # Розраховуємо AQI (Індекс якості повітря) для всіх рядків одразу
+    with measure(metrics, 'aqi', rows):
+        df['aqi'], df['dominant_pollutant'] = compute_aqi(df, pollutants)
+    # Класифікуємо якість повітря на основі AQI
+    with measure(metrics, 'category', rows):
+        df['air_quality_category'] = categorize_aqi(df['aqi'])
+    if lean:
+        with measure(metrics, 'lean_schema', rows):
+            df = apply_lean_schema(df)
+    return df
+
+
+def apply_lean_schema(df):
+    """Приведення стовпців до компактних типів: float32, малі цілі та категорії"""
+    dtypes = {}
+    for name in df.columns:
+        dtype = df[name].dtype
+        if name in _FIXED_CATEGORIES:
+            dtypes[name] = pd.CategoricalDtype(_FIXED_CATEGORIES[name])
+            continue
+        target = LEAN_SCHEMA.get(name, _DERIVED_SCHEMA.get(name))
+        if target is None and pd.api.types.is_float_dtype(dtype):
+            target = 'float32'
+        # Цілі стовпці з пропусками лишаються дробовими
+        if target is not None and target.startswith('int') and df[name].isna().any():
+            target = 'float32'
+        if target is not None:
+            dtypes[name] = target
+    return df.astype(dtypes)
+
+
+def memory_per_row(df):
+    """Середній обсяг пам'яті (у байтах) на один рядок таблиці"""
+    if len(df) == 0:
+        return 0.0
+    return float(df.memory_usage(deep=True).sum()) / len(df)
+
+
+def concat_frames(frames):
+    """Об'єднання частин таблиці зі збереженням категоріальних стовпців"""
+    frames = [frame for frame in frames if len(frame)] or list(frames[:1])
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    columns = frames[0].columns
+    merged = {}
+    for name in columns:
+        dtypes = {frame[name].dtype for frame in frames}
+        if any(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes) and len(dtypes) > 1:
+            # Різні словники категорій об'єднуються без переходу до об'єктних рядків
+            merged[name] = union_categoricals([pd.Categorical(frame[name]) for frame in frames],
+                                              sort_categories=True)
+    result = pd.concat([frame.drop(columns=list(merged)) for frame in frames], ignore_index=True)
+    for name, values in merged.items():
+        result[name] = values
+    return result[columns]
+
+
+def read_weather_csv(source, pollutants=PM_POLLUTANTS, chunksize=DEFAULT_CHUNKSIZE, progress=None, metrics=None):
+    """Почастинне читання CSV у компактному поданні зі статистикою пам'яті"""
+    frames = []
+    stats = {'rows': 0, 'chunks': 0, 'bytes_per_row_before': None, 'bytes_per_row_after': None}
+    chunks = iter(pd.read_csv(source, chunksize=chunksize))
+    while True:
+        # Розбір CSV вимірюється окремо від обчислення похідних стовпців
+        with measure(metrics, 'read_csv') as record:
+            chunk = next(chunks, None)
+            record.rows = 0 if chunk is None else len(chunk)
+        if chunk is None:
+            break
+        if stats['bytes_per_row_before'] is None:
+            # Оцінка звичайного подання — за першою частиною
+            stats['bytes_per_row_before'] = memory_per_row(preprocess_frame(chunk.copy(), pollutants))
+        frames.append(preprocess_frame(chunk, pollutants, lean=True, metrics=metrics))
+        stats['rows'] += len(chunk)
+        stats['chunks'] += 1
+        if progress is not None:
+            progress(f"Прочитано рядків: {stats['rows']}", None)
+    if not frames:
+        raise ValueError("CSV-файл не містить рядків")
+    df = concat_frames(frames)
+    stats['bytes_per_row_after'] = memory_per_row(df)
+    return df, stats
+
+
+def complete_prefix_size(path):
+    """Розмір частини файлу, що закінчується останнім повним рядком"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        position = size
+        while position > 0:
+            start = max(0, position - _TAIL_BLOCK)
+            f.seek(start)
+            block = f.read(position - start)
+            newline = block.rfind(b'\n')
+            if newline >= 0:
+                return start + newline + 1
+            position = start
+    return 0
+
+
+class _PrefixReader(io.RawIOBase):
+    """Потік, що віддає не більше limit байтів файлу"""
+
+    def __init__(self, f, limit):
+        self._file = f
+        self._remaining = limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        read = self._file.readinto(memoryview(buffer)[:size])
+        self._remaining -= read
+        return read
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_prefix(path, limit, offset=0):
+    """Текстовий потік по байтах [offset, limit) файлу"""
+    f = open(path, 'rb')
+    f.seek(offset)
+    return io.TextIOWrapper(io.BufferedReader(_PrefixReader(f, limit - offset)), encoding='utf-8', newline='')
+
+
+def read_header(path):
+    """Назви стовпців із першого рядка CSV-файлу"""
+    with open(path, encoding='utf-8', newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def file_signature(path, offset):
+    """Ознака файлу: пристрій, inode і хеш уже прочитаного початку (не більше _SIGNATURE_BLOCK байтів)
+
+    Дописування рядків її не змінює, а заміна чи перезапис файлу — змінює, навіть якщо новий файл довший.
+    """
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        head = f.read(min(offset, _SIGNATURE_BLOCK))
+    return stat.st_dev, stat.st_ino, hashlib.blake2b(head, digest_size=16).hexdigest()
+
+
+def read_tail(path, offset, columns):
+    """Сирі рядки, дописані у файл після offset, і нове зміщення (лише повні рядки)"""
+    limit = complete_prefix_size(path)
+    if limit <= offset:
+        return None, offset
+    with open_prefix(path, limit, offset) as stream:
+        tail = pd.read_csv(stream, header=None, names=columns)
+    return tail, limit
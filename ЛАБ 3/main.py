@@ -4,16 +4,40 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                             QPushButton, QComboBox, QDateEdit, QTextEdit, QTabWidget,
-                            QMessageBox, QTableWidget, QTableWidgetItem, QLabel)
-from PyQt5.QtCore import QDate
+                            QMessageBox, QTableView, QLabel, QProgressBar)
+from PyQt5.QtCore import QDate, QTimer
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 from AirQualityAnalyzer import AirQualityAnalyzer  # Імпорт із AirQualityAnalyzer.py
+from metrics import PipelineMetrics
+from recommendations import alerts_text, build_recommendations
+from plotting import TimeSeriesPlot
+from table_model import DataFrameTableModel
+from workers import TaskRunner
+
+# CSV-файл або каталог розділів (month=YYYY-MM/country=...) з описом _manifest.json
+DATA_PATH = 'GlobalWeatherRepository.csv'
+# Період опитування CSV-файлу на нові рядки (мс)
+FOLLOW_INTERVAL_MS = 5000
+# Файл, у який при закритті вікна записуються показники етапів (.prom — формат Prometheus, інакше JSON)
+METRICS_PATH = os.environ.get('AQI_METRICS_PATH')
 
 class MainApp(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.analyzer = AirQualityAnalyzer()  # Ініціалізація аналізатора
+        # Аналізатор створюється у фоновому потоці, щоб вікно з'явилося одразу
+        self.analyzer = None
+        # Показники етапів завантаження, запитів і оновлення віджетів
+        self.metrics = PipelineMetrics()
+        # Фонові задачі: завантаження даних, запити фільтрації та дочитування нових рядків
+        self.runner = TaskRunner(parent=self)
         self.initUI()
+        self.load_data()
+
+        # Режим стеження: нові рядки у файлі дочитуються без повного перезавантаження
+        self.follow_timer = QTimer(self)
+        self.follow_timer.timeout.connect(self.poll_new_data)
+        self.follow_timer.start(FOLLOW_INTERVAL_MS)
 
     def initUI(self):
         """Ініціалізація графічного інтерфейсу"""
@@ -43,8 +67,8 @@ class MainApp(QMainWindow):
         self.end_date = QDateEdit()
         self.end_date.setCalendarPopup(True)
         self.end_date.setDate(QDate.currentDate())
-        filter_button = QPushButton('Фільтрувати')
-        filter_button.clicked.connect(self.update_analytics)
+        self.filter_button = QPushButton('Фільтрувати')
+        self.filter_button.clicked.connect(self.update_analytics)
 
         filters_layout.addWidget(QLabel('Країна:'))
         filters_layout.addWidget(self.country_combo)
@@ -54,17 +78,26 @@ class MainApp(QMainWindow):
         filters_layout.addWidget(self.start_date)
         filters_layout.addWidget(QLabel('Кінцева дата:'))
         filters_layout.addWidget(self.end_date)
-        filters_layout.addWidget(filter_button)
+        filters_layout.addWidget(self.filter_button)
         analytics_layout.addLayout(filters_layout)
 
-        # Таблиця для відображення даних
-        self.table = QTableWidget()
+        # Таблиця для відображення даних: модель читає клітинки з масивів лише під час показу
+        self.table_model = DataFrameTableModel()
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.setSortingEnabled(True)
         analytics_layout.addWidget(self.table)
 
         # Графіки
         self.figure, self.ax = plt.subplots(figsize=(10, 4))
         self.canvas = FigureCanvas(self.figure)
+        # Панель масштабування: при зміні діапазону точки беруться з повних даних
+        analytics_layout.addWidget(NavigationToolbar(self.canvas, self))
         analytics_layout.addWidget(self.canvas)
+        self.ax.set_title('Середній AQI за датами')
+        self.ax.set_xlabel('Дата')
+        self.ax.set_ylabel('AQI')
+        self.aqi_plot = TimeSeriesPlot(self.ax)
 
         self.tabs.addTab(self.analytics_tab, 'Аналітика')
 
@@ -76,15 +109,56 @@ class MainApp(QMainWindow):
         recommendations_layout.addWidget(self.recommendations_text)
         self.tabs.addTab(self.recommendations_tab, 'Рекомендації')
 
-        # Заповнення випадаючих списків
+        # Стан фонового завантаження в рядку стану
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(250)
+        self.statusBar().addPermanentWidget(self.progress_bar)
+
+    def load_data(self):
+        """Фонове завантаження даних із показом прогресу"""
+        self.filter_button.setEnabled(False)
+        self.progress_bar.show()
+        # Для каталогу розділів при старті відкриваються лише розділи за останній місяць
+        start_date = self.start_date.date().toString('yyyy-MM-dd')
+        self.runner.submit('load', AirQualityAnalyzer, DATA_PATH, cache_dir='.aqi_cache', start_date=start_date,
+                           metrics=self.metrics, with_progress=True,
+                           on_result=self.on_data_loaded, on_error=self.on_task_error,
+                           on_progress=self.on_progress)
+
+    def on_progress(self, message, fraction):
+        """Оновлення індикатора завантаження"""
+        if fraction is None:
+            self.progress_bar.setRange(0, 0)  # Невідома тривалість
+        else:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(int(fraction * 100))
+        self.statusBar().showMessage(message)
+
+    def on_data_loaded(self, analyzer):
+        """Застосування завантажених даних до віджетів"""
+        self.analyzer = analyzer
+        self.progress_bar.hide()
+        available = bool(analyzer.get_countries())
+        if available:
+            self.statusBar().showMessage('Дані завантажено')
+        elif analyzer.load_error is not None:
+            self.statusBar().showMessage(f"Помилка завантаження даних: {analyzer.load_error}")
+        else:
+            self.statusBar().showMessage('Помилка завантаження даних')
         self.populate_filters()
+        self.filter_button.setEnabled(available)
+
+    def on_task_error(self, message):
+        """Показ помилки фонової задачі"""
+        self.progress_bar.hide()
+        self.statusBar().showMessage('Помилка: ' + message.strip().splitlines()[-1])
 
     def populate_filters(self):
         """Заповнення випадаючих списків країнами та містами"""
-        if self.analyzer.data is not None:
-            countries = [''] + sorted(self.analyzer.data['country'].unique())
-            self.country_combo.addItems(countries)
-            cities = [''] + sorted(self.analyzer.data['location_name'].unique())
+        countries = self.analyzer.get_countries()
+        if countries:
+            self.country_combo.addItems([''] + countries)
+            cities = [''] + self.analyzer.get_locations()
             self.city_combo.addItems(cities)
             self.country_combo.currentTextChanged.connect(self.update_cities)
         else:
@@ -95,81 +169,115 @@ class MainApp(QMainWindow):
         """Оновлення списку міст при зміні країни"""
         self.city_combo.clear()
         country = self.country_combo.currentText()
-        if self.analyzer.data is not None:
-            if country:
-                cities = [''] + sorted(self.analyzer.data[self.analyzer.data['country'] == country]['location_name'].unique())
-            else:
-                cities = [''] + sorted(self.analyzer.data['location_name'].unique())
+        if self.analyzer.get_countries():
+            cities = [''] + self.analyzer.get_locations(country or None)
             self.city_combo.addItems(cities)
         else:
             self.city_combo.addItem('Дані відсутні')
 
+    def poll_new_data(self):
+        """Фонове дочитування нових рядків (якщо попереднє ще триває — пропускаємо)"""
+        if self.analyzer is None or self.runner.is_running('ingest'):
+            return
+        self.runner.submit('ingest', self.analyzer.ingest_new_rows,
+                           on_result=self.on_new_rows, on_error=self.on_task_error)
+
+    def on_new_rows(self, added):
+        """Оновлення вікна, якщо у файлі з'явилися нові рядки"""
+        if added == 0:
+            return
+        # Оновлюємо списки, зберігаючи поточний вибір користувача
+        country = self.country_combo.currentText()
+        city = self.city_combo.currentText()
+        self.country_combo.blockSignals(True)
+        self.country_combo.clear()
+        self.country_combo.addItems([''] + self.analyzer.get_countries())
+        self.country_combo.setCurrentText(country)
+        self.country_combo.blockSignals(False)
+        self.update_cities()
+        self.city_combo.setCurrentText(city)
+        self.update_analytics()
+
     def update_analytics(self):
         """Оновлення таблиці, графіків і рекомендацій на основі фільтрів"""
+        if self.analyzer is None:
+            return
         country = self.country_combo.currentText() if self.country_combo.currentText() else None
         city = self.city_combo.currentText() if self.city_combo.currentText() else None
         start_date = self.start_date.date().toString('yyyy-MM-dd') if self.start_date.date() else None
         end_date = self.end_date.date().toString('yyyy-MM-dd') if self.end_date.date() else None
 
-        filtered_data = self.analyzer.get_filtered_data(
-            country=country,
-            location=city,
-            start_date=start_date,
-            end_date=end_date
-        )
+        # Запит виконується у фоні; новий запит витісняє попередній, ще не застосований
+        self.statusBar().showMessage('Фільтрація даних...')
+        self.runner.submit('query', self.run_query, country, city, start_date, end_date,
+                           on_result=self.apply_query_result, on_error=self.on_task_error)
+
+    def run_query(self, country, city, start_date, end_date):
+        """Фільтрація, агрегати для графіка та текст рекомендацій (виконується у фоновому потоці)"""
+        with self.metrics.stage('query') as record:
+            filtered_data = self.analyzer.get_filtered_data(
+                country=country,
+                location=city,
+                start_date=start_date,
+                end_date=end_date
+            )
+            daily = None
+            if not filtered_data.empty:
+                # Середні за датами беруться з попередньо агрегованого куба
+                daily = self.analyzer.get_aggregates('date', country, city, start_date, end_date)
+            with self.metrics.stage('recommendations'):
+                recommendations = self.build_recommendations(filtered_data)
+                # Сповіщення за останніми вимірюваннями всіх міст (або міст вибраної країни); аналізатор
+                # обчислює їх один раз після завантаження чи дочитування, а не для кожного запиту
+                alerts = self.analyzer.get_alerts()
+                if country:
+                    alerts = alerts[alerts['country'] == country]
+                recommendations += alerts_text(alerts)
+            record.rows = len(filtered_data)
+        return filtered_data, daily, recommendations
+
+    def apply_query_result(self, result):
+        """Застосування результату запиту до віджетів (у потоці графічного інтерфейсу)"""
+        filtered_data, daily, recommendations = result
 
         # Оновлення таблиці
-        self.table.setRowCount(filtered_data.shape[0])
-        self.table.setColumnCount(filtered_data.shape[1])
-        self.table.setHorizontalHeaderLabels(filtered_data.columns)
-
-        for i in range(filtered_data.shape[0]):
-            for j in range(filtered_data.shape[1]):
-                self.table.setItem(i, j, QTableWidgetItem(str(filtered_data.iloc[i, j])))
-
-        # Оновлення графіків
-        self.ax.clear()
-        if not filtered_data.empty:
-            filtered_data.groupby('date')['aqi'].mean().plot(ax=self.ax)
-            self.ax.set_title('Середній AQI за датами')
-            self.ax.set_xlabel('Дата')
-            self.ax.set_ylabel('AQI')
-        self.canvas.draw()
+        with self.metrics.stage('gui_table_refresh', len(filtered_data)):
+            self.table_model.set_frame(filtered_data)
+
+        # Оновлення графіків: наявна лінія отримує нові дані без очищення осей
+        with self.metrics.stage('gui_plot_refresh', 0 if daily is None else len(daily)):
+            if daily is not None:
+                self.aqi_plot.set_series(daily.index, daily['mean'])
+            else:
+                self.aqi_plot.set_series([], [])
 
         # Оновлення рекомендацій
-        self.show_detailed_recommendations(filtered_data)
+        self.recommendations_text.setText(recommendations)
+        self.statusBar().showMessage(f"Знайдено записів: {len(filtered_data)}")
+
+    def closeEvent(self, event):
+        """Збереження показників етапів при закритті вікна (якщо задано AQI_METRICS_PATH)"""
+        if METRICS_PATH:
+            if METRICS_PATH.endswith('.prom'):
+                with open(METRICS_PATH, 'w', encoding='utf-8') as f:
+                    f.write(self.metrics.to_prometheus())
+            else:
+                self.metrics.to_json(METRICS_PATH)
+        super().closeEvent(event)
 
     def show_detailed_recommendations(self, data):
         """Відображення рекомендацій на основі останніх даних"""
-        if data.empty:
-            self.recommendations_text.setText("Немає даних для відображення рекомендацій.")
-            return
-
-        latest_data = data.sort_values('datetime').iloc[-1]
-        aqi = latest_data['aqi']
-        category = latest_data['air_quality_category']
-
-        recommendations = f"Останній AQI: {aqi:.2f}\nКатегорія якості повітря: {category}\n\nРекомендації:\n"
-        if category == 'Добре':
-            recommendations += "- Якість повітря хороша. Приємно проводити час на вулиці!\n"
-        elif category == 'Помірне':
-            recommendations += "- Якість повітря прийнятна. Чутливим групам слід обмежити тривале перебування на вулиці.\n"
-        elif category == 'Шкідливе для чутливих груп':
-            recommendations += "- Чутливим групам (діти, літні люди, люди з респіраторними захворюваннями) слід уникати фізичних навантажень на вулиці.\n"
-        elif category == 'Шкідливе':
-            recommendations += "- Уникайте тривалого перебування на вулиці. Використовуйте маски при необхідності.\n"
-        elif category == 'Дуже шкідливе':
-            recommendations += "- Залишайтеся в приміщенні, уникайте зовнішнього повітря. Використовуйте очищувачі повітря.\n"
-        elif category == 'Небезпечне':
-            recommendations += "- Уникайте контакту із зовнішнім повітрям. Використовуйте респіратори та очищувачі повітря.\n"
+        self.recommendations_text.setText(self.build_recommendations(data))
 
-        self.recommendations_text.setText(recommendations)
+    def build_recommendations(self, data):
+        """Текст рекомендацій на основі останніх даних"""
+        return build_recommendations(data)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
 
     # Перевірка наявності файлу даних
-    if not os.path.exists('GlobalWeatherRepository.csv'):
+    if not os.path.exists(DATA_PATH):
         msg = QMessageBox()
         msg.setIcon(QMessageBox.Warning)
         msg.setText("Файл даних не знайдено!")
@@ -0,0 +1,152 @@
+import contextlib
+import json
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows: пікового RSS немає
+    resource = None
+
+# Одиниці ru_maxrss: кілобайти в Linux, байти в macOS
+_RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+# Лічильники tracemalloc спільні для всього процесу, тож пам'ять одночасно вимірює лише один потік
+_TRACE_LOCK = threading.RLock()
+
+_FIELDS = ('calls', 'errors', 'rows', 'seconds_total', 'seconds_last', 'seconds_max',
+           'peak_alloc_bytes', 'max_rss_bytes')
+
+
+def max_rss_bytes():
+    """Піковий резидентний обсяг пам'яті процесу або None, якщо він недоступний"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+
+class StageRecord:
+    """Вимірювання одного виконання етапу; rows можна задати всередині блоку with"""
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.seconds = None
+        self.peak_alloc_bytes = None
+        self.error = None
+
+
+class PipelineMetrics:
+    """Час, кількість рядків і пікова пам'ять етапів обробки з експортом у JSON і Prometheus"""
+
+    def __init__(self, trace_memory=False):
+        # tracemalloc помітно сповільнює обробку, тому вмикається лише на вимогу
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def stage(self, name, rows=None):
+        """Вимірювання блоку коду як етапу name; винятки рахуються й передаються далі
+
+        Пікову пам'ять вимірюють лише етапи потоку, що першим почав вимірювання; етапи інших потоків
+        тим часом не чекають і лишаються без peak_alloc_bytes, а їхні виділення входять у пік першого.
+        """
+        record = StageRecord(name, rows)
+        # Блокування не очікується: етап, що чекає на інший потік, міг би спричинити взаємне блокування
+        tracing = tracemalloc.is_tracing() and _TRACE_LOCK.acquire(blocking=False)
+        stack = self._local.__dict__.setdefault('stack', [])
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack and stack[-1] is not None:
+                # Пік зовнішнього етапу зберігається до скидання лічильника
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame = {'start': current, 'peak': current}
+        else:
+            frame = None
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record.error = e
+            raise
+        finally:
+            record.seconds = time.perf_counter() - start
+            stack.pop()
+            if frame is not None:
+                if tracemalloc.is_tracing():
+                    peak = max(tracemalloc.get_traced_memory()[1], frame['peak'])
+                    record.peak_alloc_bytes = max(peak - frame['start'], 0)
+                    if stack and stack[-1] is not None:
+                        stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+                _TRACE_LOCK.release()
+            self.record(record)
+
+    def record(self, record):
+        """Додавання результату виконання етапу до накопичених показників"""
+        rss = max_rss_bytes()
+        with self._lock:
+            stats = self._stages.setdefault(record.name, dict.fromkeys(_FIELDS, 0))
+            stats['calls'] += 1
+            stats['errors'] += record.error is not None
+            stats['rows'] += int(record.rows or 0)
+            stats['seconds_total'] += record.seconds
+            stats['seconds_last'] = record.seconds
+            stats['seconds_max'] = max(stats['seconds_max'], record.seconds)
+            if record.peak_alloc_bytes is not None:
+                stats['peak_alloc_bytes'] = max(stats['peak_alloc_bytes'], record.peak_alloc_bytes)
+            if rss is not None:
+                stats['max_rss_bytes'] = max(stats['max_rss_bytes'], rss)
+
+    def snapshot(self):
+        """Копія показників усіх етапів: {етап: {показник: значення}}"""
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stages.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def to_json(self, path=None):
+        """Показники у форматі JSON; за наявності path вони також записуються у файл"""
+        text = json.dumps({'stages': self.snapshot()}, ensure_ascii=False, indent=1)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+    def to_prometheus(self, prefix='aqi'):
+        """Показники у текстовому форматі Prometheus (мітка stage — назва етапу)"""
+        metrics = [
+            ('stage_calls_total', 'counter', 'calls', 'Кількість виконань етапу'),
+            ('stage_errors_total', 'counter', 'errors', 'Кількість виконань, що завершились винятком'),
+            ('stage_rows_total', 'counter', 'rows', 'Кількість оброблених рядків'),
+            ('stage_seconds_total', 'counter', 'seconds_total', 'Сумарний час етапу, с'),
+            ('stage_seconds_last', 'gauge', 'seconds_last', 'Час останнього виконання, с'),
+            ('stage_seconds_max', 'gauge', 'seconds_max', 'Найбільший час виконання, с'),
+            ('stage_peak_alloc_bytes', 'gauge', 'peak_alloc_bytes', 'Пік виділеної пам\'яті за tracemalloc, байт'),
+            ('stage_max_rss_bytes', 'gauge', 'max_rss_bytes', 'Піковий RSS процесу після етапу, байт'),
+        ]
+        stages = self.snapshot()
+        lines = []
+        for suffix, kind, field, help_text in metrics:
+            name = f"{prefix}_{suffix}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for stage, stats in sorted(stages.items()):
+                label = stage.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{name}{{stage="{label}"}} {stats[field]!r}')
+        return '\n'.join(lines) + '\n'
+
+
+def measure(metrics, name, rows=None):
+    """Етап metrics.stage або порожній контекст, якщо показники не збираються"""
+    if metrics is None:
+        return contextlib.nullcontext(StageRecord(name, rows))
+    return metrics.stage(name, rows)
@@ -0,0 +1,148 @@
+import json
+import os
+import re
+
+import pandas as pd
+
+from ingest import DEFAULT_CHUNKSIZE
+
+MANIFEST_NAME = '_manifest.json'
+PARTITION_FILE = 'part.csv'
+
+
+def _safe_name(value):
+    """Значення ключа, придатне для назви каталогу"""
+    return re.sub(r'[^\w\-. ]', '_', str(value)).strip() or '_'
+
+
+def partition_csv(source, root, by=('month', 'country'), chunksize=DEFAULT_CHUNKSIZE):
+    """Поділ CSV-файлу на каталоги month=YYYY-MM та/або country=<назва> і побудова опису"""
+    os.makedirs(root, exist_ok=True)
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        keys = []
+        if 'month' in by:
+            keys.append('month=' + pd.to_datetime(chunk['last_updated']).dt.strftime('%Y-%m'))
+        if 'country' in by:
+            keys.append('country=' + chunk['country'].map(_safe_name))
+        directory = keys[0] if len(keys) == 1 else keys[0] + os.sep + keys[1]
+        for name, rows in chunk.groupby(directory.to_numpy(), sort=False):
+            path = os.path.join(root, name, PARTITION_FILE)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            new_file = not os.path.exists(path)
+            rows.to_csv(path, mode='a', header=new_file, index=False)
+    return build_manifest(root)
+
+
+def describe_partition(root, relative_path):
+    """Опис одного розділу: межі datetime, країни та міста"""
+    path = os.path.join(root, relative_path)
+    frame = pd.read_csv(path, usecols=['country', 'location_name', 'last_updated'])
+    stamps = pd.to_datetime(frame['last_updated'])
+    locations = frame.groupby('country')['location_name'].unique()
+    stat = os.stat(path)
+    return {
+        'path': relative_path,
+        'rows': len(frame),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'min_datetime': stamps.min().isoformat() if len(frame) else None,
+        'max_datetime': stamps.max().isoformat() if len(frame) else None,
+        'countries': sorted(locations.index),
+        'locations': {country: sorted(names) for country, names in locations.items()},
+    }
+
+
+def build_manifest(root):
+    """Сканування розділів і запис опису; незмінені розділи беруться з попереднього опису"""
+    previous = {entry['path']: entry for entry in (load_manifest(root) or {'partitions': []})['partitions']}
+    partitions = []
+    for directory, _, files in sorted(os.walk(root)):
+        for name in sorted(files):
+            if not name.endswith('.csv'):
+                continue
+            relative_path = os.path.relpath(os.path.join(directory, name), root)
+            stat = os.stat(os.path.join(root, relative_path))
+            entry = previous.get(relative_path)
+            if entry is None or (entry['size'], entry['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+                entry = describe_partition(root, relative_path)
+            partitions.append(entry)
+    manifest = {'partitions': partitions}
+    if list(previous.values()) == partitions:
+        return manifest  # Опис не змінився, перезапис не потрібен
+    tmp_path = os.path.join(root, MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, os.path.join(root, MANIFEST_NAME))
+    return manifest
+
+
+def load_manifest(root):
+    """Опис розділів набору даних або None, якщо його ще не створено"""
+    try:
+        with open(os.path.join(root, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _bound(value, shift_days=0):
+    """Межа дати як Timestamp або None для порожнього чи некоректного значення"""
+    if not value:
+        return None
+    try:
+        return pd.to_datetime(value).normalize() + pd.Timedelta(days=shift_days)
+    except ValueError:
+        return None  # Ігноруємо некоректний формат дати
+
+
+def select_partitions(manifest, country=None, location=None, start_date=None, end_date=None):
+    """Розділи, які можуть містити рядки для заданих країни, міста й діапазону дат"""
+    start = _bound(start_date)
+    end = _bound(end_date, shift_days=1)
+    selected = []
+    for entry in manifest['partitions']:
+        if entry['min_datetime'] is None:
+            continue
+        if start is not None and pd.Timestamp(entry['max_datetime']) < start:
+            continue
+        if end is not None and pd.Timestamp(entry['min_datetime']) >= end:
+            continue
+        if country and country not in entry['countries']:
+            continue
+        if location and not any(location in names for names in entry['locations'].values()):
+            continue
+        selected.append(entry)
+    return selected
+
+
+def latest_partitions(manifest, country=None, location=None, per_location=2):
+    """Розділи з найновішими рядками кожного міста: per_location розділів із найбільшим max_datetime
+
+    Двох розділів достатньо, щоб історія міста не обривалася на межі місяця, коли новий розділ ще короткий.
+    """
+    history = {}
+    for entry in manifest['partitions']:
+        if entry['max_datetime'] is None:
+            continue
+        for key, names in entry['locations'].items():
+            if country and key != country:
+                continue
+            for name in names:
+                if not location or name == location:
+                    history.setdefault((key, name), []).append(entry)
+    chosen = set()
+    for entries in history.values():
+        entries.sort(key=lambda entry: pd.Timestamp(entry['max_datetime']), reverse=True)
+        chosen.update(entry['path'] for entry in entries[:per_location])
+    return [entry for entry in manifest['partitions'] if entry['path'] in chosen]
+
+
+def manifest_countries(manifest):
+    """Усі країни набору даних"""
+    return sorted({country for entry in manifest['partitions'] for country in entry['countries']})
+
+
+def manifest_locations(manifest, country=None):
+    """Усі міста набору даних (або лише заданої країни)"""
+    return sorted({name for entry in manifest['partitions'] for key, names in entry['locations'].items()
+                   if not country or key == country for name in names})
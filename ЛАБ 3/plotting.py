@@ -0,0 +1,120 @@
+import matplotlib.dates as mdates
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_POINTS = 2000
+
+
+def lttb(x, y, n_out):
+    """Зменшення кількості точок алгоритмом Largest-Triangle-Three-Buckets"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+    # Межі n_out - 2 внутрішніх кошиків (перша й остання точки зберігаються завжди)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for bucket in range(n_out - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        # Середня точка наступного кошика (для останнього — кінцева точка)
+        next_lo, next_hi = (hi, edges[bucket + 2]) if bucket + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[anchor] - avg_x) * (y[lo:hi] - y[anchor])
+                      - (x[anchor] - x[lo:hi]) * (avg_y - y[anchor]))
+        anchor = lo + int(np.argmax(area))
+        selected[bucket + 1] = anchor
+    return x[selected], y[selected]
+
+
+def minmax_downsample(x, y, n_out):
+    """Зменшення кількості точок зі збереженням мінімуму й максимуму кожного кошика"""
+    n = len(x)
+    buckets = n_out // 2
+    if n_out >= n or buckets < 1:
+        return x, y
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    bounds = list(zip(edges[:-1], edges[1:]))
+    low_index = [start + int(np.argmin(y[start:stop])) for start, stop in bounds]
+    high_index = [start + int(np.argmax(y[start:stop])) for start, stop in bounds]
+    selected = np.unique(np.concatenate([low_index, high_index, [0, n - 1]]))
+    return x[selected], y[selected]
+
+
+class TimeSeriesPlot:
+    """Часовий ряд із рівнем деталізації: малюється не більше max_points точок видимого діапазону"""
+
+    def __init__(self, ax, max_points=DEFAULT_MAX_POINTS, downsample=lttb, **line_kwargs):
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        self.max_points = max_points
+        self.downsample = downsample
+        self._x = np.array([], dtype=np.float64)
+        self._y = np.array([], dtype=np.float64)
+        self._background = None
+        # Лінія створюється один раз і далі лише отримує нові дані
+        (self.line,) = ax.plot([], [], animated=True, **line_kwargs)
+        ax.xaxis_date()
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+
+    def set_series(self, x, y):
+        """Нові повні дані ряду; межі осей підлаштовуються під них"""
+        x = np.asarray(mdates.date2num(pd.to_datetime(x)), dtype=np.float64) if len(x) else np.array([])
+        y = np.asarray(y, dtype=np.float64)
+        keep = ~np.isnan(y)
+        order = np.argsort(x[keep], kind='stable')
+        self._x, self._y = x[keep][order], y[keep][order]
+        if len(self._x) == 0:
+            self.line.set_data([], [])
+            self.canvas.draw_idle()
+            return
+        limits = self._padded_limits()
+        if limits == (self.ax.get_xlim(), self.ax.get_ylim()):
+            # Межі не змінились — достатньо перемалювати лише лінію
+            self._resample()
+            self.blit()
+            return
+        self.ax.set_ylim(*limits[1])
+        self.ax.set_xlim(*limits[0])
+        self._resample()
+        self.canvas.draw_idle()
+
+    def _padded_limits(self):
+        """Межі осей для всього ряду з невеликим запасом"""
+        x_lo, x_hi = self._x[0], self._x[-1]
+        if x_lo == x_hi:
+            x_lo, x_hi = x_lo - 0.5, x_hi + 0.5
+        y_lo, y_hi = float(self._y.min()), float(self._y.max())
+        pad = (y_hi - y_lo) * 0.05 or 1.0
+        return (float(x_lo), float(x_hi)), (y_lo - pad, y_hi + pad)
+
+    def visible_points(self):
+        """Точки видимого діапазону, зменшені до max_points із повних даних"""
+        x_lo, x_hi = self.ax.get_xlim()
+        # Одна точка запасу з кожного боку, щоб лінія доходила до країв осі
+        lo = max(np.searchsorted(self._x, x_lo, side='left') - 1, 0)
+        hi = min(np.searchsorted(self._x, x_hi, side='right') + 1, len(self._x))
+        return self.downsample(self._x[lo:hi], self._y[lo:hi], self.max_points)
+
+    def _resample(self):
+        self.line.set_data(*self.visible_points())
+
+    def _on_xlim_changed(self, ax):
+        """Масштабування чи зсув: точки беруться заново з повних даних"""
+        self._resample()
+
+    def _on_draw(self, event):
+        """Після повного малювання зберігаємо фон осей і домальовуємо лінію"""
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
+
+    def blit(self):
+        """Перемалювання лише лінії поверх збереженого фону"""
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# Поради для кожної категорії якості повітря
+RECOMMENDATIONS = {
+    'Добре': "Якість повітря хороша. Приємно проводити час на вулиці!",
+    'Помірне': "Якість повітря прийнятна. Чутливим групам слід обмежити тривале перебування на вулиці.",
+    'Шкідливе для чутливих груп': "Чутливим групам (діти, літні люди, люди з респіраторними захворюваннями) "
+                                  "слід уникати фізичних навантажень на вулиці.",
+    'Шкідливе': "Уникайте тривалого перебування на вулиці. Використовуйте маски при необхідності.",
+    'Дуже шкідливе': "Залишайтеся в приміщенні, уникайте зовнішнього повітря. Використовуйте очищувачі повітря.",
+    'Небезпечне': "Уникайте контакту із зовнішнім повітрям. Використовуйте респіратори та очищувачі повітря.",
+}
+
+NO_DATA_TEXT = "Немає даних для відображення рекомендацій."
+# Найбільша кількість сповіщень, що показуються в тексті
+ALERTS_SHOWN = 20
+
+
+def latest_reading(data):
+    """Останній за часом рядок даних або None для порожньої таблиці
+
+    Один прохід по стовпцю datetime замість сортування всієї таблиці; з однакових моментів береться
+    останній рядок, рядки без дати — лише якщо інших немає.
+    """
+    if data.empty:
+        return None
+    stamps = data['datetime'].to_numpy().astype('datetime64[ns]').view(np.int64)
+    # NaT подається найменшим int64, тож argmax його не вибере, якщо є хоч одна дата
+    position = len(stamps) - 1 - int(np.argmax(stamps[::-1]))
+    return data.iloc[position]
+
+
+def recommendation_text(aqi, category):
+    """Текст рекомендацій для значення AQI та категорії якості повітря"""
+    text = f"Останній AQI: {aqi:.2f}\nКатегорія якості повітря: {category}\n\nРекомендації:\n"
+    if category in RECOMMENDATIONS:
+        text += f"- {RECOMMENDATIONS[category]}\n"
+    return text
+
+
+def build_recommendations(data):
+    """Текст рекомендацій на основі останніх даних"""
+    latest = latest_reading(data)
+    if latest is None:
+        return NO_DATA_TEXT
+    return recommendation_text(latest['aqi'], latest['air_quality_category'])
+
+
+def recommendation_record(data):
+    """Останнє вимірювання та порада у вигляді словника (для JSON-відповідей)"""
+    latest = latest_reading(data)
+    if latest is None:
+        return None
+    category = latest['air_quality_category']
+    aqi = latest['aqi']
+    return {
+        'country': str(latest['country']),
+        'location_name': str(latest['location_name']),
+        'datetime': pd.Timestamp(latest['datetime']).isoformat(),
+        'aqi': None if pd.isna(aqi) else float(aqi),
+        'category': str(category),
+        'recommendation': RECOMMENDATIONS.get(category),
+        'text': recommendation_text(aqi, category),
+    }
+
+
+def alerts_text(alerts, limit=ALERTS_SHOWN):
+    """Розділ тексту зі сповіщеннями AlertEngine (порожній, якщо сповіщень немає)"""
+    if alerts.empty:
+        return ''
+    lines = [f"- {row.location_name} ({row.country}): {row.message}" for row in alerts.iloc[:limit].itertuples()]
+    if len(alerts) > limit:
+        lines.append(f"... та ще {len(alerts) - limit}")
+    return "\nСповіщення:\n" + "\n".join(lines) + "\n"
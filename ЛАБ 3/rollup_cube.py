@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from aqi_engine import AQI_CATEGORIES, UNKNOWN_CATEGORY
+from ingest import SEASONS, SEASON_BY_MONTH
+
+# Вимірювання базових комірок куба
+CELL_KEYS = ['country', 'location_name', 'date', 'hour']
+HISTOGRAM_COLUMNS = AQI_CATEGORIES + [UNKNOWN_CATEGORY]
+# Правила об'єднання статистик при згортанні комірок
+_COMBINE = dict({'count': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max'},
+                **{name: 'sum' for name in HISTOGRAM_COLUMNS})
+
+
+def build_cells(df):
+    """Базові комірки (країна, місто, дата, година): кількість, сума, мінімум, максимум і гістограма категорій"""
+    if len(df) == 0:
+        return _empty_cells()
+    frame = pd.DataFrame({
+        'country': np.asarray(df['country'], dtype=object),
+        'location_name': np.asarray(df['location_name'], dtype=object),
+        'date': df['datetime'].dt.normalize().to_numpy(),
+        'hour': df['datetime'].dt.hour.to_numpy(),
+        'aqi': df['aqi'].to_numpy(dtype=np.float64),
+    })
+    # Гістограма як набір прапорців категорій, що підсумовуються разом зі статистиками
+    category = np.asarray(df['air_quality_category'], dtype=object)
+    for name in HISTOGRAM_COLUMNS:
+        frame[name] = (category == name).astype(np.int64)
+    grouped = frame.groupby(CELL_KEYS, sort=True, dropna=False)
+    cells = grouped['aqi'].agg(['count', 'sum', 'min', 'max'])
+    cells[HISTOGRAM_COLUMNS] = grouped[HISTOGRAM_COLUMNS].sum()
+    return cells
+
+
+def _empty_cells():
+    """Порожня таблиця комірок із правильними стовпцями"""
+    index = pd.MultiIndex.from_arrays([[], [], pd.DatetimeIndex([]), []], names=CELL_KEYS)
+    return pd.DataFrame({name: pd.Series(dtype=np.float64) for name in _COMBINE}, index=index)
+
+
+class AqiCube:
+    """Попередньо агрегований куб AQI з інкрементним оновленням"""
+
+    # Доступні розрізи: назва -> функція, що повертає ключ групування для комірок
+    DIMENSIONS = {
+        'date': lambda cells: cells.index.get_level_values('date'),
+        'hour': lambda cells: cells.index.get_level_values('hour'),
+        'month': lambda cells: cells.index.get_level_values('date').month,
+        'season': lambda cells: pd.Categorical(
+            SEASON_BY_MONTH[cells.index.get_level_values('date').month.fillna(0).astype(int)],
+            categories=SEASONS),
+        'datetime': lambda cells: (cells.index.get_level_values('date')
+                                   + pd.to_timedelta(cells.index.get_level_values('hour'), unit='h')),
+        'country': lambda cells: cells.index.get_level_values('country'),
+        'location_name': lambda cells: cells.index.get_level_values('location_name'),
+    }
+
+    def __init__(self, data=None):
+        self.cells = build_cells(data) if data is not None else _empty_cells()
+
+    def add(self, new_rows):
+        """Інкрементне оновлення: агрегуються лише нові рядки, потім зливаються з наявними комірками"""
+        self.merge_cells(build_cells(new_rows))
+
+    def merge_cells(self, new_cells):
+        """Злиття вже агрегованих комірок (наприклад, обчислених в іншому процесі)"""
+        if len(new_cells) == 0:
+            return
+        combined = new_cells if len(self.cells) == 0 else pd.concat([self.cells, new_cells])
+        if combined.index.is_unique and combined.index.is_monotonic_increasing:
+            self.cells = combined
+            return
+        self.cells = combined.groupby(level=CELL_KEYS, sort=True).agg(_COMBINE)
+
+    def select(self, country=None, location=None, start_date=None, end_date=None):
+        """Комірки, що відповідають фільтрам (ті самі правила, що й у get_filtered_data)"""
+        cells = self.cells
+        if country or location:
+            # Індекс комірок відсортований, тож країна й місто шукаються двійковим пошуком
+            try:
+                positions = cells.index.get_locs([country or slice(None), location or slice(None)])
+            except KeyError:
+                positions = []
+            cells = cells.iloc[positions]
+        dates = cells.index.get_level_values('date')
+        mask = np.ones(len(cells), dtype=bool)
+        if start_date:
+            try:
+                mask &= dates >= pd.to_datetime(start_date).normalize()
+            except ValueError:
+                pass  # Ігноруємо некоректний формат дати
+        if end_date:
+            try:
+                mask &= dates <= pd.to_datetime(end_date).normalize()
+            except ValueError:
+                pass  # Ігноруємо некоректний формат дати
+        return cells[mask]
+
+    def aggregate(self, by='date', country=None, location=None, start_date=None, end_date=None):
+        """Агрегати AQI за розрізом (date, hour, month, season, datetime, country, location_name)"""
+        if by not in self.DIMENSIONS:
+            raise ValueError(f"Невідомий розріз куба: {by}")
+        cells = self.select(country, location, start_date, end_date)
+        result = cells.groupby(self.DIMENSIONS[by](cells), sort=True, observed=True).agg(_COMBINE)
+        result.index.name = by
+        result['mean'] = result['sum'] / result['count']
+        return result
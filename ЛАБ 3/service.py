@@ -0,0 +1,241 @@
+import argparse
+import asyncio
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+from AirQualityAnalyzer import AirQualityAnalyzer
+from aqi_engine import ALL_POLLUTANTS, PM_POLLUTANTS
+from recommendations import recommendation_record
+
+# Кількість рядків в одному шматку NDJSON-відповіді
+STREAM_BATCH_ROWS = 5000
+FILTER_PARAMS = ('country', 'location', 'start_date', 'end_date')
+_STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                500: 'Internal Server Error'}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def records_ndjson(frame):
+    """Рядки таблиці у форматі NDJSON (дата й час — ISO 8601, пропуски — null)"""
+    if frame.empty:
+        return b''
+    text = frame.to_json(orient='records', lines=True, date_format='iso', force_ascii=False,
+                         default_handler=str)
+    return (text if text.endswith('\n') else text + '\n').encode('utf-8')
+
+
+class AqiService:
+    """Запити до одного спільного аналізатора з пулу потоків; однакові одночасні запити виконуються один раз"""
+
+    def __init__(self, analyzer, workers=None, batch_rows=STREAM_BATCH_ROWS):
+        self.analyzer = analyzer
+        # Потоки, а не процеси: усі запити читають ту саму копію даних
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='aqi-query')
+        self.batch_rows = batch_rows
+        self._inflight = {}
+
+    async def call(self, key, fn, *args):
+        """Виконання fn(*args) у пулі; поки запит із тим самим key триває, інші чекають його результату"""
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, fn, *args)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: від'єднання одного клієнта не скасовує спільний запит
+        return await asyncio.shield(future)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    @staticmethod
+    def _filters(params):
+        return {name: params.get(name) or None for name in FILTER_PARAMS}
+
+    async def countries(self, params):
+        return await self.call(('countries',), self.analyzer.get_countries)
+
+    async def locations(self, params):
+        country = params.get('country') or None
+        return await self.call(('locations', country), self.analyzer.get_locations, country)
+
+    async def aggregates(self, params):
+        by = params.get('by', 'date')
+        filters = self._filters(params)
+        frame = await self.call(('aggregates', by) + tuple(filters.values()),
+                                lambda: self.analyzer.get_aggregates(by, **filters))
+        return json.loads(frame.reset_index().to_json(orient='records', date_format='iso', force_ascii=False,
+                                                      default_handler=str))
+
+    async def recommendations(self, params):
+        filters = self._filters(params)
+        return await self.call(('recommendations',) + tuple(filters.values()),
+                               lambda: recommendation_record(self.analyzer.get_filtered_data(**filters)))
+
+    async def alerts(self, params):
+        """Поточні сповіщення для всіх міст (країна — необов'язковий фільтр)"""
+        country = params.get('country') or None
+        frame = await self.call(('alerts',), self.analyzer.get_alerts)
+        if country:
+            frame = frame[frame['country'] == country]
+        return json.loads(frame.to_json(orient='records', date_format='iso', force_ascii=False, default_handler=str))
+
+    async def rows(self, params):
+        """Відфільтровані рядки як асинхронний генератор шматків NDJSON"""
+        filters = self._filters(params)
+        limit = int(params['limit']) if params.get('limit') else None
+        frame = await self.call(('rows',) + tuple(filters.values()),
+                                lambda: self.analyzer.get_filtered_data(**filters))
+        return self._batches(frame if limit is None else frame.iloc[:limit])
+
+    async def _batches(self, frame):
+        loop = asyncio.get_running_loop()
+        for start in range(0, len(frame), self.batch_rows):
+            # Серіалізація шматка теж виконується в пулі, щоб не блокувати цикл подій
+            yield await loop.run_in_executor(self.executor, records_ndjson,
+                                             frame.iloc[start:start + self.batch_rows])
+
+    async def metrics(self, params):
+        return self.analyzer.metrics.to_prometheus()
+
+
+class AqiHttpServer:
+    """Мінімальний HTTP/1.1-сервер на asyncio: лише GET, кожне з'єднання — один запит"""
+
+    def __init__(self, service):
+        self.service = service
+        self.routes = {
+            '/countries': service.countries,
+            '/locations': service.locations,
+            '/aggregates': service.aggregates,
+            '/recommendations': service.recommendations,
+            '/alerts': service.alerts,
+            '/rows': service.rows,
+            '/metrics': service.metrics,
+        }
+
+    async def start(self, host='127.0.0.1', port=8080):
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    async def handle(self, reader, writer):
+        try:
+            status, body = 200, None
+            try:
+                method, target = await self._read_request(reader)
+                if method != 'GET':
+                    raise HttpError(405, 'Підтримується лише GET')
+                url = urlsplit(target)
+                handler = self.routes.get(url.path)
+                if handler is None:
+                    raise HttpError(404, f"Невідомий шлях: {url.path}")
+                body = await handler(dict(parse_qsl(url.query)))
+            except HttpError as e:
+                status, body = e.status, {'error': str(e)}
+            except (ValueError, KeyError) as e:
+                status, body = 400, {'error': str(e)}
+            except Exception as e:
+                status, body = 500, {'error': f"{type(e).__name__}: {e}"}
+            if hasattr(body, '__aiter__'):
+                # Великий результат передається частинами, без збирання всієї відповіді в пам'яті
+                await self._stream(writer, body)
+                return
+            if isinstance(body, str):
+                payload, content_type = body.encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+            else:
+                payload, content_type = json.dumps(body, ensure_ascii=False).encode('utf-8'), \
+                    'application/json; charset=utf-8'
+            writer.write(self._head(status, content_type, len(payload)) + payload)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Клієнт від'єднався
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader):
+        """Метод і шлях запиту; заголовки читаються й відкидаються"""
+        line = await reader.readline()
+        parts = line.decode('latin-1').split()
+        if len(parts) != 3:
+            raise HttpError(400, 'Некоректний рядок запиту')
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+        return parts[0], parts[1]
+
+    @staticmethod
+    def _head(status, content_type, length=None):
+        lines = [f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}", f"Content-Type: {content_type}",
+                 'Connection: close']
+        if length is not None:
+            lines.append(f"Content-Length: {length}")
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    async def _stream(self, writer, chunks):
+        """NDJSON-відповідь без Content-Length: кінець тіла — закриття з'єднання"""
+        writer.write(self._head(200, 'application/x-ndjson; charset=utf-8'))
+        try:
+            async for chunk in chunks:
+                writer.write(chunk)
+                # Повільний клієнт зупиняє серіалізацію наступних шматків
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            # Заголовки вже надіслано, тож помилка передається останнім рядком тіла
+            line = json.dumps({'error': f"{type(e).__name__}: {e}"}, ensure_ascii=False) + '\n'
+            writer.write(line.encode('utf-8'))
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(analyzer, host='127.0.0.1', port=8080, workers=None):
+    """Запуск сервісу до скасування задачі"""
+    service = AqiService(analyzer, workers)
+    server = await AqiHttpServer(service).start(host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='HTTP/JSON-сервіс запитів до даних про якість повітря')
+    parser.add_argument('data', nargs='?', default='GlobalWeatherRepository.csv',
+                        help='CSV-файл або каталог розділів')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('-j', '--workers', type=int, default=None, help='кількість потоків для запитів')
+    parser.add_argument('--cache-dir', default='.aqi_cache', help='каталог знімків даних')
+    parser.add_argument('--lean', action='store_true', help='компактне подання даних')
+    parser.add_argument('--all-pollutants', action='store_true', help='враховувати O3, NO2, SO2 і CO')
+    parser.add_argument('--follow', type=float, default=None, metavar='SECONDS',
+                        help='період дочитування нових рядків CSV-файлу')
+    args = parser.parse_args(argv)
+
+    analyzer = AirQualityAnalyzer(args.data, ALL_POLLUTANTS if args.all_pollutants else PM_POLLUTANTS,
+                                  cache_dir=args.cache_dir, lean=args.lean)
+    if analyzer.data is None:
+        return 1
+    if args.follow:
+        threading.Thread(target=analyzer.follow, args=(args.follow,), daemon=True).start()
+    print(f"Сервіс слухає http://{args.host}:{args.port}")
+    try:
+        asyncio.run(serve(analyzer, args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import json
+import secrets
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from snapshot_cache import encode_column
+
+SHM_PREFIX = 'aqi_'
+# Вирівнювання масивів у блоці, байт
+_ALIGN = 64
+# Блоки, створені цим процесом (їх не знімаємо з обліку resource_tracker під час приєднання)
+_OWNED = set()
+
+
+def _layout(parts):
+    """Зміщення кожного масиву в блоці та загальний розмір блоку"""
+    specs, offset = {}, 0
+    for key, values in parts.items():
+        offset = -(-offset // _ALIGN) * _ALIGN
+        specs[key] = {'offset': offset, 'dtype': values.dtype.str, 'shape': list(values.shape)}
+        offset += values.nbytes
+    return specs, offset
+
+
+def _codes_dtype(count):
+    """Найменший цілий тип кодів для count категорій — той самий, що обирає pandas, тож коди не копіюються"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if count < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _encode_shared(name, series, df):
+    """Опис і масиви стовпця для спільної пам'яті
+
+    Об'єкти date/time зберігаються як datetime64/timedelta64 (як у компактному поданні), а не відновлюються
+    в кожному процесі, а коди категорій — одразу в остаточному типі.
+    """
+    meta, arrays = encode_column(name, series)
+    if meta['kind'] == 'derived':
+        date = df['datetime'].dt.normalize()
+        values = date if name == 'date' else df['datetime'] - date
+        return {'kind': 'array'}, {'values': values.to_numpy()}
+    if 'codes' in arrays:
+        arrays['codes'] = arrays['codes'].astype(_codes_dtype(len(arrays['categories'])), copy=False)
+    return meta, arrays
+
+
+def _view(buffer, spec):
+    """Масив лише для читання поверх блоку спільної пам'яті"""
+    values = np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']), buffer=buffer, offset=spec['offset'])
+    values.flags.writeable = False
+    return values
+
+
+def _decode(meta, arrays):
+    """Стовпець поверх спільних масивів (рядки стають категоріями, щоб не копіювати коди)"""
+    kind = meta['kind']
+    if kind == 'array':
+        values = arrays['values']
+        return pd.array(values).astype(meta['dtype']) if 'dtype' in meta else values
+    if kind in ('categorical', 'strings'):
+        categories = pd.Index(arrays['categories'].astype(object) if kind == 'strings' else arrays['categories'])
+        dtype = pd.CategoricalDtype(categories, ordered=meta.get('ordered', False))
+        return pd.Categorical.from_codes(arrays['codes'], dtype=dtype, validate=False)
+    raise ValueError(f"Невідомий тип стовпця у спільній пам'яті: {kind}")
+
+
+class SharedFrame:
+    """Таблиця (і за потреби масиви індексу) в одному блоці спільної пам'яті з описом схеми"""
+
+    def __init__(self, shm, descriptor, owner):
+        self.shm = shm
+        self.descriptor = descriptor
+        self.owner = owner
+        data = {}
+        for meta in descriptor['columns']:
+            arrays = {part: _view(shm.buf, spec) for part, spec in meta['buffers'].items()}
+            data[meta['name']] = _decode(meta, arrays)
+        self.data = pd.DataFrame(data, copy=False)
+        index = descriptor.get('index')
+        self.index_arrays = None if index is None else \
+            {name: _view(shm.buf, spec) for name, spec in index['buffers'].items()}
+        self.index_meta = None if index is None else index['meta']
+
+    def close(self):
+        """Від'єднання від блоку; власник також звільняє його"""
+        self.data = None
+        self.index_arrays = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # На масиви ще є посилання; відображення зникне разом із ними
+        if self.owner:
+            self.shm.unlink()
+            _OWNED.discard(self.shm.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def publish(df, index=None, name=None):
+    """Копіювання стовпців таблиці (і масивів індексу FilterIndex) у новий блок спільної пам'яті"""
+    columns, parts = [], {}
+    for position, column in enumerate(df.columns):
+        meta, arrays = _encode_shared(column, df[column], df)
+        meta['name'] = column
+        meta['buffers'] = {}
+        for part, values in arrays.items():
+            key = f"col{position:04d}_{part}"
+            parts[key] = np.ascontiguousarray(values)
+            meta['buffers'][part] = key
+        columns.append(meta)
+    index_meta = None
+    if index is not None:
+        index_arrays, index_meta = index.state()
+        for part, values in index_arrays.items():
+            parts[f"index_{part}"] = np.ascontiguousarray(values)
+
+    specs, size = _layout(parts)
+    shm = SharedMemory(name=name or SHM_PREFIX + secrets.token_hex(8), create=True, size=max(size, 1))
+    _OWNED.add(shm.name)
+    for key, values in parts.items():
+        target = np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf, offset=specs[key]['offset'])
+        target[...] = values
+        del target
+    for meta in columns:
+        meta['buffers'] = {part: specs[key] for part, key in meta['buffers'].items()}
+    descriptor = {'name': shm.name, 'size': size, 'rows': len(df), 'columns': columns}
+    if index is not None:
+        descriptor['index'] = {'meta': index_meta,
+                               'buffers': {part: specs[f"index_{part}"] for part in index.STATE_ARRAYS}}
+    return SharedFrame(shm, descriptor, owner=True)
+
+
+def attach(descriptor):
+    """Приєднання до опублікованої таблиці без копіювання даних"""
+    name = descriptor['name']
+    try:
+        shm = SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13: параметра track немає
+        shm = SharedMemory(name=name)
+        if name not in _OWNED:
+            # Інакше resource_tracker цього процесу звільнить блок при виході, хоча ним володіє інший процес
+            resource_tracker.unregister(shm._name, 'shared_memory')
+    return SharedFrame(shm, descriptor, owner=False)
+
+
+def save_descriptor(descriptor, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(descriptor, f, ensure_ascii=False)
+
+
+def load_descriptor(source):
+    """Опис схеми зі словника або JSON-файлу"""
+    if isinstance(source, dict):
+        return source
+    with open(source, encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+MANIFEST_NAME = 'manifest.json'
+_HASH_BLOCK = 1 << 20
+
+# Стовпці з об'єктами datetime.date/time, які відновлюються зі стовпця 'datetime'
+_DERIVED_COLUMNS = {
+    'date': lambda dt: dt.dt.date,
+    'time': lambda dt: dt.dt.time,
+}
+
+
+def source_key(path, limit=None, **extra):
+    """Ключ знімка: розмір, час зміни та хеш вмісту файлу (або його перших limit байтів) плюс параметри"""
+    stat = os.stat(path)
+    size = stat.st_size if limit is None else limit
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        remaining = size
+        while remaining > 0:
+            block = f.read(min(_HASH_BLOCK, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    key = {'size': size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest.hexdigest()}
+    key.update(extra)
+    return key
+
+
+def encode_column(name, series):
+    """Перетворення стовпця на набір масивів NumPy та опис для його відновлення"""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        meta = {'kind': 'categorical', 'ordered': bool(dtype.ordered)}
+        arrays = {'codes': series.cat.codes.to_numpy(),
+                  'categories': _to_numpy(dtype.categories.to_series())}
+        return meta, arrays
+    if (pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)
+            or pd.api.types.is_datetime64_dtype(dtype) or pd.api.types.is_timedelta64_dtype(dtype)):
+        if not isinstance(dtype, np.dtype):
+            # Розширені типи pandas (Int64, boolean тощо) зберігаємо як звичайні масиви
+            return {'kind': 'array', 'dtype': str(dtype)}, {'values': series.to_numpy(dtype=float)}
+        return {'kind': 'array'}, {'values': series.to_numpy()}
+    if name in _DERIVED_COLUMNS:
+        return {'kind': 'derived'}, {}
+    # Рядкові стовпці зберігаються як коди та словник унікальних значень
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    meta = {'kind': 'strings', 'dtype': str(dtype)}
+    return meta, {'codes': codes, 'categories': np.asarray(uniques.astype(str), dtype=str)}
+
+
+def decode_column(meta, arrays):
+    """Відновлення стовпця з масивів, створених encode_column"""
+    kind = meta['kind']
+    if kind == 'array':
+        values = arrays['values']
+        if 'dtype' in meta:
+            return pd.array(values).astype(meta['dtype'])
+        return values
+    if kind == 'categorical':
+        return pd.Categorical.from_codes(arrays['codes'], categories=arrays['categories'],
+                                         ordered=meta['ordered'])
+    if kind == 'strings':
+        categories = np.append(arrays['categories'].astype(object), np.nan)
+        values = categories[arrays['codes']]
+        if meta['dtype'] != 'object':
+            return pd.array(values).astype(meta['dtype'])
+        return values
+    raise ValueError(f"Невідомий тип стовпця у знімку: {kind}")
+
+
+def restore_derived(df, derived):
+    """Відновлення похідних стовпців date/time зі стовпця datetime"""
+    for name in derived:
+        df[name] = _DERIVED_COLUMNS[name](df['datetime'])
+    return df
+
+
+def snapshot_path(cache_dir, source):
+    """Каталог знімка для заданого файлу-джерела"""
+    return os.path.join(cache_dir, os.path.basename(source) + '.snapshot')
+
+
+def save_snapshot(path, key, df):
+    """Атомарний запис знімка таблиці у вигляді окремих файлів .npy для кожного стовпця"""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    columns = []
+    for position, name in enumerate(df.columns):
+        meta, arrays = encode_column(name, df[name])
+        meta['name'] = name
+        meta['files'] = {}
+        for part, values in arrays.items():
+            file_name = f"col{position:04d}_{part}.npy"
+            np.save(os.path.join(tmp_path, file_name), values, allow_pickle=False)
+            meta['files'][part] = file_name
+        columns.append(meta)
+    manifest = {'key': key, 'rows': len(df), 'columns': columns}
+    with open(os.path.join(tmp_path, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    # Замінюємо попередній знімок лише після повного запису нового
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def read_manifest(path):
+    """Читання опису знімка або None, якщо знімка немає"""
+    try:
+        with open(os.path.join(path, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_snapshot(path, key=None, mmap=True):
+    """Завантаження знімка (із відображенням файлів у пам'ять); None, якщо ключ не збігається"""
+    manifest = read_manifest(path)
+    if manifest is None or (key is not None and manifest['key'] != key):
+        return None
+    mmap_mode = 'r' if mmap else None
+    data = {}
+    derived = []
+    for meta in manifest['columns']:
+        if meta['kind'] == 'derived':
+            derived.append(meta['name'])
+            data[meta['name']] = None
+            continue
+        # view(np.ndarray) лишає дані відображеними у пам'ять, але прибирає підклас memmap
+        arrays = {part: np.load(os.path.join(path, file_name), mmap_mode=mmap_mode,
+                                allow_pickle=False).view(np.ndarray)
+                  for part, file_name in meta['files'].items()}
+        data[meta['name']] = decode_column(meta, arrays)
+    order = list(data)
+    df = pd.DataFrame({name: values for name, values in data.items() if values is not None}, copy=False)
+    df = restore_derived(df, derived)
+    return df[order]
+
+
+def _to_numpy(series):
+    """Масив значень категорій у форматі, придатному для .npy без pickle"""
+    if pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype):
+        return np.asarray(series.astype(str), dtype=str)
+    return series.to_numpy()
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Напрямки вітру та стан неба, як у GlobalWeatherRepository.csv
+_WIND_DIRECTIONS = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
+_CONDITIONS = ['Sunny', 'Clear', 'Partly cloudy', 'Cloudy', 'Overcast', 'Mist', 'Light rain', 'Moderate rain']
+DEFAULT_CHUNK_ROWS = 500_000
+
+
+def location_table(countries=20, locations_per_country=10):
+    """Назви країн і міст синтетичного набору: (country, location_name) для кожного міста"""
+    country = np.repeat([f"Country-{i:03d}" for i in range(countries)], locations_per_country)
+    location = np.array([f"{name}-City-{i % locations_per_country:03d}" for i, name in enumerate(country)])
+    return country, location
+
+
+def generate_weather_frame(rows, countries=20, locations_per_country=10, start='2023-01-01', end='2024-12-31',
+                           seed=0, offset=0, total_rows=None):
+    """Таблиця у форматі GlobalWeatherRepository.csv: міста по черзі, час рівномірно зростає від start до end
+
+    offset і total_rows задають місце частини у великому файлі, щоб частини продовжували одна одну.
+    """
+    rng = np.random.default_rng([seed, offset])
+    country, location = location_table(countries, locations_per_country)
+    number = np.arange(offset, offset + rows)
+    site = number % len(country)
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    fraction = number / max(total_rows or rows, 1)
+    stamps = (start + pd.to_timedelta((fraction * (end - start).value).astype(np.int64), unit='ns')).floor('15min')
+    # Забруднення має сезонну складову та довгий правий хвіст
+    season = 1.0 + 0.5 * np.cos(2 * np.pi * (stamps.month.to_numpy() - 1) / 12)
+    pm25 = rng.lognormal(2.5, 0.9, rows) * season
+    pm10 = pm25 * rng.uniform(1.1, 2.5, rows)
+    return pd.DataFrame({
+        'country': country[site],
+        'location_name': location[site],
+        'latitude': (site % 180 - 90 + 0.5).round(2),
+        'longitude': (site % 360 - 180 + 0.5).round(2),
+        'timezone': 'UTC',
+        'last_updated': stamps.strftime('%Y-%m-%d %H:%M'),
+        'temperature_celsius': rng.normal(12, 10, rows).round(1),
+        'condition_text': np.array(_CONDITIONS)[rng.integers(0, len(_CONDITIONS), rows)],
+        'wind_kph': rng.gamma(2.0, 6.0, rows).round(1),
+        'wind_degree': rng.integers(0, 360, rows),
+        'wind_direction': np.array(_WIND_DIRECTIONS)[rng.integers(0, len(_WIND_DIRECTIONS), rows)],
+        'pressure_mb': rng.normal(1013, 8, rows).round(0),
+        'humidity': rng.integers(10, 100, rows),
+        'cloud': rng.integers(0, 100, rows),
+        'air_quality_Carbon_Monoxide': rng.lognormal(5.8, 0.6, rows).round(1),
+        'air_quality_Ozone': rng.lognormal(3.8, 0.5, rows).round(1),
+        'air_quality_Nitrogen_dioxide': rng.lognormal(2.2, 0.9, rows).round(1),
+        'air_quality_Sulphur_dioxide': rng.lognormal(1.2, 1.0, rows).round(1),
+        'air_quality_PM2.5': pm25.round(1),
+        'air_quality_PM10': pm10.round(1),
+    })
+
+
+def write_weather_csv(path, rows, chunk_rows=DEFAULT_CHUNK_ROWS, **kwargs):
+    """Запис синтетичного CSV-файлу частинами, щоб 10 млн рядків не тримати в пам'яті"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        for offset in range(0, rows, chunk_rows):
+            frame = generate_weather_frame(min(chunk_rows, rows - offset), offset=offset, total_rows=rows, **kwargs)
+            frame.to_csv(f, header=offset == 0, index=False)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class DataFrameTableModel(QAbstractTableModel):
+    """Модель таблиці поверх масивів стовпців: клітинки форматуються лише під час показу"""
+
+    def __init__(self, data=None, parent=None):
+        super().__init__(parent)
+        self._columns = []
+        self._arrays = []
+        self._order = None
+        self._sort_key = None
+        self._rows = 0
+        if data is not None:
+            self.set_frame(data)
+
+    def set_frame(self, data):
+        """Заміна даних моделі без копіювання стовпців"""
+        self.beginResetModel()
+        self._columns = [str(name) for name in data.columns]
+        self._arrays = [self._column_array(data[name]) for name in data.columns]
+        self._rows = len(data)
+        self._order = None
+        self.endResetModel()
+        # Нові дані впорядковуються так само, як попередні
+        if self._sort_key is not None and self._sort_key[0] < len(self._columns):
+            self.sort(*self._sort_key)
+
+    @staticmethod
+    def _column_array(series):
+        """Масив значень стовпця; категорії зберігаються як коди та словник"""
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = np.append(series.cat.categories.to_numpy(dtype=object), np.nan)
+            return series.cat.codes.to_numpy(), categories
+        if pd.api.types.is_datetime64_any_dtype(series.dtype) or pd.api.types.is_timedelta64_dtype(series.dtype):
+            # Рядкове подання Timestamp/Timedelta збігається з тим, що показувала QTableWidget
+            return series.array, None
+        return series.to_numpy(), None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        row = index.row() if self._order is None else self._order[index.row()]
+        values, categories = self._arrays[index.column()]
+        value = values[row]
+        if categories is not None:
+            value = categories[value]
+        return str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._columns[section]
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Сортування перестановкою рядків, обчисленою над масивом стовпця"""
+        if not self._arrays or column < 0:
+            return
+        self._sort_key = (column, order)
+        values, categories = self._arrays[column]
+        if categories is not None:
+            # Коди категорій переводимо в ранги їхніх назв
+            ranks = np.empty(len(categories) - 1)
+            ranks[_sort_positions(pd.Series(categories[:-1]), True)] = np.arange(len(ranks))
+            values = np.append(ranks, np.nan)[values]
+        self.layoutAboutToBeChanged.emit()
+        self._order = _sort_positions(pd.Series(values), order == Qt.AscendingOrder)
+        self.layoutChanged.emit()
+
+
+def _sort_positions(keys, ascending):
+    """Номери рядків keys у порядку сортування; пропуски — в кінці"""
+    try:
+        return keys.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+    except TypeError:
+        # Значення різних типів (наприклад, числа й рядки) порівнюються за показаним текстом
+        text = keys.astype(str).where(keys.notna())
+        return text.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
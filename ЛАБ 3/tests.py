@@ -5,7 +5,56 @@ from datetime import datetime
 from unittest.mock import patch
 from io import StringIO
 import sys
+import os
+import shutil
+import tempfile
+import asyncio
+import threading
+import time
+import json
+import tracemalloc
 from AirQualityAnalyzer import AirQualityAnalyzer
+from aqi_engine import ALL_POLLUTANTS, compute_aqi, categorize_aqi
+from filter_index import FilterIndex, sort_for_index
+from rollup_cube import AqiCube
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from plotting import TimeSeriesPlot, lttb, minmax_downsample
+from batch import plan_shards, run_batch
+from snapshot_cache import load_snapshot
+from partitions import load_manifest, partition_csv, select_partitions
+from metrics import PipelineMetrics
+from service import AqiHttpServer, AqiService
+from recommendations import RECOMMENDATIONS, build_recommendations, latest_reading
+from alerts import AlertEngine, CategoryTransition, LatestIndex, SustainedExceedance
+from synthetic import generate_weather_frame, write_weather_csv
+from benchmark import compare_results, run_benchmarks
+from shared_store import attach
+from concurrent.futures import ProcessPoolExecutor
+from PyQt5.QtCore import QCoreApplication, QThreadPool, Qt
+from table_model import DataFrameTableModel
+from workers import TaskRunner
+
+
+def make_weather_frame(rows=40, countries=('Ukraine', 'Poland'), locations=2, start='2024-01-01 00:15', freq='6h'):
+    """Невеликий набір даних у форматі GlobalWeatherRepository.csv."""
+    rng = np.random.default_rng(1)
+    country = np.resize(np.repeat(countries, locations), rows)
+    location = np.array([f"{c}-{i % locations}" for i, c in enumerate(country)])
+    stamps = pd.date_range(start, periods=rows, freq=freq)
+    return pd.DataFrame({
+        'country': country,
+        'location_name': location,
+        'last_updated': stamps.strftime('%Y-%m-%d %H:%M'),
+        'air_quality_PM2.5': rng.uniform(0, 200, rows).round(1),
+        'air_quality_PM10': rng.uniform(0, 400, rows).round(1),
+        'temperature_celsius': rng.uniform(-10, 30, rows).round(1),
+        'air_quality_Carbon_Monoxide': rng.uniform(100, 2000, rows).round(1),
+        'air_quality_Ozone': rng.uniform(0, 200, rows).round(1),
+        'air_quality_Nitrogen_dioxide': rng.uniform(0, 100, rows).round(1),
+        'air_quality_Sulphur_dioxide': rng.uniform(0, 50, rows).round(1),
+    })
 
 
 class TestAirQualityAnalyzer(unittest.TestCase):
@@ -150,5 +199,877 @@ class TestAirQualityAnalyzer(unittest.TestCase):
                 sys.stdout = sys.__stdout__
 
 
+class TestAqiEngine(unittest.TestCase):
+    def setUp(self):
+        """Набір концентрацій, що покриває всі інтервали та межі між ними."""
+        rng = np.random.default_rng(0)
+        pm25 = np.concatenate([rng.uniform(0, 600, 500),
+                               [0, 12.0, 12.05, 12.1, 35.4, 35.45, 55.4, 150.4, 250.4, 250.45, 700]])
+        pm10 = np.concatenate([rng.uniform(0, 700, 500),
+                               [0, 54, 54.5, 55, 154, 254, 354, 424, 424.5, 604, 900]])
+        self.frame = pd.DataFrame({'air_quality_PM2.5': pm25, 'air_quality_PM10': pm10})
+
+    def test_matches_calculate_aqi(self):
+        """Векторний AQI збігається з построковим calculate_aqi для PM2.5 і PM10."""
+        analyzer = AirQualityAnalyzer.__new__(AirQualityAnalyzer)
+        expected = self.frame.apply(analyzer.calculate_aqi, axis=1).to_numpy()
+        aqi, _ = compute_aqi(self.frame)
+        np.testing.assert_array_equal(aqi, expected)
+
+    def test_dominant_pollutant(self):
+        """Перевірка визначення домінантного забруднювача."""
+        frame = pd.DataFrame({'air_quality_PM2.5': [40.0, 2.0, np.nan],
+                              'air_quality_PM10': [10.0, 300.0, 5.0]})
+        aqi, dominant = compute_aqi(frame)
+        self.assertEqual(list(dominant), ['PM2.5', 'PM10', None])
+        self.assertTrue(np.isnan(aqi[2]))
+
+    def test_all_pollutants(self):
+        """Гази враховуються в AQI, коли вони перевищують PM."""
+        frame = pd.DataFrame({'air_quality_PM2.5': [2.0], 'air_quality_PM10': [2.3],
+                              'air_quality_Ozone': [300.0], 'air_quality_Nitrogen_dioxide': [0.9],
+                              'air_quality_Sulphur_dioxide': [2.2], 'air_quality_Carbon_Monoxide': [213.6]})
+        aqi, dominant = compute_aqi(frame, ALL_POLLUTANTS)
+        self.assertEqual(dominant[0], 'O3')
+        self.assertGreater(aqi[0], 100)
+
+    def test_categorize_aqi(self):
+        """Категорії збігаються з межами np.select із попередньої реалізації."""
+        categories = categorize_aqi([0, 50, 50.5, 100, 150, 200, 300, 301, np.nan])
+        self.assertEqual(list(categories), ['Добре', 'Добре', 'Помірне', 'Помірне', 'Шкідливе для чутливих груп',
+                                            'Шкідливе', 'Дуже шкідливе', 'Небезпечне', 'Невідомо'])
+
+
+class TestSnapshotCache(unittest.TestCase):
+    def setUp(self):
+        """Тимчасовий CSV-файл і каталог для знімків."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_dir, 'weather.csv')
+        make_weather_frame().to_csv(self.csv_path, index=False)
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_snapshot_roundtrip(self):
+        """Повторний запуск читає знімок замість CSV і отримує ті самі дані."""
+        first = AirQualityAnalyzer(self.csv_path, cache_dir=self.cache_dir)
+        with patch('pandas.read_csv', side_effect=AssertionError("CSV не повинен читатися")):
+            second = AirQualityAnalyzer(self.csv_path, cache_dir=self.cache_dir)
+        pd.testing.assert_frame_equal(second.data, first.data, check_dtype=False)
+        self.assertEqual(second.data['date'].iloc[0], first.data['date'].iloc[0])
+
+    def test_snapshot_rebuilt_on_change(self):
+        """Зміна CSV-файлу інвалідує знімок."""
+        AirQualityAnalyzer(self.csv_path, cache_dir=self.cache_dir)
+        make_weather_frame(rows=10).to_csv(self.csv_path, index=False)
+        analyzer = AirQualityAnalyzer(self.csv_path, cache_dir=self.cache_dir)
+        self.assertEqual(len(analyzer.data), 10)
+
+
+class TestLeanIngestion(unittest.TestCase):
+    def setUp(self):
+        """Тимчасовий CSV-файл для почастинного читання."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_dir, 'weather.csv')
+        make_weather_frame(rows=60, countries=('Ukraine', 'Poland', 'Czechia')).to_csv(self.csv_path, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_lean_schema(self):
+        """Компактне подання використовує float32, категорії та datetime64."""
+        analyzer = AirQualityAnalyzer(self.csv_path, lean=True, chunksize=7)
+        data = analyzer.data
+        self.assertEqual(len(data), 60)
+        self.assertEqual(data['air_quality_PM2.5'].dtype, np.float32)
+        self.assertIsInstance(data['country'].dtype, pd.CategoricalDtype)
+        self.assertEqual(sorted(data['country'].cat.categories), ['Czechia', 'Poland', 'Ukraine'])
+        self.assertIsInstance(data['season'].dtype, pd.CategoricalDtype)
+        self.assertTrue(pd.api.types.is_datetime64_dtype(data['date']))
+        self.assertTrue(pd.api.types.is_timedelta64_dtype(data['time']))
+        self.assertLess(analyzer.ingest_stats['bytes_per_row_after'], analyzer.ingest_stats['bytes_per_row_before'])
+
+    def test_lean_matches_default(self):
+        """Компактне подання дає ті самі AQI, категорії та результати фільтрації."""
+        lean = AirQualityAnalyzer(self.csv_path, lean=True, chunksize=7)
+        full = AirQualityAnalyzer(self.csv_path)
+        np.testing.assert_allclose(lean.data['aqi'], full.data['aqi'], rtol=1e-6)
+        self.assertEqual(list(lean.data['air_quality_category']), list(full.data['air_quality_category']))
+        filters = dict(country='Poland', start_date='2024-01-03', end_date='2024-01-08')
+        self.assertEqual(len(lean.get_filtered_data(**filters)), len(full.get_filtered_data(**filters)))
+
+
+class TestFilterIndex(unittest.TestCase):
+    def setUp(self):
+        """Невпорядковані дані, де одна назва міста трапляється в кількох країнах."""
+        rng = np.random.default_rng(2)
+        rows = 300
+        frame = pd.DataFrame({
+            'country': rng.choice(['Ukraine', 'Poland', 'Chile'], rows),
+            'location_name': rng.choice(['Kyiv', 'Lviv', 'Santiago', 'Warsaw'], rows),
+            'datetime': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 90 * 24 * 60, rows), unit='min'),
+        })
+        frame.loc[5, 'datetime'] = pd.NaT
+        self.data = sort_for_index(frame)
+        self.index = FilterIndex(self.data)
+
+    def brute_force(self, country=None, location=None, start_date=None, end_date=None):
+        """Еталонна фільтрація послідовними масками."""
+        mask = pd.Series(True, index=self.data.index)
+        if country:
+            mask &= self.data['country'] == country
+        if location:
+            mask &= self.data['location_name'] == location
+        if start_date:
+            mask &= self.data['datetime'] >= pd.Timestamp(start_date)
+        if end_date:
+            mask &= self.data['datetime'] < pd.Timestamp(end_date) + pd.Timedelta(days=1)
+        return self.data[mask]
+
+    def test_matches_brute_force(self):
+        """Індекс повертає ті самі рядки, що й послідовні маски."""
+        for country in [None, 'Ukraine', 'Chile', 'Nowhere']:
+            for location in [None, 'Kyiv', 'Santiago']:
+                for start, end in [(None, None), ('2024-01-15', None), (None, '2024-02-10'),
+                                   ('2024-02-01', '2024-02-01'), ('2023-01-01', '2030-01-01')]:
+                    expected = self.brute_force(country, location, start, end)
+                    result = self.index.select(country, location, start, end)
+                    self.assertEqual(list(result.index), list(expected.index), (country, location, start, end))
+
+    def test_country_is_single_slice(self):
+        """Фільтр лише за країною — один суцільний діапазон."""
+        starts, stops = self.index.ranges(country='Poland')
+        self.assertEqual(len(starts), 1)
+        self.assertEqual(stops[0] - starts[0], (self.data['country'] == 'Poland').sum())
+
+    def test_locations(self):
+        """Список міст країни береться з індексу."""
+        self.assertEqual(self.index.countries(), ['Chile', 'Poland', 'Ukraine'])
+        self.assertEqual(self.index.locations('Chile'), ['Kyiv', 'Lviv', 'Santiago', 'Warsaw'])
+
+
+class TestRollupCube(unittest.TestCase):
+    def setUp(self):
+        """Аналізатор на синтетичних даних із кількома вимірюваннями на день."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_dir, 'weather.csv')
+        make_weather_frame(rows=200, freq='3h').to_csv(self.csv_path, index=False)
+        self.analyzer = AirQualityAnalyzer(self.csv_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_matches_groupby(self):
+        """Агрегати куба збігаються з groupby над відфільтрованими рядками."""
+        filters = dict(country='Ukraine', start_date='2024-01-05', end_date='2024-01-20')
+        rows = self.analyzer.get_filtered_data(**filters)
+        expected = rows.groupby(rows['datetime'].dt.normalize())['aqi'].agg(['mean', 'min', 'max', 'count'])
+        result = self.analyzer.get_aggregates('date', **filters)
+        np.testing.assert_allclose(result['mean'], expected['mean'])
+        np.testing.assert_allclose(result['max'], expected['max'])
+        np.testing.assert_array_equal(result['count'], expected['count'])
+
+        seasons = self.analyzer.get_aggregates('season')
+        self.assertEqual(seasons['count'].sum(), len(self.analyzer.data))
+        hours = self.analyzer.get_aggregates('hour', location='Poland-1')
+        expected_hours = self.analyzer.get_filtered_data(location='Poland-1').groupby('hour')['aqi'].mean()
+        np.testing.assert_allclose(hours['mean'], expected_hours)
+
+    def test_incremental_add(self):
+        """Інкрементне оновлення дає той самий куб, що й побудова з нуля."""
+        data = self.analyzer.data
+        cube = AqiCube(data.iloc[:120])
+        cube.add(data.iloc[120:])
+        pd.testing.assert_frame_equal(cube.cells, AqiCube(data).cells, check_dtype=False)
+
+
+class TestIncrementalIngestion(unittest.TestCase):
+    def setUp(self):
+        """CSV-файл, до якого дописуються нові рядки."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_dir, 'weather.csv')
+        self.frame = make_weather_frame(rows=50)
+        self.frame.iloc[:30].to_csv(self.csv_path, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def append_rows(self, rows):
+        """Дописування рядків у кінець файлу без заголовка."""
+        with open(self.csv_path, 'a', encoding='utf-8') as f:
+            f.write(rows.to_csv(index=False, header=False))
+
+    def test_ingest_tail(self):
+        """Нові рядки потрапляють у дані, індекс і куб без повного перезавантаження."""
+        for lean in (False, True):
+            self.frame.iloc[:30].to_csv(self.csv_path, index=False)
+            analyzer = AirQualityAnalyzer(self.csv_path, lean=lean)
+            self.assertEqual(analyzer.ingest_new_rows(), 0)
+            self.append_rows(self.frame.iloc[30:50])
+            with patch('AirQualityAnalyzer.read_weather_csv', side_effect=AssertionError("повне читання")):
+                self.assertEqual(analyzer.ingest_new_rows(), 20)
+            reference = AirQualityAnalyzer(self.csv_path, lean=lean)
+            pd.testing.assert_frame_equal(analyzer.data, reference.data, check_dtype=False,
+                                          check_categorical=False)
+            self.assertEqual(len(analyzer.get_filtered_data(country='Poland')),
+                             len(reference.get_filtered_data(country='Poland')))
+            self.assertEqual(analyzer.get_aggregates('season')['count'].sum(), 50)
+
+    def test_delta_segment(self):
+        """Дочитані рядки видно в запитах без перебудови основного індексу, а за порогом вони зливаються з ним."""
+        analyzer = AirQualityAnalyzer(self.csv_path)
+        index = analyzer.index
+        self.append_rows(self.frame.iloc[30:40])
+        analyzer.ingest_new_rows()
+        self.assertIs(analyzer.index, index)
+        self.frame.iloc[:40].to_csv(os.path.join(self.tmp_dir, 'reference.csv'), index=False)
+        reference = AirQualityAnalyzer(os.path.join(self.tmp_dir, 'reference.csv'))
+        for query in ({'country': 'Poland'}, {'location': 'Ukraine-1', 'start_date': '2024-01-05'}, {}):
+            pd.testing.assert_frame_equal(analyzer.get_filtered_data(**query).reset_index(drop=True),
+                                          reference.get_filtered_data(**query).reset_index(drop=True))
+        self.assertEqual(analyzer.get_locations('Poland'), reference.get_locations('Poland'))
+        self.append_rows(self.frame.iloc[40:50])
+        with patch('AirQualityAnalyzer.DELTA_MIN_ROWS', 15):
+            analyzer.ingest_new_rows()
+        self.assertIsNone(analyzer._delta_index)
+        self.assertEqual(len(analyzer.index.data), 50)
+
+    def test_queries_during_ingest(self):
+        """Запити з іншого потоку під час дочитування бачать таблицю разом з її індексом."""
+        analyzer = AirQualityAnalyzer(self.csv_path)
+        stop, errors, sizes = threading.Event(), [], []
+
+        def query():
+            while not stop.is_set():
+                try:
+                    result = analyzer.get_filtered_data(country='Poland')
+                    self.assertTrue((result['country'] == 'Poland').all())
+                    sizes.append(len(result))
+                except Exception as exc:
+                    errors.append(exc)
+                    return
+
+        worker = threading.Thread(target=query)
+        worker.start()
+        for start in range(30, 50, 5):
+            self.append_rows(self.frame.iloc[start:start + 5])
+            analyzer.ingest_new_rows()
+        stop.set()
+        worker.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(sizes, sorted(sizes))
+        self.assertIs(analyzer.data, analyzer.index.data)
+
+    def test_partial_line(self):
+        """Недописаний рядок читається лише після появи символу кінця рядка."""
+        analyzer = AirQualityAnalyzer(self.csv_path)
+        line = self.frame.iloc[30:31].to_csv(index=False, header=False)
+        with open(self.csv_path, 'a', encoding='utf-8') as f:
+            f.write(line[:10])
+        self.assertEqual(analyzer.ingest_new_rows(), 0)
+        with open(self.csv_path, 'a', encoding='utf-8') as f:
+            f.write(line[10:])
+        self.assertEqual(analyzer.ingest_new_rows(), 1)
+        self.assertEqual(len(analyzer.data), 31)
+
+    def test_truncated_file_reloads(self):
+        """Обрізаний файл перечитується повністю."""
+        analyzer = AirQualityAnalyzer(self.csv_path)
+        self.frame.iloc[:5].to_csv(self.csv_path, index=False)
+        analyzer.ingest_new_rows()
+        self.assertEqual(len(analyzer.data), 5)
+
+    def test_replaced_file_reloads(self):
+        """Файл, замінений довшим або перезаписаний на місці, перечитується повністю, а не дочитується."""
+        analyzer = AirQualityAnalyzer(self.csv_path)
+        replacement = os.path.join(self.tmp_dir, 'new.csv')
+        self.frame.iloc[10:50].to_csv(replacement, index=False)
+        os.replace(replacement, self.csv_path)
+        analyzer.ingest_new_rows()
+        self.assertEqual(len(analyzer.data), 40)
+        self.assertEqual(analyzer.data['datetime'].min(), pd.Timestamp(self.frame['last_updated'].iloc[10]))
+
+        # Перезапис того самого inode довшим вмістом
+        frame = self.frame.copy()
+        frame['air_quality_PM2.5'] = 1.0
+        frame.to_csv(self.csv_path, index=False)
+        analyzer.ingest_new_rows()
+        self.assertEqual(len(analyzer.data), 50)
+        self.assertTrue((analyzer.get_filtered_data()['air_quality_PM2.5'] == 1.0).all())
+
+
+class TestPlotting(unittest.TestCase):
+    def setUp(self):
+        """Довгий погодинний ряд."""
+        self.x = pd.date_range('2020-01-01', periods=50_000, freq='h')
+        self.y = np.sin(np.arange(50_000) / 500.0) * 100 + 150
+        self.y[12_345] = 900.0  # Поодинокий пік
+
+    def test_downsamplers(self):
+        """Обидва методи зберігають кінці ряду, порядок і пікові значення."""
+        x = np.arange(len(self.y), dtype=float)
+        for downsample in (lttb, minmax_downsample):
+            dx, dy = downsample(x, self.y, 1000)
+            self.assertLessEqual(len(dx), 1002)
+            self.assertEqual((dx[0], dx[-1]), (x[0], x[-1]))
+            self.assertTrue(np.all(np.diff(dx) > 0))
+            self.assertIn(900.0, dy)
+
+    def test_level_of_detail(self):
+        """На графіку не більше max_points точок, а при масштабуванні точки беруться з повних даних."""
+        fig, ax = plt.subplots()
+        plot = TimeSeriesPlot(ax, max_points=500)
+        plot.set_series(self.x, self.y)
+        self.assertLessEqual(len(plot.line.get_xdata()), 500)
+        fig.canvas.draw()
+        window = matplotlib.dates.date2num([pd.Timestamp('2021-01-01'), pd.Timestamp('2021-01-05')])
+        ax.set_xlim(*window)
+        xdata = plot.line.get_xdata()
+        self.assertEqual(len(xdata), 4 * 24 + 3)  # Повна роздільність усередині вікна
+        plot.set_series(self.x, self.y * 0.5)
+        self.assertLessEqual(len(plot.line.get_xdata()), 500)
+        plt.close(fig)
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        """Два CSV-файли, один із яких ділиться на багато шматків."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.paths = [os.path.join(self.tmp_dir, 'a.csv'), os.path.join(self.tmp_dir, 'b.csv')]
+        make_weather_frame(rows=150).to_csv(self.paths[0], index=False)
+        make_weather_frame(rows=20, start='2024-06-01 00:00').to_csv(self.paths[1], index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_batch_matches_analyzer(self):
+        """Шматки покривають кожен рядок рівно один раз, агрегати збігаються з аналізатором."""
+        self.assertGreater(len(plan_shards(self.paths[0], 1000)), 5)
+        output = os.path.join(self.tmp_dir, 'out')
+        summary = run_batch(self.paths, output, workers=2, shard_bytes=1000)
+        self.assertEqual(summary['rows'], 170)
+
+        enriched_dir = os.path.join(output, 'enriched')
+        parts = [load_snapshot(os.path.join(enriched_dir, name)) for name in sorted(os.listdir(enriched_dir))]
+        enriched = pd.concat(parts, ignore_index=True)
+        reference = AirQualityAnalyzer(self.paths[0], lean=True).data
+        np.testing.assert_allclose(np.sort(enriched['aqi'].to_numpy()[:150]), np.sort(reference['aqi'].to_numpy()))
+
+        by_country = load_snapshot(os.path.join(output, 'summary_by_country'))
+        self.assertEqual(by_country['count'].sum(), 170)
+
+
+class TestPartitions(unittest.TestCase):
+    def setUp(self):
+        """Набір даних за кілька місяців, поділений за місяцем і країною."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_dir, 'weather.csv')
+        make_weather_frame(rows=400, freq='9h').to_csv(self.csv_path, index=False)
+        self.root = os.path.join(self.tmp_dir, 'dataset')
+        partition_csv(self.csv_path, self.root, chunksize=50)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_manifest(self):
+        """Опис містить межі дат і країни кожного розділу."""
+        manifest = load_manifest(self.root)
+        self.assertEqual(sum(entry['rows'] for entry in manifest['partitions']), 400)
+        selected = select_partitions(manifest, country='Poland', start_date='2024-02-01', end_date='2024-02-29')
+        self.assertEqual([entry['path'] for entry in selected],
+                         [os.path.join('month=2024-02', 'country=Poland', 'part.csv')])
+
+    def test_pushdown(self):
+        """Відкриваються лише потрібні розділи, а результати збігаються з повним файлом."""
+        analyzer = AirQualityAnalyzer(self.root, start_date='2024-04-01', cache_dir=os.path.join(self.tmp_dir, 'c'))
+        self.assertEqual({path.split(os.sep)[0] for path in analyzer.loaded_partitions}, {'month=2024-04', 'month=2024-05'})
+        self.assertEqual(analyzer.get_countries(), ['Poland', 'Ukraine'])
+
+        full = AirQualityAnalyzer(self.csv_path)
+        filters = dict(country='Ukraine', start_date='2024-02-10', end_date='2024-03-05')
+        result = analyzer.get_filtered_data(**filters)
+        self.assertIn(os.path.join('month=2024-02', 'country=Ukraine', 'part.csv'), analyzer.loaded_partitions)
+        self.assertNotIn(os.path.join('month=2024-02', 'country=Poland', 'part.csv'), analyzer.loaded_partitions)
+        expected = full.get_filtered_data(**filters)
+        np.testing.assert_allclose(result['aqi'].to_numpy(), expected['aqi'].to_numpy())
+        self.assertEqual(analyzer.get_aggregates('date', **filters)['count'].sum(), len(expected))
+
+    def test_new_partitions(self):
+        """Розділи, додані або доповнені після першого завантаження, підхоплює ingest_new_rows, а не кожен запит."""
+        analyzer = AirQualityAnalyzer(self.root, cache_dir=os.path.join(self.tmp_dir, 'c'))
+        rows = len(analyzer.data)
+        extra = make_weather_frame(rows=6, countries=('Poland',), start='2025-01-02 00:15')
+        directory = os.path.join(self.root, 'month=2025-01', 'country=Poland')
+        os.makedirs(directory)
+        extra.to_csv(os.path.join(directory, 'part.csv'), index=False)
+        with patch('AirQualityAnalyzer.build_manifest', side_effect=AssertionError("сканування розділів")):
+            analyzer.get_filtered_data(country='Poland')
+            analyzer.get_aggregates('date')
+            analyzer.get_alerts()
+        self.assertEqual(analyzer.ingest_new_rows(), 6)
+        self.assertEqual(analyzer.get_filtered_data()['datetime'].max(), pd.Timestamp('2025-01-03 06:15'))
+
+        later = make_weather_frame(rows=2, countries=('Poland',), start='2025-01-20 00:15')
+        later.to_csv(os.path.join(directory, 'part.csv'), mode='a', header=False, index=False)
+        self.assertEqual(analyzer.ingest_new_rows(), 2)
+        self.assertEqual(analyzer.get_filtered_data(country='Poland')['datetime'].max(),
+                         pd.Timestamp('2025-01-20 06:15'))
+        self.assertEqual(len(analyzer.data), rows + 8)
+
+    def test_latest_partitions(self):
+        """Останні вимірювання й сповіщення охоплюють усі міста, а відкриваються лише найновіші розділи."""
+        analyzer = AirQualityAnalyzer(self.root, country='Poland', start_date='2024-05-01',
+                                      cache_dir=os.path.join(self.tmp_dir, 'c'))
+        full = AirQualityAnalyzer(self.csv_path)
+        key = ['country', 'location_name', 'rule']
+        alerts = analyzer.get_alerts().sort_values(key).reset_index(drop=True)
+        expected = full.get_alerts().sort_values(key).reset_index(drop=True)
+        pd.testing.assert_frame_equal(alerts, expected, check_dtype=False)
+        latest = analyzer.get_latest().sort_values(key[:2]).reset_index(drop=True)
+        np.testing.assert_allclose(latest['aqi'], full.get_latest().sort_values(key[:2])['aqi'])
+        self.assertEqual({path.split(os.sep)[0] for path in analyzer.loaded_partitions}, {'month=2024-04', 'month=2024-05'})
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_dir, 'weather.csv')
+        make_weather_frame(rows=60).to_csv(self.csv_path, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_stage(self):
+        """Етап рахує виконання, рядки, помилки та пікову пам'ять вкладених етапів."""
+        metrics = PipelineMetrics(trace_memory=True)
+        self.addCleanup(tracemalloc.stop)
+        with metrics.stage('outer', rows=5):
+            with metrics.stage('inner') as record:
+                block = np.ones(1 << 20)
+                record.rows = 3
+            del block
+        with self.assertRaises(ValueError):
+            with metrics.stage('inner'):
+                raise ValueError('збій')
+        stats = metrics.snapshot()
+        self.assertEqual((stats['inner']['calls'], stats['inner']['errors'], stats['inner']['rows']), (2, 1, 3))
+        self.assertGreaterEqual(stats['inner']['peak_alloc_bytes'], 8 << 20)
+        self.assertGreaterEqual(stats['outer']['peak_alloc_bytes'], 8 << 20)
+        self.assertEqual(stats['outer']['rows'], 5)
+
+    def test_concurrent_stages(self):
+        """Етап іншого потоку не скидає пік поточного й сам пам'ять не вимірює."""
+        metrics = PipelineMetrics(trace_memory=True)
+        self.addCleanup(tracemalloc.stop)
+
+        def other():
+            with metrics.stage('other'):
+                np.ones(1000)
+
+        with metrics.stage('first'):
+            block = np.ones(1 << 20)
+            del block
+            thread = threading.Thread(target=other)
+            thread.start()
+            thread.join()
+        stats = metrics.snapshot()
+        self.assertGreaterEqual(stats['first']['peak_alloc_bytes'], 8 << 20)
+        self.assertEqual((stats['other']['calls'], stats['other']['peak_alloc_bytes']), (1, 0))
+
+    def test_analyzer_metrics(self):
+        """Аналізатор вимірює етапи обробки й запити; експорт у JSON і Prometheus."""
+        analyzer = AirQualityAnalyzer(self.csv_path, lean=True, chunksize=25)
+        analyzer.get_filtered_data(country='Ukraine')
+        stats = analyzer.metrics.snapshot()
+        for stage in ('load', 'read_csv', 'to_datetime', 'season', 'aqi', 'category', 'filter'):
+            self.assertIn(stage, stats)
+        self.assertEqual(stats['aqi']['calls'], 3)
+        self.assertEqual(stats['aqi']['rows'], 60)
+        self.assertEqual(stats['filter']['rows'], 30)
+        path = os.path.join(self.tmp_dir, 'metrics.json')
+        analyzer.metrics.to_json(path)
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['stages']['load']['rows'], 60)
+        self.assertIn('aqi_stage_rows_total{stage="filter"} 30', analyzer.metrics.to_prometheus())
+
+    def test_load_error(self):
+        """Помилка завантаження зберігається та рахується в показниках."""
+        with open(self.csv_path, 'w') as f:
+            f.write('country,location_name\nUkraine,Kyiv\n')
+        with patch('sys.stdout', new_callable=StringIO):
+            analyzer = AirQualityAnalyzer(self.csv_path)
+        self.assertIsInstance(analyzer.load_error, KeyError)
+        self.assertEqual(analyzer.metrics.snapshot()['load']['errors'], 1)
+
+
+class TestService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        csv_path = os.path.join(cls.tmp_dir, 'weather.csv')
+        make_weather_frame(rows=120).to_csv(csv_path, index=False)
+        cls.analyzer = AirQualityAnalyzer(csv_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    @staticmethod
+    async def fetch(port, target):
+        """GET-запит до сервісу; повертає код відповіді й тіло"""
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        head, body = response.split(b'\r\n\r\n', 1)
+        return int(head.split()[1]), body.decode('utf-8')
+
+    def test_endpoints(self):
+        """Списки, рядки NDJSON, агрегати й рекомендації з одного аналізатора."""
+        async def scenario():
+            service = AqiService(self.analyzer, batch_rows=7)
+            server = await AqiHttpServer(service).start('127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                return await asyncio.gather(
+                    self.fetch(port, '/countries'),
+                    self.fetch(port, '/rows?country=Ukraine&location=Ukraine-1'),
+                    self.fetch(port, '/aggregates?by=country'),
+                    self.fetch(port, '/recommendations?country=Poland'),
+                    self.fetch(port, '/aggregates?by=colour'),
+                    self.fetch(port, '/unknown'))
+            finally:
+                server.close()
+                service.close()
+
+        countries, rows, aggregates, recommendation, bad, missing = asyncio.run(scenario())
+        self.assertEqual(json.loads(countries[1]), ['Poland', 'Ukraine'])
+        lines = [json.loads(line) for line in rows[1].splitlines()]
+        expected = self.analyzer.get_filtered_data(country='Ukraine', location='Ukraine-1')
+        self.assertEqual(len(lines), len(expected))
+        self.assertAlmostEqual(lines[-1]['aqi'], expected['aqi'].iloc[-1])
+        self.assertEqual(sum(row['count'] for row in json.loads(aggregates[1])), 120)
+        record = json.loads(recommendation[1])
+        self.assertEqual(record['text'], build_recommendations(self.analyzer.get_filtered_data(country='Poland')))
+        self.assertEqual((bad[0], missing[0]), (400, 404))
+
+    def test_stream_error(self):
+        """Помилка посеред потокової відповіді стає останнім рядком NDJSON, а з'єднання закривається."""
+        async def scenario():
+            service = AqiService(self.analyzer, batch_rows=7)
+            server = await AqiHttpServer(service).start('127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                with patch('service.records_ndjson', side_effect=[b'{"aqi": 1}\n', ValueError('збій серіалізації')]):
+                    return await asyncio.wait_for(self.fetch(port, '/rows?country=Ukraine'), timeout=5)
+            finally:
+                server.close()
+                service.close()
+
+        status, body = asyncio.run(scenario())
+        lines = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(status, 200)
+        self.assertEqual(lines, [{'aqi': 1}, {'error': 'ValueError: збій серіалізації'}])
+
+    def test_coalescing(self):
+        """Однакові одночасні запити виконуються один раз."""
+        calls = []
+
+        def slow_query():
+            calls.append(threading.get_ident())
+            time.sleep(0.1)
+            return len(calls)
+
+        async def scenario():
+            service = AqiService(self.analyzer)
+            try:
+                results = await asyncio.gather(*[service.call(('same',), slow_query) for _ in range(5)])
+                return results + [await service.call(('same',), slow_query)]
+            finally:
+                service.close()
+
+        self.assertEqual(asyncio.run(scenario()), [1, 1, 1, 1, 1, 2])
+
+
+class TestBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_generator(self):
+        """Частини файлу продовжують одна одну так само, як таблиця, згенерована одразу."""
+        path = write_weather_csv(os.path.join(self.tmp_dir, 'synthetic.csv'), 1000, chunk_rows=300,
+                                 countries=3, locations_per_country=2)
+        data = pd.read_csv(path)
+        self.assertEqual(len(data), 1000)
+        self.assertTrue(data['last_updated'].is_monotonic_increasing)
+        self.assertEqual(data['location_name'].nunique(), 6)
+        whole = generate_weather_frame(1000, countries=3, locations_per_country=2)
+        self.assertTrue((data['last_updated'] == whole['last_updated']).all())
+        self.assertTrue(AirQualityAnalyzer(path).data['aqi'].notna().all())
+
+    def test_run_and_compare(self):
+        """Результати містять час, пропускну здатність і пам'ять; погіршення виявляється."""
+        current = run_benchmarks({'tiny': 2000}, self.tmp_dir, ['filter_broad', 'aqi'], repeat=1, log=None)
+        entry = current['results']['tiny']['aqi']
+        self.assertEqual(entry['rows'], 2000)
+        self.assertGreater(entry['rows_per_second'], 0)
+        self.assertIn('peak_alloc_bytes', entry)
+        self.assertEqual(compare_results(current, current), [])
+
+        # Порівняння перевіряється на сталих результатах, що не залежать від швидкості й пам'яті машини
+        baseline = {'results': {'tiny': {'aqi': {'seconds': 0.5, 'peak_alloc_bytes': 1000},
+                                         'filter_broad': {'seconds': 0.5, 'peak_alloc_bytes': 1000},
+                                         'filter_narrow': {'seconds': 0.5, 'peak_alloc_bytes': None}}}}
+        synthetic = json.loads(json.dumps(baseline))
+        synthetic['results']['tiny']['aqi']['seconds'] = 1.0
+        synthetic['results']['tiny']['filter_broad']['peak_alloc_bytes'] = 2000
+        synthetic['results']['tiny']['filter_narrow']['peak_alloc_bytes'] = 5000
+        regressions = compare_results(synthetic, baseline, threshold=0.25)
+        self.assertEqual(sorted(line.split(':')[0] for line in regressions), ['tiny/aqi', 'tiny/filter_broad'])
+        self.assertEqual(compare_results(synthetic, baseline, memory_threshold=1.5), [regressions[0]])
+
+
+def shared_worker(descriptor):
+    """Запит до таблиці зі спільної пам'яті в окремому процесі"""
+    analyzer = AirQualityAnalyzer(shared=descriptor)
+    buffer = np.frombuffer(analyzer._shared_frame.shm.buf, dtype=np.uint8)
+    aqi = analyzer.data['aqi'].to_numpy()
+    # Коди категорійних стовпців і дати теж мають бути поданнями спільного блоку, а не копіями
+    columns = [analyzer.data['country'].array.codes, analyzer.data['air_quality_category'].array.codes,
+               analyzer.data['date'].to_numpy(), aqi]
+    result = (len(analyzer.get_filtered_data(country='Poland', start_date='2024-01-05')),
+              [bool(np.shares_memory(values, buffer)) for values in columns], aqi.flags.writeable)
+    del buffer, aqi, columns
+    analyzer._data = analyzer.index = None
+    analyzer._shared_frame.close()
+    return result
+
+
+class TestSharedStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_dir, 'weather.csv')
+        make_weather_frame(rows=80).to_csv(self.csv_path, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_attach(self):
+        """Приєднана таблиця збігається з оригіналом, а фільтрація дає ті самі рядки."""
+        for lean in (False, True):
+            analyzer = AirQualityAnalyzer(self.csv_path, lean=lean)
+            published = analyzer.publish_shared()
+            try:
+                shared = AirQualityAnalyzer(shared=published.descriptor)
+                self.assertEqual(list(shared.data.columns), list(analyzer.data.columns))
+                expected = analyzer.get_filtered_data(country='Ukraine', start_date='2024-01-03')
+                result = shared.get_filtered_data(country='Ukraine', start_date='2024-01-03')
+                np.testing.assert_array_equal(result['aqi'].to_numpy(), expected['aqi'].to_numpy())
+                self.assertEqual(list(result['location_name'].astype(str)), list(expected['location_name'].astype(str)))
+                self.assertEqual(shared.get_locations('Poland'), analyzer.get_locations('Poland'))
+                self.assertFalse(shared.data['aqi'].to_numpy().flags.writeable)
+                # Куб і останні вимірювання не будуються під час приєднання, лише під час першого запиту
+                self.assertFalse({'cube_build', 'latest_build'} & set(shared.metrics.snapshot()))
+                pd.testing.assert_frame_equal(shared.get_aggregates('hour'), analyzer.get_aggregates('hour'))
+                self.assertEqual(len(shared.get_alerts()), len(analyzer.get_alerts()))
+                shared.get_aggregates('date')
+                stats = shared.metrics.snapshot()
+                self.assertEqual((stats['cube_build']['calls'], stats['latest_build']['calls']), (1, 1))
+                shared._shared_frame.close()
+            finally:
+                published.close()
+
+    def test_other_process(self):
+        """Інший процес читає ті самі сторінки пам'яті, а блок переживає його завершення."""
+        analyzer = AirQualityAnalyzer(self.csv_path)
+        published = analyzer.publish_shared()
+        try:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                rows, shares, writeable = pool.submit(shared_worker, published.descriptor).result()
+            self.assertEqual(rows, len(analyzer.get_filtered_data(country='Poland', start_date='2024-01-05')))
+            self.assertEqual(shares, [True] * 4)
+            self.assertFalse(writeable)
+            # Після завершення процесу блок досі доступний
+            attached = attach(published.descriptor)
+            self.assertEqual(len(attached.data), 80)
+            attached.close()
+        finally:
+            published.close()
+
+
+class TestAlerts(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_dir, 'weather.csv')
+        self.frame = make_weather_frame(rows=50)
+        self.frame.iloc[:30].to_csv(self.csv_path, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    @staticmethod
+    def readings(rows):
+        """Таблиця вимірювань (місто, година, AQI) у поданні після попередньої обробки."""
+        return pd.DataFrame({
+            'country': ['Ukraine'] * len(rows),
+            'location_name': [location for location, _, _ in rows],
+            'datetime': pd.to_datetime('2024-01-01') + pd.to_timedelta([hour for _, hour, _ in rows], unit='h'),
+            'aqi': [aqi for _, _, aqi in rows],
+        })
+
+    def test_latest_index(self):
+        """Останнє вимірювання кожного міста збігається з групуванням і оновлюється дочитаними рядками."""
+        for lean in (False, True):
+            self.frame.iloc[:30].to_csv(self.csv_path, index=False)
+            analyzer = AirQualityAnalyzer(self.csv_path, lean=lean)
+            with open(self.csv_path, 'a', encoding='utf-8') as f:
+                f.write(self.frame.iloc[30:50].to_csv(index=False, header=False))
+            analyzer.ingest_new_rows()
+            latest = analyzer.get_latest().sort_values(['country', 'location_name']).reset_index(drop=True)
+            data = analyzer.data.sort_values('datetime')
+            expected = data.groupby(['country', 'location_name'], observed=True).tail(1)
+            expected = expected.sort_values(['country', 'location_name']).reset_index(drop=True)
+            np.testing.assert_allclose(latest['aqi'], expected['aqi'].astype(float))
+            self.assertEqual(list(latest['air_quality_category']), list(expected['air_quality_category'].astype(str)))
+            self.assertEqual(len(analyzer.get_latest(country='Poland')), 2)
+            subset = analyzer.get_filtered_data(country='Ukraine')
+            self.assertEqual(latest_reading(subset)['datetime'], subset['datetime'].max())
+
+    def test_alerts_cached(self):
+        """Сповіщення перераховуються лише після появи нових рядків, а не під час кожного запиту."""
+        analyzer = AirQualityAnalyzer(self.csv_path)
+        first = analyzer.get_alerts()
+        self.assertIs(analyzer.get_alerts(), first)
+        self.assertEqual(analyzer.metrics.snapshot()['alerts']['calls'], 1)
+        with open(self.csv_path, 'a', encoding='utf-8') as f:
+            f.write(self.frame.iloc[30:50].to_csv(index=False, header=False))
+        analyzer.ingest_new_rows()
+        expected = AlertEngine().evaluate(LatestIndex(analyzer.data))
+        pd.testing.assert_frame_equal(analyzer.get_alerts(), expected)
+        self.assertEqual(analyzer.metrics.snapshot()['alerts']['calls'], 2)
+
+    def test_rules(self):
+        """Зміна категорії та тривале перевищення порогу для всіх міст за один прохід."""
+        latest = LatestIndex(self.readings([('A', 0, 160), ('A', 1, 170), ('A', 2, 180), ('B', 0, 40), ('B', 1, 120),
+                                            ('C', 0, 160), ('C', 1, np.nan), ('C', 2, 170)]), depth=4)
+        alerts = AlertEngine().evaluate(latest)
+        found = {(row.location_name, row.rule) for row in alerts.itertuples()}
+        self.assertEqual(found, {('A', 'sustained_exceedance'), ('B', 'category_transition')})
+        transition = alerts[alerts['location_name'] == 'B'].iloc[0]
+        self.assertEqual(transition['message'], "Категорія змінилася: Добре → Шкідливе для чутливих груп")
+        self.assertEqual(transition['recommendation'], RECOMMENDATIONS['Шкідливе для чутливих груп'])
+
+        # Нові вимірювання (у довільному порядку) зсувають історію кожного міста
+        latest.update(self.readings([('C', 4, 175), ('B', 2, 30), ('C', 3, 190), ('D', 0, 10)]))
+        alerts = AlertEngine([CategoryTransition(worsening_only=True), SustainedExceedance(150, 3)]).evaluate(latest)
+        self.assertEqual(sorted(alerts['location_name']), ['A', 'C'])
+        self.assertEqual(latest.frame(location='C')['aqi'].iloc[0], 175)
+        self.assertEqual(len(latest), 4)
+        with self.assertRaises(ValueError):
+            AlertEngine([SustainedExceedance(150, 5)]).evaluate(latest)
+
+
+class TestTableModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Моделі та сигнали Qt працюють без вікон, достатньо QCoreApplication
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.frame = pd.DataFrame({
+            'aqi': [120.5, np.nan, 30.0, 75.25],
+            'category': pd.Categorical(['Шкідливе', 'Добре', None, 'Помірне']),
+            'datetime': pd.to_datetime(['2024-01-02 10:00', None, '2024-01-01 09:30', '2024-01-03 00:00']),
+            'mixed': [3, 'x', None, 1.5],
+        })
+        self.model = DataFrameTableModel(self.frame)
+
+    def column(self, number):
+        return [self.model.data(self.model.index(row, number)) for row in range(self.model.rowCount())]
+
+    def test_data(self):
+        """Розміри моделі та текст клітинок, зокрема пропусків NaN/NaT."""
+        self.assertEqual((self.model.rowCount(), self.model.columnCount()), (4, 4))
+        self.assertEqual(self.model.headerData(2, Qt.Horizontal), 'datetime')
+        self.assertEqual(self.column(0), ['120.5', 'nan', '30.0', '75.25'])
+        self.assertEqual(self.column(1), ['Шкідливе', 'Добре', 'nan', 'Помірне'])
+        self.assertEqual(self.column(2), ['2024-01-02 10:00:00', 'NaT', '2024-01-01 09:30:00', '2024-01-03 00:00:00'])
+        self.assertIsNone(self.model.data(self.model.index(0, 0), Qt.EditRole))
+
+    def test_sort(self):
+        """Сортування числових, категорійних і змішаних об'єктних стовпців; пропуски — в кінці."""
+        self.model.sort(0, Qt.DescendingOrder)
+        self.assertEqual(self.column(0), ['120.5', '75.25', '30.0', 'nan'])
+        self.model.sort(1)
+        self.assertEqual(self.column(1), ['Добре', 'Помірне', 'Шкідливе', 'nan'])
+        self.model.sort(2)
+        self.assertEqual(self.column(2)[0], '2024-01-01 09:30:00')
+        self.model.sort(3)
+        self.assertEqual(self.column(3), ['1.5', '3', 'x', 'None'])
+
+    def test_set_frame(self):
+        """Нові дані скидають модель і впорядковуються так само, як попередні."""
+        resets = []
+        self.model.modelReset.connect(lambda: resets.append(True))
+        self.model.sort(0)
+        self.model.set_frame(pd.DataFrame({'aqi': [5.0, 1.0, 3.0]}))
+        self.assertEqual(resets, [True])
+        self.assertEqual((self.model.rowCount(), self.model.columnCount()), (3, 1))
+        self.assertEqual(self.column(0), ['1.0', '3.0', '5.0'])
+
+
+class TestTaskRunner(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(2)
+        self.runner = TaskRunner(self.pool)
+        self.results, self.errors = [], []
+
+    def submit(self, name, fn, *args):
+        return self.runner.submit('query', fn, *args, on_result=lambda result: self.results.append((name, result)),
+                                  on_error=lambda message: self.errors.append((name, message)))
+
+    def wait(self):
+        """Завершення всіх задач пулу й доставка їхніх сигналів."""
+        self.assertTrue(self.pool.waitForDone(5000))
+        QCoreApplication.processEvents()
+
+    def test_supersession(self):
+        """Результат лише останньої задачі каналу доходить до колбеків, навіть якщо попередня завершилась пізніше."""
+        release = threading.Event()
+        self.submit('stale', lambda: release.wait(5) and 'stale')
+        self.submit('latest', lambda: 'latest')
+        release.set()
+        self.wait()
+        self.assertEqual(self.results, [('latest', 'latest')])
+
+        # Сигнал задачі, що завершилась до появи новішої, ще в черзі подій і має бути відкинутий
+        self.results.clear()
+        self.submit('queued', lambda: 'queued')
+        self.assertTrue(self.pool.waitForDone(5000))
+        self.submit('newer', lambda: 'newer')
+        self.wait()
+        self.assertEqual(self.results, [('newer', 'newer')])
+        self.assertFalse(self.runner.is_running('query'))
+        self.assertEqual(self.runner._active, {})
+
+    def test_error(self):
+        """Виняток задачі доставляється в on_error з трасуванням, а on_result не викликається."""
+        self.submit('failed', lambda: 1 / 0)
+        self.wait()
+        self.assertEqual(self.results, [])
+        self.assertEqual([name for name, _ in self.errors], ['failed'])
+        self.assertIn('ZeroDivisionError', self.errors[0][1])
+        self.assertFalse(self.runner.is_running('query'))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,126 @@
+import itertools
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+
+class WorkerSignals(QObject):
+    """Сигнали фонової задачі (доставляються в потік графічного інтерфейсу)"""
+    progress = pyqtSignal(int, str, object)
+    result = pyqtSignal(int, object)
+    error = pyqtSignal(int, str)
+    finished = pyqtSignal(int)
+
+
+class Worker(QRunnable):
+    """Фонова задача для QThreadPool, яку можна скасувати до або під час виконання"""
+
+    def __init__(self, task_id, fn, *args, **kwargs):
+        super().__init__()
+        self.task_id = task_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self._cancelled = threading.Event()
+        self.setAutoDelete(False)
+
+    def cancel(self):
+        """Позначка скасування: результат задачі більше не потрібен"""
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def report_progress(self, message, fraction=None):
+        """Передача стану виконання (fraction від 0 до 1 або None, якщо частка невідома)"""
+        if not self.is_cancelled():
+            self.signals.progress.emit(self.task_id, message, fraction)
+
+    def run(self):
+        try:
+            if self.is_cancelled():
+                return
+            try:
+                result = self.fn(*self.args, **self.kwargs)
+            except Exception:
+                self.signals.error.emit(self.task_id, traceback.format_exc())
+                return
+            if not self.is_cancelled():
+                self.signals.result.emit(self.task_id, result)
+        finally:
+            self.signals.finished.emit(self.task_id)
+
+
+class TaskRunner(QObject):
+    """Запуск задач у пулі потоків; нова задача каналу витісняє попередню, ще не завершену"""
+
+    def __init__(self, pool=None, parent=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._ids = itertools.count(1)
+        self._latest = {}
+        self._callbacks = {}
+        # Посилання на всі задачі пулу, доки вони не завершаться
+        self._active = {}
+
+    def submit(self, channel, fn, *args, on_result=None, on_error=None, on_progress=None,
+               with_progress=False, **kwargs):
+        """Запуск fn у фоні; with_progress передає у fn аргумент progress(message, fraction)"""
+        self.cancel(channel)
+        task_id = next(self._ids)
+        if with_progress:
+            kwargs['progress'] = lambda message, fraction=None: worker.report_progress(message, fraction)
+        worker = Worker(task_id, fn, *args, **kwargs)
+        worker.signals.result.connect(self._on_result)
+        worker.signals.error.connect(self._on_error)
+        worker.signals.progress.connect(self._on_progress)
+        worker.signals.finished.connect(self._on_finished)
+        self._active[task_id] = worker
+        self._latest[channel] = worker
+        self._callbacks[task_id] = (channel, on_result, on_error, on_progress)
+        self.pool.start(worker)
+        return worker
+
+    def cancel(self, channel):
+        """Скасування задачі каналу: задача з черги вилучається, результат виконуваної ігнорується"""
+        worker = self._latest.pop(channel, None)
+        if worker is not None:
+            worker.cancel()
+            self._callbacks.pop(worker.task_id, None)
+            if self.pool.tryTake(worker):
+                self._active.pop(worker.task_id, None)
+
+    def is_running(self, channel):
+        return channel in self._latest
+
+    def _finish(self, task_id):
+        """Колбеки завершеної задачі, якщо її ще не витіснено"""
+        entry = self._callbacks.pop(task_id, None)
+        if entry is not None and self._latest.get(entry[0]) is not None \
+                and self._latest[entry[0]].task_id == task_id:
+            del self._latest[entry[0]]
+        return entry
+
+    @pyqtSlot(int, object)
+    def _on_result(self, task_id, result):
+        entry = self._finish(task_id)
+        if entry is not None and entry[1] is not None:
+            entry[1](result)
+
+    @pyqtSlot(int, str)
+    def _on_error(self, task_id, message):
+        entry = self._finish(task_id)
+        if entry is not None and entry[2] is not None:
+            entry[2](message)
+
+    @pyqtSlot(int)
+    def _on_finished(self, task_id):
+        self._active.pop(task_id, None)
+
+    @pyqtSlot(int, str, object)
+    def _on_progress(self, task_id, message, fraction):
+        entry = self._callbacks.get(task_id)
+        if entry is not None and entry[3] is not None:
+            entry[3](message, fraction)
@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+from numpy.lib.format import open_memmap
+from scipy.integrate import DOP853, RK23, RK45
+
+from loranze import lorenz
+
+# Явні методи Рунге — Кутти, стан яких повністю задається (t, y, h_abs), тож продовження з контрольної точки точне
+SOLVERS = {'RK23': RK23, 'RK45': RK45, 'DOP853': DOP853}
+DEFAULT_CHUNK_SIZE = 100_000
+CHECKPOINT_SUFFIX = '.checkpoint.json'
+
+
+class ChunkedLorenz:
+    """Інтегрування на сітці з t_steps точок, що видає шматки (t, стани (3, m)) фіксованого розміру
+
+    Розв'язувач не перезапускається між шматками, а значення в точках сітки беруться з його щільного
+    виводу, як у solve_ivp(t_eval=...); тому пам'ять не залежить від тривалості інтегрування.
+    """
+
+    def __init__(self, initial_state, t_span, t_steps, sigma=10.0, rho=28.0, beta=8.0 / 3.0,
+                 chunk_size=DEFAULT_CHUNK_SIZE, method='RK45', rtol=1e-3, atol=1e-6, checkpoint=None):
+        if method not in SOLVERS:
+            raise ValueError(f"Потокове інтегрування підтримує лише методи {', '.join(SOLVERS)}")
+        t0, t1 = float(t_span[0]), float(t_span[1])
+        if t1 <= t0:
+            raise ValueError("Кінець інтервалу часу має бути більшим за початок")
+        self.settings = {'initial_state': [float(v) for v in initial_state], 't_span': [t0, t1],
+                         't_steps': int(t_steps), 'params': [float(sigma), float(rho), float(beta)],
+                         'method': method, 'rtol': float(rtol), 'atol': float(atol)}
+        self.t_steps = int(t_steps)
+        self.chunk_size = int(chunk_size)
+        # Крок сітки обчислюється так само, як у np.linspace
+        self._grid_step = (t1 - t0) / max(self.t_steps - 1, 1)
+        if checkpoint is None:
+            t, y, h_abs, self.next_index = t0, self.settings['initial_state'], None, 0
+        else:
+            if checkpoint['settings'] != self.settings:
+                raise ValueError("Контрольна точка належить інтегруванню з іншими параметрами")
+            t, y, h_abs = checkpoint['t'], checkpoint['y'], checkpoint['h_abs']
+            self.next_index = checkpoint['next_index']
+        self._solver = self._make_solver(t, y, h_abs)
+        self._interpolant = None
+        self._step_start = None
+
+    def _make_solver(self, t, y, h_abs):
+        t1 = self.settings['t_span'][1]
+        # Перший крок не може виходити за межу інтервалу
+        first_step = None if h_abs is None or t >= t1 else min(h_abs, t1 - t)
+        return SOLVERS[self.settings['method']](
+            lambda t, y: lorenz(t, y, *self.settings['params']), t, np.array(y, dtype=float), t1,
+            rtol=self.settings['rtol'], atol=self.settings['atol'], first_step=first_step)
+
+    def grid(self, indices):
+        """Моменти часу для номерів точок сітки"""
+        t0, t1 = self.settings['t_span']
+        # Остання точка точно дорівнює t1, як у linspace; сітка з однієї точки складається лише з t0
+        if self.t_steps < 2:
+            return indices * self._grid_step + t0
+        return np.where(indices == self.t_steps - 1, t1, indices * self._grid_step + t0)
+
+    def checkpoint(self):
+        """Стан для продовження: якщо поточний крок ще потрібен для наступних точок, його буде повторено"""
+        if self._interpolant is not None:
+            t, y, h_abs = self._step_start
+        else:
+            t, y, h_abs = self._solver.t, self._solver.y, self._solver.h_abs
+        return {'t': float(t), 'y': [float(v) for v in y], 'h_abs': None if h_abs is None else float(h_abs),
+                'next_index': int(self.next_index), 'settings': self.settings}
+
+    def _advance(self):
+        solver = self._solver
+        self._step_start = (solver.t, solver.y.copy(), solver.h_abs)
+        message = solver.step()
+        if solver.status == 'failed':
+            raise RuntimeError(f"Помилка інтегрування при t = {solver.t}: {message}")
+        self._interpolant = solver.dense_output()
+
+    def next_chunk(self):
+        """Наступний шматок (t (m,), стани (3, m)) або None, якщо сітку пройдено"""
+        count = min(self.chunk_size, self.t_steps - self.next_index)
+        if count <= 0:
+            return None
+        t = self.grid(np.arange(self.next_index, self.next_index + count))
+        states = np.empty((3, count))
+        filled = 0
+        while filled < count:
+            if self._interpolant is None:
+                self._advance()
+            take = int(np.searchsorted(t[filled:], self._solver.t, side='right'))
+            if take:
+                states[:, filled:filled + take] = self._interpolant(t[filled:filled + take])
+                filled += take
+            if filled < count:
+                # Крок вичерпано; інакше він може покривати й точки наступного шматка
+                self._interpolant = None
+        self.next_index += count
+        return t, states
+
+    def __iter__(self):
+        while True:
+            chunk = self.next_chunk()
+            if chunk is None:
+                return
+            yield chunk
+
+
+def simulate_lorenz_chunks(initial_state, t_span, t_steps, sigma=10.0, rho=28.0, beta=8.0 / 3.0,
+                           chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """Генератор шматків (t, стани (3, m)); разом вони збігаються з результатом simulate_lorenz"""
+    return iter(ChunkedLorenz(initial_state, t_span, t_steps, sigma, rho, beta, chunk_size, **kwargs))
+
+
+def _save_checkpoint(path, checkpoint):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def simulate_lorenz_to_file(path, initial_state, t_span, t_steps, sigma=10.0, rho=28.0, beta=8.0 / 3.0,
+                            chunk_size=DEFAULT_CHUNK_SIZE, progress=None, **kwargs):
+    """Інтегрування у заздалегідь виділений файл .npy зі станами (3, t_steps)
+
+    Після кожного шматка дані скидаються на диск, а поруч записується контрольна точка, тому перерваний
+    запуск з тими самими параметрами продовжується з останнього шматка. progress(done, total) викликається
+    після кожного шматка. Повертає шлях до файлу; час сітки — np.linspace(*t_span, t_steps).
+    """
+    checkpoint_path = path + CHECKPOINT_SUFFIX
+    checkpoint = None
+    if os.path.exists(checkpoint_path) and os.path.exists(path):
+        with open(checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    simulation = ChunkedLorenz(initial_state, t_span, t_steps, sigma, rho, beta, chunk_size,
+                               checkpoint=checkpoint, **kwargs)
+    if checkpoint is None:
+        out = open_memmap(path, mode='w+', dtype=np.float64, shape=(3, simulation.t_steps))
+        _save_checkpoint(checkpoint_path, simulation.checkpoint())
+    else:
+        out = open_memmap(path, mode='r+')
+        if out.shape != (3, simulation.t_steps):
+            raise ValueError(f"Файл {path} має форму {out.shape} замість {(3, simulation.t_steps)}")
+    try:
+        for _, states in simulation:
+            end = simulation.next_index
+            out[:, end - states.shape[1]:end] = states
+            out.flush()
+            _save_checkpoint(checkpoint_path, simulation.checkpoint())
+            if progress is not None:
+                progress(end, simulation.t_steps)
+    finally:
+        del out
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Тривале інтегрування системи Лоренца у файл .npy')
+    parser.add_argument('output', help='файл станів (3, steps); повторний запуск продовжує інтегрування')
+    parser.add_argument('--state', type=float, nargs=3, default=[1.0, 1.0, 1.0], help='початковий стан')
+    parser.add_argument('--t-end', type=float, default=1000.0, help='кінець інтервалу часу')
+    parser.add_argument('--steps', type=int, default=1_000_000, help='кількість точок сітки')
+    parser.add_argument('--sigma', type=float, default=10.0)
+    parser.add_argument('--rho', type=float, default=28.0)
+    parser.add_argument('--beta', type=float, default=8.0 / 3.0)
+    parser.add_argument('--method', choices=list(SOLVERS), default='RK45')
+    parser.add_argument('--rtol', type=float, default=1e-3)
+    parser.add_argument('--atol', type=float, default=1e-6)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    simulate_lorenz_to_file(args.output, args.state, (0.0, args.t_end), args.steps, args.sigma, args.rho, args.beta,
+                            args.chunk_size, method=args.method, rtol=args.rtol, atol=args.atol,
+                            progress=lambda done, total: print(f"\rТочок: {done}/{total}", end='', flush=True))
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,209 @@
+import numpy as np
+
+# Таблиця Бутчера методу Дорманда — Прінса 5(4) та коефіцієнти щільного виводу (як у scipy RK45)
+_C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1])
+_A = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+]
+_B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84])
+_E = np.array([-71/57600, 0, 71/16695, -71/1920, 17253/339200, -22/525, 1/40])
+_P = np.array([
+    [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+    [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+    [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+    [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+    [0, 40617522/29380423, -110615467/29380423, 69997945/29380423],
+])
+_SAFETY, _MIN_FACTOR, _MAX_FACTOR = 0.9, 0.2, 10.0
+# Крок методу RK4 за замовчуванням
+DEFAULT_RK4_STEP = 0.01
+
+
+def lorenz_batch(states, sigma=10.0, rho=28.0, beta=8.0 / 3.0):
+    """Похідні системи Лоренца для масиву станів (N, 3); параметри — числа або масиви (N,)"""
+    x, y, z = states[:, 0], states[:, 1], states[:, 2]
+    derivatives = np.empty_like(states)
+    derivatives[:, 0] = sigma * (y - x)
+    derivatives[:, 1] = x * (rho - z) - y
+    derivatives[:, 2] = x * y - beta * z
+    return derivatives
+
+
+def lorenz_jacobian_batch(states, sigma=10.0, rho=28.0, beta=8.0 / 3.0):
+    """Матриці Якобі (N, 3, 3) для масиву станів (N, 3)"""
+    n = len(states)
+    x, y, z = states[:, 0], states[:, 1], states[:, 2]
+    jacobian = np.zeros((n, 3, 3))
+    jacobian[:, 0, 0] = -np.broadcast_to(sigma, (n,))
+    jacobian[:, 0, 1] = sigma
+    jacobian[:, 1, 0] = rho - z
+    jacobian[:, 1, 1] = -1.0
+    jacobian[:, 1, 2] = -x
+    jacobian[:, 2, 0] = y
+    jacobian[:, 2, 1] = x
+    jacobian[:, 2, 2] = -np.broadcast_to(beta, (n,))
+    return jacobian
+
+
+def ensemble_parameters(n, sigma=10.0, rho=28.0, beta=8.0 / 3.0):
+    """Параметри кожного члена ансамблю як масиви (N,)"""
+    return tuple(np.broadcast_to(np.asarray(value, dtype=float), (n,)).copy() for value in (sigma, rho, beta))
+
+
+def rk4_step(y, h, params):
+    """Один крок RK4 для масиву станів (N, 3); params — (sigma, rho, beta)"""
+    k1 = lorenz_batch(y, *params)
+    k2 = lorenz_batch(y + (h / 2) * k1, *params)
+    k3 = lorenz_batch(y + (h / 2) * k2, *params)
+    k4 = lorenz_batch(y + h * k3, *params)
+    return y + (h / 6) * (k1 + 2 * k2 + 2 * k3 + k4)
+
+
+def _rms(values, scale):
+    """Середньоквадратична норма кожного рядка values / scale"""
+    return np.sqrt(np.mean((values / scale) ** 2, axis=1))
+
+
+def _initial_step(y0, f0, params, rtol, atol, interval):
+    """Початковий крок для кожного члена ансамблю (алгоритм Хайрера, як у scipy)"""
+    scale = atol + np.abs(y0) * rtol
+    d0, d1 = _rms(y0, scale), _rms(f0, scale)
+    h0 = np.where((d0 < 1e-5) | (d1 < 1e-5), 1e-6, 0.01 * d0 / np.maximum(d1, 1e-300))
+    h0 = np.minimum(h0, interval)
+    f1 = lorenz_batch(y0 + h0[:, None] * f0, *params)
+    d2 = _rms(f1 - f0, scale) / h0
+    small = (d1 <= 1e-15) & (d2 <= 1e-15)
+    h1 = np.where(small, np.maximum(1e-6, h0 * 1e-3), (0.01 / np.maximum(np.maximum(d1, d2), 1e-300)) ** (1 / 5))
+    return np.minimum(np.minimum(100 * h0, h1), interval)
+
+
+def _initial_states(initial_states):
+    """Масив початкових станів (N, 3); нескінченні та NaN значення не допускаються, як у solve_ivp"""
+    y = np.array(initial_states, dtype=float, ndmin=2)
+    if not np.isfinite(y).all():
+        raise ValueError("Початкові стани мають бути скінченними")
+    return y
+
+
+def _time_grid(t_span, t_steps):
+    t0, t1 = float(t_span[0]), float(t_span[1])
+    if t1 <= t0:
+        raise ValueError("Кінець інтервалу часу має бути більшим за початок")
+    return np.linspace(t0, t1, t_steps)
+
+
+def rk4_ensemble(initial_states, t_span, t_steps, sigma=10.0, rho=28.0, beta=8.0 / 3.0, max_step=DEFAULT_RK4_STEP):
+    """Ансамбль траєкторій методом RK4 зі сталим кроком; повертає t (T,) та стани (N, 3, T)"""
+    y = _initial_states(initial_states)
+    params = ensemble_parameters(len(y), sigma, rho, beta)
+    t_eval = _time_grid(t_span, t_steps)
+    out = np.empty((len(y), 3, t_steps))
+    out[:, :, 0] = y
+    if t_steps < 2:
+        return t_eval, out
+    # Між сусідніми точками виводу робиться однакова кількість кроків не довших за max_step
+    substeps = max(1, int(np.ceil((t_eval[1] - t_eval[0]) / max_step - 1e-9)))
+    h = (t_eval[1] - t_eval[0]) / substeps
+    for step in range(1, t_steps):
+        for _ in range(substeps):
+            y = rk4_step(y, h, params)
+        out[:, :, step] = y
+    return t_eval, out
+
+
+def rk45_ensemble(initial_states, t_span, t_steps, sigma=10.0, rho=28.0, beta=8.0 / 3.0,
+                  rtol=1e-3, atol=1e-6, max_step=np.inf):
+    """Ансамбль траєкторій адаптивним методом Дорманда — Прінса 5(4)
+
+    Кожен член ансамблю має власний крок; значення в точках виводу беруться зі щільного виводу,
+    як у solve_ivp(method='RK45', t_eval=...). Повертає t (T,) та стани (N, 3, T).
+    Член ансамблю, для якого похибка чи крок стали нескінченними або крок став меншим за 10 * spacing(t),
+    вибуває: решта його точок виводу заповнюється NaN, а інші члени інтегруються далі.
+    """
+    y = _initial_states(initial_states)
+    n = len(y)
+    params = ensemble_parameters(n, sigma, rho, beta)
+    t_eval = _time_grid(t_span, t_steps)
+    t_end = t_eval[-1]
+    out = np.empty((n, 3, t_steps))
+    out[:, :, 0] = y
+
+    t = np.full(n, t_eval[0])
+    f = lorenz_batch(y, *params)
+    h = np.minimum(_initial_step(y, f, params, rtol, atol, t_end - t_eval[0]), max_step)
+    rejected = np.zeros(n, dtype=bool)
+    next_point = np.ones(n, dtype=np.int64)
+    stages = np.empty((7, n, 3))
+    active = np.flatnonzero(next_point < t_steps)
+    while len(active):
+        yy, tt = y[active], t[active]
+        hh = np.minimum(h[active], t_end - tt)
+        member_params = tuple(p[active] for p in params)
+        k = stages[:, :len(active)]
+        k[0] = f[active]
+        for s in range(1, 6):
+            dy = sum(a * k[j] for j, a in enumerate(_A[s]))
+            k[s] = lorenz_batch(yy + hh[:, None] * dy, *member_params)
+        y_new = yy + hh[:, None] * np.tensordot(_B, k[:6], axes=1)
+        k[6] = lorenz_batch(y_new, *member_params)
+
+        scale = atol + np.maximum(np.abs(yy), np.abs(y_new)) * rtol
+        error = _rms(hh[:, None] * np.tensordot(_E, k, axes=1), scale)
+        accepted = error < 1
+        with np.errstate(divide='ignore'):
+            factor = np.where(error == 0, _MAX_FACTOR, _SAFETY * error ** -0.2)
+        factor = np.where(accepted, np.minimum(_MAX_FACTOR, factor), np.maximum(_MIN_FACTOR, factor))
+        # Після відхиленого кроку наступний крок не збільшується
+        factor = np.where(accepted & rejected[active], np.minimum(factor, 1.0), factor)
+        h[active] = np.minimum(hh * factor, max_step)
+        rejected[active] = ~accepted
+        # Розбіжний член ансамблю інакше відхилявся б нескінченно з кроком NaN або нульовим
+        failed = ~np.isfinite(error) | ~np.isfinite(h[active]) | (~accepted & (h[active] < 10 * np.spacing(tt)))
+        if failed.any():
+            for member in active[failed]:
+                out[member, :, next_point[member]:] = np.nan
+            next_point[active[failed]] = t_steps
+            accepted &= ~failed
+
+        done = active[accepted]
+        if len(done):
+            t_old, h_done, y_old = tt[accepted], hh[accepted], yy[accepted]
+            t_new = np.where(t_end - (t_old + h_done) <= 1e-12 * max(abs(t_end), 1.0), t_end, t_old + h_done)
+            # Щільний вивід: y(t_old + x h) = y_old + h Q (x, x^2, x^3, x^4)
+            q = np.einsum('snd,sp->ndp', k[:, accepted], _P)
+            pending = np.arange(len(done))
+            while True:
+                pending = pending[next_point[done[pending]] < t_steps]
+                pending = pending[t_eval[next_point[done[pending]]] <= t_new[pending]]
+                if not len(pending):
+                    break
+                members = done[pending]
+                x = (t_eval[next_point[members]] - t_old[pending]) / h_done[pending]
+                powers = np.cumprod(np.repeat(x[:, None], 4, axis=1), axis=1)
+                out[members, :, next_point[members]] = y_old[pending] + h_done[pending, None] * \
+                    np.einsum('ndp,np->nd', q[pending], powers)
+                next_point[members] += 1
+            t[done] = t_new
+            y[done] = y_new[accepted]
+            f[done] = k[6, accepted]
+        active = np.flatnonzero(next_point < t_steps)
+    return t_eval, out
+
+
+def simulate_ensemble(initial_states, t_span, t_steps, sigma=10.0, rho=28.0, beta=8.0 / 3.0, method='RK45',
+                      rtol=1e-3, atol=1e-6, max_step=None):
+    """Одночасне інтегрування N початкових станів (N, 3) з параметрами кожного члена ансамблю"""
+    if method == 'RK45':
+        return rk45_ensemble(initial_states, t_span, t_steps, sigma, rho, beta, rtol, atol,
+                             np.inf if max_step is None else max_step)
+    if method == 'RK4':
+        return rk4_ensemble(initial_states, t_span, t_steps, sigma, rho, beta,
+                            DEFAULT_RK4_STEP if max_step is None else max_step)
+    raise ValueError(f"Невідомий метод інтегрування ансамблю: {method}")
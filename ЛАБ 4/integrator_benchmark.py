@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+import scipy
+
+from loranze import solve_lorenz
+
+# Конфігурації інтеграторів: параметри solve_lorenz (допуски адаптивних методів задаються окремо)
+CONFIGS = {
+    'RK45': {'method': 'RK45'},
+    'RK45_vectorized': {'method': 'RK45', 'vectorized': True},
+    'DOP853': {'method': 'DOP853'},
+    'LSODA': {'method': 'LSODA'},
+    'LSODA_jac': {'method': 'LSODA', 'jac': True},
+    'LSODA_vectorized': {'method': 'LSODA', 'vectorized': True},
+    'RK4_0.01': {'method': 'RK4', 'max_step': 0.01},
+    'RK4_0.001': {'method': 'RK4', 'max_step': 0.001},
+}
+HORIZONS = (5.0, 10.0, 20.0, 40.0)
+# Точок сітки на одиницю часу
+SAMPLES_PER_UNIT = 100
+DEFAULT_RTOL, DEFAULT_ATOL = 1e-6, 1e-9
+# Еталонна траєкторія: DOP853 з допусками, близькими до машинної точності
+REFERENCE = {'method': 'DOP853', 'rtol': 1e-13, 'atol': 1e-13}
+DEFAULT_THRESHOLD = 0.25
+# Різниця часу, меншу за цю (с), не вважаємо погіршенням
+MIN_TIME_DELTA = 0.01
+INITIAL_STATE = (1.0, 1.0, 1.0)
+
+
+def reference_trajectory(horizon, initial_state=INITIAL_STATE):
+    """Еталонний розв'язок на сітці найдовшого горизонту; коротші горизонти — його початок"""
+    t_steps = int(round(horizon * SAMPLES_PER_UNIT)) + 1
+    _, sol, _, _ = solve_lorenz(initial_state, (0.0, horizon), t_steps, **REFERENCE)
+    return sol
+
+
+def measure_config(options, horizon, reference, repeat=3, initial_state=INITIAL_STATE):
+    """Найменший час із repeat запусків, кількість обчислень і похибка відносно еталона"""
+    t_steps = int(round(horizon * SAMPLES_PER_UNIT)) + 1
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _, sol, nfev, njev = solve_lorenz(initial_state, (0.0, horizon), t_steps, **options)
+        timings.append(time.perf_counter() - started)
+    error = np.linalg.norm(sol - reference[:, :t_steps], axis=0)
+    return {'seconds': min(timings), 'nfev': int(nfev), 'njev': int(njev),
+            'max_error': float(error.max()), 'final_error': float(error[-1])}
+
+
+def run_benchmarks(horizons=HORIZONS, configs=None, rtol=DEFAULT_RTOL, atol=DEFAULT_ATOL, repeat=3, log=print):
+    """Вимірювання конфігурацій CONFIGS для кожного горизонту; повертає результати для JSON"""
+    reference = reference_trajectory(max(horizons))
+    results = {}
+    for horizon in sorted(horizons):
+        label = f"{horizon:g}"
+        results[label] = {}
+        for name in configs or CONFIGS:
+            options = dict(CONFIGS[name])
+            if options['method'] != 'RK4':
+                options.update(rtol=rtol, atol=atol)
+            entry = measure_config(options, horizon, reference, repeat)
+            results[label][name] = entry
+            if log is not None:
+                log(f"t={label:>5} {name:<18} {entry['seconds']:9.4f} с {entry['nfev']:>9} f "
+                    f"{entry['njev']:>6} J  похибка {entry['max_error']:.2e}")
+    return {'meta': environment(rtol, atol), 'results': results}
+
+
+def environment(rtol, atol):
+    """Версії бібліотек і налаштування, з якими отримано результати"""
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'scipy': scipy.__version__,
+            'machine': platform.machine(), 'system': platform.system(), 'cpus': os.cpu_count(),
+            'rtol': rtol, 'atol': atol, 'samples_per_unit': SAMPLES_PER_UNIT, 'reference': REFERENCE}
+
+
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD, min_delta=MIN_TIME_DELTA):
+    """Перелік погіршень: час, кількість обчислень або похибка більші за базові більш ніж на threshold"""
+    regressions = []
+    for label, configs in current['results'].items():
+        for name, entry in configs.items():
+            base = baseline.get('results', {}).get(label, {}).get(name)
+            if base is None:
+                continue
+            if entry['seconds'] > base['seconds'] * (1 + threshold) and entry['seconds'] - base['seconds'] > min_delta:
+                regressions.append(f"t={label}/{name}: час {entry['seconds']:.4f} с проти {base['seconds']:.4f} с")
+            if entry['nfev'] > base['nfev'] * (1 + threshold):
+                regressions.append(f"t={label}/{name}: обчислень {entry['nfev']} проти {base['nfev']}")
+            if entry['max_error'] > base['max_error'] * (1 + threshold) + 1e-12:
+                regressions.append(f"t={label}/{name}: похибка {entry['max_error']:.2e} проти {base['max_error']:.2e}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Порівняння інтеграторів системи Лоренца: час, обчислення, точність')
+    parser.add_argument('--horizons', type=float, nargs='+', default=list(HORIZONS), help='тривалості інтегрування')
+    parser.add_argument('--configs', nargs='+', choices=list(CONFIGS), help='лише задані конфігурації')
+    parser.add_argument('--rtol', type=float, default=DEFAULT_RTOL, help='відносний допуск адаптивних методів')
+    parser.add_argument('--atol', type=float, default=DEFAULT_ATOL, help='абсолютний допуск адаптивних методів')
+    parser.add_argument('--baseline', default='lorenz_bench_baseline.json', help='файл базових результатів')
+    parser.add_argument('--output', help='файл результатів поточного запуску')
+    parser.add_argument('--update-baseline', action='store_true', help='записати результати як базові')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='допустиме погіршення')
+    parser.add_argument('--repeat', type=int, default=3, help='кількість запусків кожної конфігурації')
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.horizons, args.configs, args.rtol, args.atol, args.repeat)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=1)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    if baseline is not None and (baseline['meta'].get('rtol'), baseline['meta'].get('atol')) != (args.rtol, args.atol):
+        print("Допуски відрізняються від базових; порівняння неможливе")
+        return 2
+    if args.update_baseline or baseline is None:
+        merged = baseline or {'results': {}}
+        merged['meta'] = current['meta']
+        for label, configs in current['results'].items():
+            merged['results'].setdefault(label, {}).update(configs)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(merged, f, ensure_ascii=False, indent=1)
+        print(f"Базові результати записано у {args.baseline}")
+        return 0
+
+    regressions = compare_results(current, baseline, args.threshold)
+    for line in regressions:
+        print('Погіршення:', line)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
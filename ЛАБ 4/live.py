@@ -0,0 +1,221 @@
+import argparse
+import sys
+import threading
+import time
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.animation import FuncAnimation
+
+from ensemble import ensemble_parameters, rk4_step
+
+DEFAULT_CAPACITY = 20_000
+DEFAULT_FPS = 30
+# Найбільша кількість точок сліду, що малюються за кадр
+DEFAULT_MAX_POINTS = 2_000
+# Найбільша кількість кроків за одну ітерацію виробника, щоб не тримати блокування буфера надовго
+_BATCH_STEPS = 500
+
+
+class RingBuffer:
+    """Кільцевий буфер останніх capacity рядків (t, значення) з доступом з кількох потоків
+
+    Старі рядки перезаписуються: споживач, що не встигає, пропускає проміжні значення замість черги.
+    """
+
+    def __init__(self, capacity, width):
+        self.capacity = int(capacity)
+        self._t = np.empty(self.capacity)
+        self._values = np.empty((self.capacity, width))
+        self._lock = threading.Lock()
+        # Загальна кількість записаних рядків (номер наступного рядка)
+        self.total = 0
+
+    def extend(self, t, values):
+        # Рядки, що не вмістилися б у буфер, одразу пропускаються
+        skipped = max(0, len(t) - self.capacity)
+        t, values = np.asarray(t)[skipped:], np.asarray(values)[skipped:]
+        with self._lock:
+            start = (self.total + skipped) % self.capacity
+            first = min(len(t), self.capacity - start)
+            self._t[start:start + first], self._values[start:start + first] = t[:first], values[:first]
+            self._t[:len(t) - first], self._values[:len(t) - first] = t[first:], values[first:]
+            self.total += skipped + len(t)
+
+    def snapshot(self):
+        """Копія вмісту в порядку запису: номери рядків, t (n,), значення (n, width)"""
+        with self._lock:
+            count = min(self.total, self.capacity)
+            start = (self.total - count) % self.capacity
+            order = (start + np.arange(count)) % self.capacity
+            return np.arange(self.total - count, self.total), self._t[order], self._values[order]
+
+
+def decimate(numbers, max_points):
+    """Індекси точок сліду зі зменшенням деталізації до старих точок
+
+    Найновіші точки беруться всі, кожен старший відрізок такої ж кількості точок — з удвічі більшим кроком.
+    Точки вибираються за абсолютними номерами (кратні кроку), тож слід не мерехтить між кадрами.
+    """
+    count = len(numbers)
+    if count <= max_points:
+        return np.arange(count)
+    # Найменша кількість рівнів, за якої відрізки з кроками 1, 2, 4, ... покривають увесь слід
+    levels = 1
+    while (max_points // levels) * (2 ** levels - 1) < count:
+        levels += 1
+    segment = max(1, max_points // levels)
+    chosen, end, stride = [], count, 1
+    while end > 0:
+        start = max(0, end - segment * stride)
+        indices = np.arange(start, end)
+        chosen.append(indices[numbers[indices] % stride == 0])
+        end, stride = start, stride * 2
+    return np.concatenate(chosen[::-1])
+
+
+class LorenzProducer(threading.Thread):
+    """Потік, що інтегрує кілька траєкторій методом RK4 і записує (t, стани) у кільцевий буфер
+
+    speed — одиниць модельного часу за секунду (None — якнайшвидше); швидкість не залежить від відображення.
+    """
+
+    def __init__(self, buffer, initial_states, sigma=10.0, rho=28.0, beta=8.0 / 3.0, dt=0.01, speed=1.0):
+        super().__init__(daemon=True)
+        self.buffer = buffer
+        self.y = np.array(initial_states, dtype=float, ndmin=2)
+        self.params = ensemble_parameters(len(self.y), sigma, rho, beta)
+        self.dt = dt
+        self.speed = speed
+        self.t = 0.0
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        started = time.perf_counter()
+        steps_done = 0
+        while not self._stop_event.is_set():
+            if self.speed is None:
+                steps = _BATCH_STEPS
+            else:
+                target = int((time.perf_counter() - started) * self.speed / self.dt)
+                steps = min(target - steps_done, _BATCH_STEPS)
+                if steps <= 0:
+                    self._stop_event.wait(self.dt / self.speed)
+                    continue
+            t = self.t + self.dt * np.arange(1, steps + 1)
+            rows = np.empty((steps, self.y.size))
+            for i in range(steps):
+                self.y = rk4_step(self.y, self.dt, self.params)
+                rows[i] = self.y.ravel()
+            self.t = t[-1]
+            steps_done += steps
+            self.buffer.extend(t, rows)
+            if self.speed is None:
+                time.sleep(0)  # Звільняє GIL для потоку відображення
+
+
+class LiveLorenzView:
+    """Відображення в реальному часі: слід траєкторій у 3D і відстань між ними
+
+    Кожен кадр бере лише поточний вміст буфера, тому повільне відображення пропускає кадри, а не накопичує їх.
+    """
+
+    def __init__(self, buffer, fps=DEFAULT_FPS, max_points=DEFAULT_MAX_POINTS):
+        self.buffer = buffer
+        self.fps = fps
+        self.max_points = max_points
+        self.frames = 0
+        self.started = None
+        self.figure = plt.figure(figsize=(14, 6))
+        self.ax3d = self.figure.add_subplot(121, projection='3d')
+        self.ax_deviation = self.figure.add_subplot(122)
+        colors = ('blue', 'red')
+        self.trails = [self.ax3d.plot([], [], [], color=colors[i % 2], lw=0.8, label=f"Траєкторія {i + 1}")[0]
+                       for i in range(2)]
+        self.heads = [self.ax3d.plot([], [], [], 'o', color=colors[i % 2])[0] for i in range(2)]
+        self.deviation, = self.ax_deviation.plot([], [])
+        self.ax3d.set_xlim(-25, 25)
+        self.ax3d.set_ylim(-30, 30)
+        self.ax3d.set_zlim(0, 55)
+        self.ax3d.set_xlabel("X")
+        self.ax3d.set_ylabel("Y")
+        self.ax3d.set_zlabel("Z")
+        self.ax3d.set_title("Атрактор Лоренца")
+        self.ax3d.legend()
+        self.ax_deviation.set_xlabel('Час')
+        self.ax_deviation.set_ylabel('Відстань між траєкторіями')
+        self.ax_deviation.set_yscale('log')
+        self.ax_deviation.grid(True)
+        self.animation = None
+
+    @property
+    def dropped_frames(self):
+        """Кадри, пропущені через повільне відображення, відносно заданої частоти"""
+        if self.started is None:
+            return 0
+        return max(0, int((time.perf_counter() - self.started) * self.fps) - self.frames)
+
+    def update(self, _frame=None):
+        if self.started is None:
+            self.started = time.perf_counter()
+        self.frames += 1
+        numbers, t, values = self.buffer.snapshot()
+        if not len(t):
+            return []
+        keep = decimate(numbers, self.max_points)
+        states = values.reshape(len(values), -1, 3)
+        for trail, head, index in zip(self.trails, self.heads, range(states.shape[1])):
+            trail.set_data_3d(*states[keep, index].T)
+            head.set_data_3d(*states[-1:, index].T)
+        if states.shape[1] > 1:
+            distance = np.linalg.norm(states[keep, 0] - states[keep, 1], axis=1)
+            self.deviation.set_data(t[keep], np.maximum(distance, 1e-12))
+            self.ax_deviation.set_xlim(t[0], max(t[-1], t[0] + 1e-9))
+            self.ax_deviation.set_ylim(max(distance.min(), 1e-12) / 2, max(distance.max(), 1e-9) * 2)
+        return self.trails + self.heads + [self.deviation]
+
+    def start(self):
+        # Без кешу кадрів: кожен кадр будується з поточного вмісту буфера
+        self.animation = FuncAnimation(self.figure, self.update, interval=1000 / self.fps, blit=False,
+                                       cache_frame_data=False)
+        return self.animation
+
+
+def run_live(initial_state1=(1.0, 1.0, 1.0), initial_state2=(1.001, 1.0, 1.0), sigma=10.0, rho=28.0,
+             beta=8.0 / 3.0, dt=0.01, speed=1.0, capacity=DEFAULT_CAPACITY, fps=DEFAULT_FPS,
+             max_points=DEFAULT_MAX_POINTS):
+    """Запуск виробника й вікна відображення; повертається після закриття вікна"""
+    buffer = RingBuffer(capacity, 6)
+    producer = LorenzProducer(buffer, [initial_state1, initial_state2], sigma, rho, beta, dt, speed)
+    view = LiveLorenzView(buffer, fps, max_points)
+    producer.start()
+    view.start()
+    try:
+        plt.show()
+    finally:
+        producer.stop()
+        producer.join()
+    return view
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Система Лоренца в реальному часі')
+    parser.add_argument('--speed', type=float, default=1.0, help='одиниць модельного часу за секунду (0 — без обмеження)')
+    parser.add_argument('--dt', type=float, default=0.01, help='крок RK4')
+    parser.add_argument('--fps', type=float, default=DEFAULT_FPS, help='частота кадрів')
+    parser.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY, help='довжина сліду в кроках')
+    parser.add_argument('--max-points', type=int, default=DEFAULT_MAX_POINTS, help='точок сліду на кадр')
+    parser.add_argument('--rho', type=float, default=28.0)
+    args = parser.parse_args(argv)
+
+    view = run_live(rho=args.rho, dt=args.dt, speed=args.speed or None, capacity=args.capacity, fps=args.fps,
+                    max_points=args.max_points)
+    print(f"Кадрів: {view.frames}, пропущено: {view.dropped_frames}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy.integrate import solve_ivp
 
+from ensemble import DEFAULT_RK4_STEP, rk4_ensemble
+
 
 def lorenz(t, state, sigma=10.0, rho=28.0, beta=8.0 / 3.0):
     x, y, z = state
@@ -12,11 +14,60 @@ def lorenz(t, state, sigma=10.0, rho=28.0, beta=8.0 / 3.0):
     return [dx_dt, dy_dt, dz_dt]
 
 
-def simulate_lorenz(initial_state, t_span, t_steps):
-
+def lorenz_jacobian(t, state, sigma=10.0, rho=28.0, beta=8.0 / 3.0):
+    x, y, z = state
+    # Матриця Якобі правої частини (у форматі параметра jac функції solve_ivp)
+    return np.array([
+        [-sigma, sigma, 0.0],
+        [rho - z, -1.0, -x],
+        [y, x, -beta],
+    ])
+
+
+# Методи solve_ivp, для яких аналітична матриця Якобі має сенс (явні методи її не використовують)
+IMPLICIT_METHODS = ('LSODA', 'Radau', 'BDF')
+
+
+def solve_lorenz(initial_state, t_span, t_steps, sigma=10.0, rho=28.0, beta=8.0 / 3.0, method='RK45',
+                 rtol=1e-3, atol=1e-6, jac=False, vectorized=False, max_step=None):
+    """Інтегрування з вибором методу; повертає t, розв'язок (3, T) та кількість обчислень правої частини й Якобі
+
+    method — метод solve_ivp або 'RK4' (сталий крок max_step, за замовчуванням 0.01); jac=True передає
+    аналітичну матрицю Якобі lorenz_jacobian, vectorized=True обчислює праву частину для кількох станів одразу.
+    """
+    if method == 'RK4':
+        step = DEFAULT_RK4_STEP if max_step is None else max_step
+        t, sol = rk4_ensemble([initial_state], t_span, t_steps, sigma, rho, beta, step)
+        substeps = max(1, int(np.ceil((t[1] - t[0]) / step - 1e-9))) if t_steps > 1 else 0
+        return t, sol[0], 4 * substeps * (t_steps - 1), 0
     t_eval = np.linspace(t_span[0], t_span[1], t_steps)
-    sol = solve_ivp(lorenz, t_span, initial_state, t_eval=t_eval, method='RK45')
-    return sol.t, sol.y
+    options = {'rtol': rtol, 'atol': atol, 'vectorized': vectorized}
+    if jac and method in IMPLICIT_METHODS:
+        options['jac'] = lorenz_jacobian
+    if max_step is not None:
+        options['max_step'] = max_step
+    sol = solve_ivp(lorenz, t_span, initial_state, t_eval=t_eval, method=method, args=(sigma, rho, beta), **options)
+    if not sol.success:
+        raise RuntimeError(f"Помилка інтегрування методом {method}: {sol.message}")
+    return sol.t, sol.y, sol.nfev, sol.njev
+
+
+def simulate_lorenz(initial_state, t_span, t_steps, sigma=10.0, rho=28.0, beta=8.0 / 3.0, method='RK45',
+                    rtol=1e-3, atol=1e-6, jac=False, vectorized=False, max_step=None, cache=None):
+    """Траєкторія на сітці np.linspace(*t_span, t_steps): t (T,) та розв'язок (3, T)
+
+    cache — TrajectoryCache (trajectory_cache.py), з якого береться збережений результат або його початок.
+    """
+    options = {'sigma': sigma, 'rho': rho, 'beta': beta, 'method': method, 'rtol': rtol, 'atol': atol,
+               'jac': jac, 'vectorized': vectorized, 'max_step': max_step}
+    if cache is not None:
+        cached = cache.get(initial_state, t_span, t_steps, **options)
+        if cached is not None:
+            return cached
+    t, sol, _, _ = solve_lorenz(initial_state, t_span, t_steps, **options)
+    if cache is not None:
+        cache.put(initial_state, t_span, t_steps, sol, **options)
+    return t, sol
 
 
 def plot_lorenz(sol1, sol2=None):
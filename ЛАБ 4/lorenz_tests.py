@@ -1,6 +1,28 @@
+import json
+import os
+import shutil
+import tempfile
+import time
 import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+import matplotlib.pyplot as plt
 import numpy as np
-from lorenz import lorenz, simulate_lorenz
+from scipy.integrate import solve_ivp
+
+from chunked import CHECKPOINT_SUFFIX, simulate_lorenz_chunks, simulate_lorenz_to_file
+from ensemble import lorenz_batch, lorenz_jacobian_batch, simulate_ensemble
+from integrator_benchmark import compare_results, main as benchmark_main, run_benchmarks
+from live import LiveLorenzView, LorenzProducer, RingBuffer, decimate
+from loranze import lorenz, lorenz_jacobian, simulate_lorenz, solve_lorenz
+from lyapunov import lyapunov_exponents, tangent_rhs
+from sweep import load_sweep, run_sweep
+from trajectory_cache import TrajectoryCache
+
+# Однакові траєкторії в різних тестах обчислюються один раз
+CACHE = TrajectoryCache()
+
 
 class TestLorenzAttractor(unittest.TestCase):
     def test_lorenz_function(self):
@@ -29,7 +51,7 @@ class TestLorenzAttractor(unittest.TestCase):
         initial_state = [1.0, 1.0, 1.0]
         t_span = (0, 10)
         t_steps = 1000
-        t, sol = simulate_lorenz(initial_state, t_span, t_steps)
+        t, sol = simulate_lorenz(initial_state, t_span, t_steps, cache=CACHE)
         self.assertEqual(t.shape, (t_steps,))
         self.assertEqual(sol.shape, (3, t_steps))
 
@@ -38,7 +60,7 @@ class TestLorenzAttractor(unittest.TestCase):
         initial_state = [1.0, 1.0, 1.0]
         t_span = (0, 10)
         t_steps = 1000
-        t, _ = simulate_lorenz(initial_state, t_span, t_steps)
+        t, _ = simulate_lorenz(initial_state, t_span, t_steps, cache=CACHE)
         expected_t = np.linspace(t_span[0], t_span[1], t_steps)
         np.testing.assert_array_almost_equal(t, expected_t, decimal=6)
 
@@ -48,10 +70,278 @@ class TestLorenzAttractor(unittest.TestCase):
         initial_state2 = [1.001, 1.0, 1.0]
         t_span = (0, 10)
         t_steps = 1000
-        _, sol1 = simulate_lorenz(initial_state1, t_span, t_steps)
-        _, sol2 = simulate_lorenz(initial_state2, t_span, t_steps)
+        _, sol1 = simulate_lorenz(initial_state1, t_span, t_steps, cache=CACHE)
+        _, sol2 = simulate_lorenz(initial_state2, t_span, t_steps, cache=CACHE)
         # Перевірка, що рішення різні
         self.assertFalse(np.array_equal(sol1, sol2))
 
+class TestEnsemble(unittest.TestCase):
+    def setUp(self):
+        self.states = np.array([[1.0, 1.0, 1.0], [1.001, 1.0, 1.0], [-3.0, 2.0, 20.0]])
+
+    def test_lorenz_batch(self):
+        """Похідні ансамблю збігаються з функцією lorenz для кожного члена."""
+        rho = np.array([28.0, 15.0, 99.0])
+        result = lorenz_batch(self.states, 10.0, rho, 8.0 / 3.0)
+        for i in range(3):
+            np.testing.assert_array_almost_equal(result[i], lorenz(0, self.states[i], 10.0, rho[i]))
+
+    def test_rk45_matches_solve_ivp(self):
+        """Адаптивний метод дає ті самі значення, що й solve_ivp з тими самими допусками."""
+        t, states = simulate_ensemble(self.states, (0, 2), 201, rho=[28.0, 28.0, 15.0], rtol=1e-10, atol=1e-12)
+        self.assertEqual(states.shape, (3, 3, 201))
+        for i, rho in enumerate([28.0, 28.0, 15.0]):
+            reference = solve_ivp(lorenz, (0, 2), self.states[i], t_eval=t, args=(10.0, rho, 8.0 / 3.0),
+                                  rtol=1e-10, atol=1e-12)
+            np.testing.assert_allclose(states[i], reference.y, atol=1e-9)
+
+    def test_rk4(self):
+        """Метод зі сталим кроком збігається з точним розв'язком на короткому інтервалі."""
+        t, states = simulate_ensemble(self.states, (0, 1), 101, method='RK4', max_step=0.001)
+        reference = solve_ivp(lorenz, (0, 1), self.states[2], t_eval=t, method='DOP853', rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(states[2], reference.y, atol=1e-6)
+
+    def test_divergent_member(self):
+        """NaN у початкових станах відхиляється, а розбіжний член вибуває, не зупиняючи решту ансамблю."""
+        with self.assertRaises(ValueError):
+            simulate_ensemble([[np.nan, 1.0, 1.0], [1.0, 1.0, 1.0]], (0, 1), 11)
+        with np.errstate(over='ignore', invalid='ignore'):
+            _, states = simulate_ensemble([[1e200, 1.0, 1.0], [1.0, 1.0, 1.0]], (0, 1), 11)
+        self.assertTrue(np.isnan(states[0, :, 1:]).all())
+        _, single = simulate_ensemble([[1.0, 1.0, 1.0]], (0, 1), 11)
+        np.testing.assert_allclose(states[1], single[0], rtol=1e-12)
+
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_simulate_lorenz_parameters(self):
+        """Параметри передаються в simulate_lorenz: при rho < 1 траєкторія згасає до нуля."""
+        _, sol = simulate_lorenz([1.0, 1.0, 1.0], (0, 20), 100, rho=0.5)
+        np.testing.assert_array_almost_equal(sol[:, -1], [0.0, 0.0, 0.0], decimal=3)
+
+    def test_sweep_resume(self):
+        """Перебір записує шматки, продовжується після переривання й дає підсумки за сіткою."""
+        options = dict(sigma=10.0, rho=[0.5, 10.0, 28.0, 99.96], beta=[8.0 / 3.0, 1.0], t_transient=20.0,
+                       t_record=20.0, chunk_size=3, workers=2)
+        summary = run_sweep(self.tmp_dir, **options)
+        self.assertEqual((summary['points'], summary['chunks'], summary['computed']), (8, 3, 3))
+        first = load_sweep(self.tmp_dir)
+        os.remove(os.path.join(self.tmp_dir, 'chunk_000001.npz'))
+        self.assertEqual(run_sweep(self.tmp_dir, **options)['computed'], 1)
+        result = load_sweep(self.tmp_dir)
+        np.testing.assert_array_equal(result['maxima_count'], first['maxima_count'])
+        self.assertEqual(result['maxima'].shape, (1, 4, 2, 64))
+        # rho < 1: збіжність до початку координат; rho = 10: до C+ або C-; rho = 28: хаос
+        self.assertTrue(result['converged'][0, 0, 0])
+        self.assertEqual(result['fixed_point'][0, 0, 0], 0)
+        self.assertTrue(result['converged'][0, 1, 0])
+        self.assertIn(result['fixed_point'][0, 1, 0], (1, 2))
+        self.assertFalse(result['converged'][0, 2, 0])
+        self.assertGreater(result['maxima_count'][0, 2, 0], 10)
+        maxima = result['maxima'][0, 2, 0]
+        self.assertTrue(np.all(maxima[~np.isnan(maxima)] <= result['bounds'][0, 2, 0, 5] + 1e-6))
+        with self.assertRaises(ValueError):
+            run_sweep(self.tmp_dir, **dict(options, rho=[1.0]))
+
+
+class TestLyapunov(unittest.TestCase):
+    def test_jacobian(self):
+        """Аналітична матриця Якобі збігається з різницевою похідною та з пакетною версією."""
+        state = np.array([1.5, -2.0, 20.0])
+        eps = 1e-6
+        numeric = np.column_stack([(np.array(lorenz(0, state + eps * e)) - np.array(lorenz(0, state - eps * e)))
+                                   / (2 * eps) for e in np.eye(3)])
+        np.testing.assert_array_almost_equal(lorenz_jacobian(0, state), numeric, decimal=6)
+        np.testing.assert_array_almost_equal(lorenz_jacobian_batch(state[None])[0], numeric, decimal=6)
+        packed = np.concatenate([state[None, :, None], np.eye(3)[None]], axis=2)
+        params = tuple(np.array([v]) for v in (10.0, 28.0, 8.0 / 3.0))
+        np.testing.assert_array_almost_equal(tangent_rhs(packed, *params)[0, :, 1:], numeric, decimal=6)
+
+    def test_exponents(self):
+        """Класичні параметри: λ1 ≈ 0.9, λ2 ≈ 0, сума дорівнює сліду Якобі; при rho = 10 хаосу немає."""
+        result = lyapunov_exponents([[1.0, 1.0, 1.0], [1.0, 1.0, 1.0]], rho=[28.0, 10.0], n_exponents=3,
+                                    tol=1e-2, max_time=300.0)
+        exponents = result['exponents']
+        self.assertAlmostEqual(exponents[0, 0], 0.906, delta=0.1)
+        self.assertAlmostEqual(exponents[0, 1], 0.0, delta=0.05)
+        np.testing.assert_allclose(exponents.sum(axis=1), -(10.0 + 1.0 + 8.0 / 3.0), atol=1e-2)
+        self.assertLess(exponents[1, 0], 0)
+        self.assertTrue(result['converged'].all())
+        self.assertTrue(np.all(result['time'] < 300.0))
+
+
+class TestChunked(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_chunks_match_simulate_lorenz(self):
+        """Шматки разом збігаються з результатом simulate_lorenz на тій самій сітці."""
+        t, sol = simulate_lorenz([1.0, 1.0, 1.0], (0, 20), 2001, cache=CACHE)
+        chunks = list(simulate_lorenz_chunks([1.0, 1.0, 1.0], (0, 20), 2001, chunk_size=37))
+        self.assertTrue(all(len(chunk_t) == 37 for chunk_t, _ in chunks[:-1]))
+        np.testing.assert_array_equal(np.concatenate([chunk_t for chunk_t, _ in chunks]), t)
+        np.testing.assert_allclose(np.concatenate([states for _, states in chunks], axis=1), sol, atol=1e-10)
+
+    def test_single_point(self):
+        """Сітка з однієї точки містить лише t0 і початковий стан, як linspace."""
+        chunks = list(simulate_lorenz_chunks([1.0, 1.0, 1.0], (0, 1), 1))
+        np.testing.assert_array_equal(np.concatenate([chunk_t for chunk_t, _ in chunks]), [0.0])
+        np.testing.assert_array_equal(np.concatenate([states for _, states in chunks], axis=1), [[1.0], [1.0], [1.0]])
+
+    def test_file_resume(self):
+        """Перерваний запис у файл продовжується з контрольної точки й дає той самий результат."""
+        path = os.path.join(self.tmp_dir, 'run.npy')
+        _, sol = simulate_lorenz([1.0, 1.0, 1.0], (0, 20), 2001, cache=CACHE)
+
+        def interrupt(done, total):
+            if done >= 600:
+                raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            simulate_lorenz_to_file(path, [1.0, 1.0, 1.0], (0, 20), 2001, chunk_size=250, progress=interrupt)
+        done = []
+        simulate_lorenz_to_file(path, [1.0, 1.0, 1.0], (0, 20), 2001, chunk_size=250,
+                                progress=lambda d, total: done.append(d))
+        self.assertEqual(done[0], 1000)
+        np.testing.assert_allclose(np.load(path), sol, atol=1e-10)
+        self.assertTrue(os.path.exists(path + CHECKPOINT_SUFFIX))
+        with self.assertRaises(ValueError):
+            simulate_lorenz_to_file(path, [1.0, 1.0, 1.0], (0, 20), 2001, rho=10.0, chunk_size=250)
+
+
+class TestIntegrators(unittest.TestCase):
+    def test_methods_agree(self):
+        """Усі методи на короткому інтервалі дають ту саму траєкторію в межах допусків."""
+        _, reference = simulate_lorenz([1.0, 1.0, 1.0], (0, 2), 201, method='DOP853', rtol=1e-12, atol=1e-12)
+        for options in ({'method': 'RK45'}, {'method': 'LSODA', 'jac': True}, {'method': 'RK45', 'vectorized': True},
+                        {'method': 'RK4', 'max_step': 0.001}):
+            _, sol = simulate_lorenz([1.0, 1.0, 1.0], (0, 2), 201, rtol=1e-8, atol=1e-10, **options)
+            np.testing.assert_allclose(sol, reference, atol=1e-4, err_msg=str(options))
+
+    def test_evaluation_counts(self):
+        """Кількість обчислень правої частини: для RK4 — чотири на кожен крок."""
+        _, _, nfev, njev = solve_lorenz([1.0, 1.0, 1.0], (0, 1), 11, method='RK4', max_step=0.05)
+        self.assertEqual((nfev, njev), (4 * 20, 0))
+        _, _, nfev, _ = solve_lorenz([1.0, 1.0, 1.0], (0, 1), 11)
+        self.assertGreater(nfev, 0)
+
+    def test_benchmark(self):
+        """Вимірювання інтеграторів і порівняння з базовими результатами."""
+        current = run_benchmarks((1.0, 2.0), ['RK45', 'RK4_0.01'], repeat=1, log=None)
+        self.assertEqual(set(current['results']), {'1', '2'})
+        entry = current['results']['2']['RK45']
+        self.assertLess(entry['max_error'], 1e-3)
+        self.assertEqual(compare_results(current, current), [])
+        baseline = json.loads(json.dumps(current))
+        baseline['results']['2']['RK45'].update(seconds=entry['seconds'] / 10 - 1, nfev=entry['nfev'] // 2)
+        self.assertEqual(len(compare_results(current, baseline)), 2)
+
+    def test_baseline_tolerances(self):
+        """Базові результати з іншим абсолютним допуском не порівнюються з поточними."""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        path = os.path.join(tmp_dir, 'baseline.json')
+        args = ['--horizons', '1', '--configs', 'RK45', '--repeat', '1', '--baseline', path]
+        with redirect_stdout(StringIO()):
+            self.assertEqual(benchmark_main(args + ['--atol', '1e-8']), 0)
+            self.assertEqual(benchmark_main(args + ['--atol', '1e-10']), 2)
+
+
+class TestTrajectoryCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_memory_and_prefix(self):
+        """Повторний запит береться з пам'яті, коротший інтервал на тій самій сітці — з початку траєкторії."""
+        cache = TrajectoryCache()
+        t, sol = simulate_lorenz([1.0, 1.0, 1.0], (0, 10), 1001, cache=cache)
+        t2, sol2 = simulate_lorenz([1.0, 1.0, 1.0], (0, 10), 1001, cache=cache)
+        np.testing.assert_array_equal(sol2, sol)
+        t3, sol3 = simulate_lorenz([1.0, 1.0, 1.0], (0, 5), 501, cache=cache)
+        np.testing.assert_array_equal(sol3, sol[:, :501])
+        np.testing.assert_array_equal(t3, np.linspace(0, 5, 501))
+        self.assertEqual(cache.stats, {'memory_hits': 2, 'disk_hits': 0, 'misses': 1})
+        # Інші параметри, метод або сітка — окремі записи
+        simulate_lorenz([1.0, 1.0, 1.0], (0, 5), 1001, cache=cache)
+        simulate_lorenz([1.0, 1.0, 1.0], (0, 10), 1001, rho=10.0, cache=cache)
+        self.assertEqual(cache.stats['misses'], 3)
+        # Отримана копія не змінює збережене
+        sol2[:] = 0
+        np.testing.assert_array_equal(simulate_lorenz([1.0, 1.0, 1.0], (0, 10), 1001, cache=cache)[1], sol)
+
+    def test_disk_tier_and_eviction(self):
+        """Дисковий рівень переживає новий екземпляр кешу й обмежений за розміром."""
+        cache = TrajectoryCache(self.tmp_dir, memory_limit=0)
+        _, sol = simulate_lorenz([1.0, 1.0, 1.0], (0, 10), 1001, cache=cache)
+        fresh = TrajectoryCache(self.tmp_dir)
+        _, sol2 = simulate_lorenz([1.0, 1.0, 1.0], (0, 2), 201, cache=fresh)
+        np.testing.assert_array_equal(sol2, sol[:, :201])
+        self.assertEqual(fresh.stats['disk_hits'], 1)
+
+        small = TrajectoryCache(self.tmp_dir, memory_limit=0, disk_limit=2 * sol.nbytes + 1000)
+        for rho in (20.0, 21.0, 22.0):
+            simulate_lorenz([1.0, 1.0, 1.0], (0, 10), 1001, rho=rho, cache=small)
+        files = [name for name in os.listdir(self.tmp_dir) if name.endswith('.npy')]
+        self.assertEqual(len(files), 2)
+        self.assertIsNotNone(small.get([1.0, 1.0, 1.0], (0, 10), 1001, rho=22.0))
+        self.assertIsNone(small.get([1.0, 1.0, 1.0], (0, 10), 1001))
+
+
+class TestLive(unittest.TestCase):
+    def test_ring_buffer(self):
+        """Кільцевий буфер зберігає останні рядки в порядку запису й перезаписує старі."""
+        buffer = RingBuffer(10, 2)
+        buffer.extend(np.arange(7.0), np.zeros((7, 2)))
+        buffer.extend(np.arange(7.0, 15.0), np.ones((8, 2)))
+        numbers, t, values = buffer.snapshot()
+        np.testing.assert_array_equal(numbers, np.arange(5, 15))
+        np.testing.assert_array_equal(t, np.arange(5.0, 15.0))
+        self.assertEqual(values[:2].sum(), 0)
+        buffer.extend(np.arange(15.0, 40.0), np.zeros((25, 2)))
+        np.testing.assert_array_equal(buffer.snapshot()[1], np.arange(30.0, 40.0))
+        self.assertEqual(buffer.total, 40)
+
+    def test_decimate(self):
+        """Проріджування обмежує кількість точок, зберігає найновіші та стабільне між кадрами."""
+        numbers = np.arange(500, 50500)
+        keep = decimate(numbers, 1000)
+        self.assertLessEqual(len(keep), 1000)
+        self.assertTrue(np.all(np.diff(keep) > 0))
+        np.testing.assert_array_equal(keep[-50:], np.arange(len(numbers) - 50, len(numbers)))
+        # Після зсуву вікна на один рядок старі точки залишаються тими самими
+        shifted = decimate(numbers + 1, 1000)
+        common = np.intersect1d(numbers[keep], numbers[shifted] + 1)
+        self.assertGreater(len(common), 0.9 * len(keep))
+
+    def test_producer_and_view(self):
+        """Виробник рахує у власному темпі, а кадр будується з поточного вмісту буфера."""
+        buffer = RingBuffer(1000, 6)
+        producer = LorenzProducer(buffer, [[1.0, 1.0, 1.0], [1.001, 1.0, 1.0]], speed=None)
+        producer.start()
+        time.sleep(0.3)
+        producer.stop()
+        producer.join()
+        self.assertGreater(buffer.total, 1000)
+        numbers, t, values = buffer.snapshot()
+        np.testing.assert_allclose(np.diff(t), 0.01)
+        view = LiveLorenzView(buffer, max_points=200)
+        artists = view.update()
+        self.assertEqual(len(artists), 5)
+        self.assertLessEqual(len(view.trails[0].get_data_3d()[0]), 200)
+        self.assertEqual(view.frames, 1)
+        plt.close(view.figure)
+
+
 if __name__ == '__main__':
     unittest.main()
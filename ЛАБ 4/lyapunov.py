@@ -0,0 +1,92 @@
+import numpy as np
+
+from ensemble import ensemble_parameters, lorenz_batch, lorenz_jacobian_batch, rk4_step
+
+
+def tangent_rhs(packed, sigma, rho, beta):
+    """Права частина системи разом із рівняннями у варіаціях
+
+    packed (N, 3, 1 + k): стовпець 0 — стан, решта — дотичні вектори, для яких dv/dt = J(y) v
+    з аналітичною матрицею Якобі lorenz_jacobian_batch.
+    """
+    states = packed[:, :, 0]
+    derivatives = np.empty_like(packed)
+    derivatives[:, :, 0] = lorenz_batch(states, sigma, rho, beta)
+    np.matmul(lorenz_jacobian_batch(states, sigma, rho, beta), packed[:, :, 1:], out=derivatives[:, :, 1:])
+    return derivatives
+
+
+def _tangent_rk4_step(packed, h, params):
+    """Крок RK4 для стану й дотичних векторів"""
+    k1 = tangent_rhs(packed, *params)
+    k2 = tangent_rhs(packed + (h / 2) * k1, *params)
+    k3 = tangent_rhs(packed + (h / 2) * k2, *params)
+    k4 = tangent_rhs(packed + h * k3, *params)
+    return packed + (h / 6) * (k1 + 2 * k2 + 2 * k3 + k4)
+
+
+def lyapunov_exponents(initial_states, sigma=10.0, rho=28.0, beta=8.0 / 3.0, n_exponents=1, dt=0.01,
+                       renormalize_every=10, t_transient=10.0, check_interval=20.0, tol=5e-3, patience=3,
+                       max_time=2000.0):
+    """Оцінка показників Ляпунова для ансамблю початкових станів (N, 3) і параметрів кожного члена
+
+    Дотичні вектори інтегруються рівняннями у варіаціях з аналітичною матрицею Якобі та
+    кожні renormalize_every кроків ортонормуються QR-розкладом. Член ансамблю зупиняється, коли
+    оцінки змінюються менше ніж на tol протягом patience перевірок поспіль (через check_interval
+    одиниць часу), або після max_time.
+
+    Повертає словник: exponents (N, n_exponents), time (N,) — тривалість усереднення, converged (N,).
+    """
+    if not 1 <= n_exponents <= 3:
+        raise ValueError("Кількість показників має бути від 1 до 3")
+    y = np.array(initial_states, dtype=float, ndmin=2)
+    n = len(y)
+    params = ensemble_parameters(n, sigma, rho, beta)
+    # Перехідний процес: траєкторія виходить на атрактор
+    for _ in range(int(round(t_transient / dt))):
+        y = rk4_step(y, dt, params)
+
+    v = np.tile(np.eye(3)[:, :n_exponents], (n, 1, 1))
+    log_sums = np.zeros((n, n_exponents))
+    elapsed = np.zeros(n)
+    previous = np.full((n, n_exponents), np.nan)
+    stable_checks = np.zeros(n, dtype=np.int64)
+    converged = np.zeros(n, dtype=bool)
+    exponents = np.full((n, n_exponents), np.nan)
+
+    interval = dt * renormalize_every
+    checks_every = max(1, int(round(check_interval / interval)))
+    active = np.arange(n)
+    block = 0
+    while len(active) and block * interval < max_time:
+        member_params = tuple(p[active] for p in params)
+        packed = np.concatenate([y[active, :, None], v[active]], axis=2)
+        for _ in range(renormalize_every):
+            packed = _tangent_rk4_step(packed, dt, member_params)
+        ya, va = packed[:, :, 0], packed[:, :, 1:]
+        # Ортонормування: діагональ R містить розтяг кожного напрямку за інтервал
+        q, r = np.linalg.qr(va)
+        diagonal = np.diagonal(r, axis1=1, axis2=2)
+        signs = np.where(diagonal < 0, -1.0, 1.0)
+        log_sums[active] += np.log(np.abs(diagonal))
+        y[active], v[active] = ya, q * signs[:, None, :]
+        elapsed[active] += interval
+        block += 1
+
+        if block % checks_every == 0:
+            estimate = log_sums[active] / elapsed[active, None]
+            change = np.max(np.abs(estimate - previous[active]), axis=1)
+            stable_checks[active] = np.where(change < tol, stable_checks[active] + 1, 0)
+            previous[active] = estimate
+            finished = stable_checks[active] >= patience
+            converged[active[finished]] = True
+            exponents[active[finished]] = estimate[finished]
+            active = active[~finished]
+
+    exponents[active] = log_sums[active] / np.maximum(elapsed[active, None], interval)
+    return {'exponents': exponents, 'time': elapsed, 'converged': converged}
+
+
+def largest_lyapunov_exponent(initial_states, sigma=10.0, rho=28.0, beta=8.0 / 3.0, **kwargs):
+    """Найбільший показник Ляпунова для кожного члена ансамблю (N,)"""
+    return lyapunov_exponents(initial_states, sigma, rho, beta, n_exponents=1, **kwargs)['exponents'][:, 0]
@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from ensemble import ensemble_parameters, rk4_step
+
+SETTINGS_NAME = 'sweep.json'
+# Кількість перших максимумів z (після перехідного процесу), що зберігаються для біфуркаційної діаграми
+DEFAULT_MAX_MAXIMA = 64
+# Розмах траєкторії, меншого за який стан вважається збіжним до нерухомої точки
+CONVERGENCE_TOLERANCE = 1e-3
+
+
+def parameter_grid(sigma, rho, beta):
+    """Усі комбінації параметрів (P, 3) у порядку np.meshgrid(..., indexing='ij') та форма сітки"""
+    axes = [np.atleast_1d(np.asarray(values, dtype=float)) for values in (sigma, rho, beta)]
+    mesh = np.meshgrid(*axes, indexing='ij')
+    return np.stack([m.ravel() for m in mesh], axis=1), tuple(len(a) for a in axes)
+
+
+def fixed_points(sigma, rho, beta):
+    """Нерухомі точки системи для кожного набору параметрів: (P, 3, 3) — початок координат і C+, C-"""
+    sigma, rho, beta = (np.asarray(v, dtype=float) for v in (sigma, rho, beta))
+    # При rho < 1 точки C± не існують і збігаються з початком координат
+    r = np.sqrt(np.maximum(beta * (rho - 1), 0.0))
+    z = np.maximum(rho - 1, 0.0)
+    zeros = np.zeros_like(r)
+    return np.stack([np.stack([zeros, zeros, zeros], axis=-1),
+                     np.stack([r, r, z], axis=-1),
+                     np.stack([-r, -r, z], axis=-1)], axis=1)
+
+
+def summarize_chunk(params, initial_state=(1.0, 1.0, 1.0), t_transient=50.0, t_record=50.0, dt=0.01,
+                    max_maxima=DEFAULT_MAX_MAXIMA):
+    """Підсумки для набору параметрів (M, 3): максимуми z, межі атрактора та збіжність до нерухомої точки
+
+    Усі точки інтегруються разом методом RK4 з кроком dt; перехідний процес [0, t_transient) відкидається,
+    а підсумки накопичуються під час запису без збереження траєкторій.
+    """
+    params = np.asarray(params, dtype=float)
+    m = len(params)
+    coefficients = ensemble_parameters(m, params[:, 0], params[:, 1], params[:, 2])
+    y = np.tile(np.asarray(initial_state, dtype=float), (m, 1))
+    diverged = np.zeros(m, dtype=bool)
+
+    def advance(y):
+        with np.errstate(over='ignore', invalid='ignore'):
+            y = rk4_step(y, dt, coefficients)
+        bad = ~np.isfinite(y).all(axis=1)
+        if bad.any():
+            # Розбіжні траєкторії зупиняються, щоб переповнення не поширювалось далі
+            diverged[bad] = True
+            y[bad] = np.nan
+        return y
+
+    for _ in range(int(round(t_transient / dt))):
+        y = advance(y)
+
+    low, high = y.copy(), y.copy()
+    maxima = np.full((m, max_maxima), np.nan, dtype=np.float32)
+    count = np.zeros(m, dtype=np.int64)
+    z_before, z_current = np.full(m, np.nan), y[:, 2].copy()
+    rows = np.arange(m)
+    for _ in range(int(round(t_record / dt))):
+        y = advance(y)
+        z_next = y[:, 2]
+        peak = (z_current > z_before) & (z_current >= z_next)
+        if peak.any():
+            # Уточнення вершини параболою через три сусідні значення
+            curvature = z_before[peak] - 2 * z_current[peak] + z_next[peak]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                value = z_current[peak] - (z_next[peak] - z_before[peak]) ** 2 / (8 * curvature)
+            value = np.where(curvature < 0, value, z_current[peak])
+            slot = count[peak]
+            keep = slot < max_maxima
+            maxima[rows[peak][keep], slot[keep]] = value[keep]
+            count[peak] += 1
+            # Уточнена вершина може бути вищою за найбільше обчислене значення
+            high[peak, 2] = np.fmax(high[peak, 2], value)
+        np.fmin(low, y, out=low)
+        np.fmax(high, y, out=high)
+        z_before, z_current = z_current, z_next.copy()
+
+    points = fixed_points(*params.T)
+    distance = np.linalg.norm(points - y[:, None, :], axis=2)
+    nearest = np.where(diverged, -1, np.argmin(np.nan_to_num(distance, nan=np.inf), axis=1))
+    span = np.max(high - low, axis=1)
+    return {
+        'params': params,
+        'maxima': maxima,
+        'maxima_count': count,
+        'bounds': np.concatenate([low, high], axis=1),
+        'final_state': y,
+        'fixed_point': nearest.astype(np.int8),
+        'fixed_point_distance': np.min(distance, axis=1),
+        'converged': ~diverged & (span < CONVERGENCE_TOLERANCE),
+        'diverged': diverged,
+    }
+
+
+def _chunk_path(output_dir, number):
+    return os.path.join(output_dir, f"chunk_{number:06d}.npz")
+
+
+def _run_chunk(task):
+    """Обчислення й атомарний запис одного шматка (виконується в окремому процесі)"""
+    output_dir, number, start, params, options = task
+    summary = summarize_chunk(params, **options)
+    summary['index'] = np.arange(start, start + len(params))
+    tmp_path = _chunk_path(output_dir, number) + '.tmp.npz'
+    np.savez(tmp_path, **summary)
+    os.replace(tmp_path, _chunk_path(output_dir, number))
+    return number, len(params)
+
+
+def run_sweep(output_dir, sigma=10.0, rho=28.0, beta=8.0 / 3.0, initial_state=(1.0, 1.0, 1.0), t_transient=50.0,
+              t_record=50.0, dt=0.01, max_maxima=DEFAULT_MAX_MAXIMA, chunk_size=1000, workers=None, progress=None):
+    """Паралельний перебір сітки параметрів; кожен шматок записується окремо, тож перерваний перебір продовжується
+
+    progress(done, total) викликається після кожного записаного шматка.
+    """
+    params, shape = parameter_grid(sigma, rho, beta)
+    options = {'initial_state': [float(v) for v in initial_state], 't_transient': float(t_transient),
+               't_record': float(t_record), 'dt': float(dt), 'max_maxima': int(max_maxima)}
+    settings = {'sigma': np.atleast_1d(sigma).astype(float).tolist(), 'rho': np.atleast_1d(rho).astype(float).tolist(),
+                'beta': np.atleast_1d(beta).astype(float).tolist(), 'shape': list(shape), 'chunk_size': int(chunk_size),
+                'options': options}
+    os.makedirs(output_dir, exist_ok=True)
+    settings_path = os.path.join(output_dir, SETTINGS_NAME)
+    if os.path.exists(settings_path):
+        with open(settings_path, encoding='utf-8') as f:
+            if json.load(f) != settings:
+                raise ValueError(f"Каталог {output_dir} містить перебір з іншими параметрами")
+    else:
+        with open(settings_path, 'w', encoding='utf-8') as f:
+            json.dump(settings, f)
+
+    chunks = range((len(params) + chunk_size - 1) // chunk_size)
+    # Уже записані шматки пропускаються
+    tasks = [(output_dir, number, number * chunk_size, params[number * chunk_size:(number + 1) * chunk_size], options)
+             for number in chunks if not os.path.exists(_chunk_path(output_dir, number))]
+    done = len(chunks) - len(tasks)
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in as_completed([pool.submit(_run_chunk, task) for task in tasks]):
+                future.result()
+                done += 1
+                if progress is not None:
+                    progress(done, len(chunks))
+    return {'points': len(params), 'chunks': len(chunks), 'computed': len(tasks)}
+
+
+def load_sweep(output_dir):
+    """Результати перебору як масиви з формою сітки (sigma, rho, beta, ...); відсутні шматки — NaN"""
+    with open(os.path.join(output_dir, SETTINGS_NAME), encoding='utf-8') as f:
+        settings = json.load(f)
+    shape = tuple(settings['shape'])
+    total = int(np.prod(shape))
+    result = None
+    for name in sorted(os.listdir(output_dir)):
+        if not (name.startswith('chunk_') and name.endswith('.npz')) or '.tmp' in name:
+            continue
+        with np.load(os.path.join(output_dir, name)) as chunk:
+            if result is None:
+                result = {}
+                for key in chunk.files:
+                    if key == 'index':
+                        continue
+                    fill = False if chunk[key].dtype == bool else (-1 if chunk[key].dtype.kind == 'i' else np.nan)
+                    result[key] = np.full((total,) + chunk[key].shape[1:], fill, dtype=chunk[key].dtype)
+            for key in result:
+                result[key][chunk['index']] = chunk[key]
+    if result is None:
+        return None
+    result = {key: values.reshape(shape + values.shape[1:]) for key, values in result.items()}
+    result['settings'] = settings
+    return result
+
+
+def plot_bifurcation(result, parameter='rho', ax=None):
+    """Біфуркаційна діаграма: максимуми z після перехідного процесу залежно від параметра"""
+    import matplotlib.pyplot as plt
+
+    column = ('sigma', 'rho', 'beta').index(parameter)
+    values = result['params'][..., column].ravel()
+    maxima = result['maxima'].reshape(len(values), -1)
+    x = np.repeat(values, maxima.shape[1])
+    keep = ~np.isnan(maxima.ravel())
+    if ax is None:
+        _, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(x[keep], maxima.ravel()[keep], ',k', alpha=0.5)
+    ax.set_xlabel(parameter)
+    ax.set_ylabel('Максимуми z')
+    ax.set_title('Біфуркаційна діаграма системи Лоренца')
+    return ax
+
+
+def _grid_argument(text):
+    """Значення параметра: число або 'початок:кінець:кількість'"""
+    parts = [float(part) for part in text.split(':')]
+    if len(parts) == 1:
+        return parts[0]
+    if len(parts) == 3:
+        return np.linspace(parts[0], parts[1], int(parts[2]))
+    raise argparse.ArgumentTypeError("очікується число або початок:кінець:кількість")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Перебір параметрів системи Лоренца')
+    parser.add_argument('output', help='каталог результатів (повторний запуск продовжує перебір)')
+    parser.add_argument('--sigma', type=_grid_argument, default=10.0)
+    parser.add_argument('--rho', type=_grid_argument, default=28.0)
+    parser.add_argument('--beta', type=_grid_argument, default=8.0 / 3.0)
+    parser.add_argument('--transient', type=float, default=50.0, help='тривалість перехідного процесу')
+    parser.add_argument('--record', type=float, default=50.0, help='тривалість запису підсумків')
+    parser.add_argument('--dt', type=float, default=0.01, help='крок RK4')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('--plot', action='store_true', help='показати біфуркаційну діаграму за rho')
+    args = parser.parse_args(argv)
+
+    summary = run_sweep(args.output, args.sigma, args.rho, args.beta, t_transient=args.transient,
+                        t_record=args.record, dt=args.dt, chunk_size=args.chunk_size, workers=args.workers,
+                        progress=lambda done, total: print(f"\rШматків: {done}/{total}", end='', flush=True))
+    print(f"\nТочок: {summary['points']}, обчислено шматків: {summary['computed']} із {summary['chunks']}")
+    if args.plot:
+        import matplotlib.pyplot as plt
+        plot_bifurcation(load_sweep(args.output))
+        plt.show()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from loranze import IMPLICIT_METHODS
+
+DEFAULT_MEMORY_LIMIT = 64 * 1024 ** 2
+DEFAULT_DISK_LIMIT = 1024 ** 3
+
+
+def trajectory_key(initial_state, t_span, t_steps, sigma=10.0, rho=28.0, beta=8.0 / 3.0, method='RK45',
+                   rtol=1e-3, atol=1e-6, jac=False, vectorized=False, max_step=None):
+    """Адреса траєкторії: хеш усього, що визначає розв'язок, крім довжини інтервалу
+
+    Сітка задається початком і кроком, тож коротший запит на тій самій сітці має ту саму адресу
+    і обслуговується початком довшої збереженої траєкторії.
+    """
+    t0, t1 = float(t_span[0]), float(t_span[1])
+    step = (t1 - t0) / max(int(t_steps) - 1, 1)
+    content = {'initial_state': [float(v) for v in initial_state], 't0': t0, 'step': step,
+               'params': [float(sigma), float(rho), float(beta)], 'method': method,
+               'rtol': float(rtol), 'atol': float(atol), 'jac': bool(jac) and method in IMPLICIT_METHODS,
+               'vectorized': bool(vectorized), 'max_step': None if max_step is None else float(max_step)}
+    if method == 'RK4':
+        # Точність сталого кроку не залежить від допусків
+        content['rtol'] = content['atol'] = None
+    digest = hashlib.blake2b(json.dumps(content, sort_keys=True).encode(), digest_size=20)
+    return digest.hexdigest()
+
+
+class TrajectoryCache:
+    """Дворівневий кеш траєкторій simulate_lorenz: LRU у пам'яті та файли .npy на диску з обмеженням розміру
+
+    Для адаптивних методів початок довшої траєкторії відрізняється від окремого короткого розв'язку
+    лише в межах допусків (останній крок короткого розв'язку вкорочується до кінця інтервалу).
+    """
+
+    def __init__(self, directory=None, memory_limit=DEFAULT_MEMORY_LIMIT, disk_limit=DEFAULT_DISK_LIMIT):
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, initial_state, t_span, t_steps, **options):
+        """t (T,) і копія розв'язку (3, T) або None, якщо на цій сітці немає траєкторії щонайменше такої довжини"""
+        key = trajectory_key(initial_state, t_span, t_steps, **options)
+        with self._lock:
+            sol = self._memory.get(key)
+            if sol is not None and sol.shape[1] >= t_steps:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return np.linspace(t_span[0], t_span[1], t_steps), sol[:, :t_steps].copy()
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                stored = np.load(path, mmap_mode='r')
+            except (FileNotFoundError, ValueError):
+                stored = None
+            if stored is not None and stored.shape[1] >= t_steps:
+                # Зчитується лише потрібний початок файлу
+                sol = np.array(stored[:, :t_steps])
+                del stored
+                os.utime(path)
+                with self._lock:
+                    self.stats['disk_hits'] += 1
+                self._remember(key, sol)
+                return np.linspace(t_span[0], t_span[1], t_steps), sol.copy()
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, initial_state, t_span, t_steps, sol, **options):
+        """Збереження розв'язку (3, T); коротший за вже збережений на тій самій сітці не зберігається"""
+        key = trajectory_key(initial_state, t_span, t_steps, **options)
+        sol = np.array(sol, dtype=float)
+        self._remember(key, sol)
+        if self.directory is None:
+            return
+        path = self._path(key)
+        try:
+            if np.load(path, mmap_mode='r').shape[1] >= sol.shape[1]:
+                return
+        except (FileNotFoundError, ValueError):
+            pass
+        tmp_path = path + '.tmp.npy'
+        np.save(tmp_path, sol)
+        os.replace(tmp_path, path)
+        self._evict_disk(keep=path)
+
+    def _remember(self, key, sol):
+        with self._lock:
+            current = self._memory.get(key)
+            if current is not None:
+                if current.shape[1] >= sol.shape[1]:
+                    self._memory.move_to_end(key)
+                    return
+                self._memory_bytes -= current.nbytes
+                del self._memory[key]
+            if sol.nbytes > self.memory_limit:
+                return
+            sol.flags.writeable = False
+            self._memory[key] = sol
+            self._memory_bytes += sol.nbytes
+            while self._memory_bytes > self.memory_limit:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.nbytes
+
+    def _evict_disk(self, keep=None):
+        """Видалення найдавніше використаних файлів (за часом зміни), доки розмір не вкладеться в обмеження"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy') and '.tmp' not in name:
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_limit:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        """Очищення обох рівнів"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith('.npy'):
+                    os.remove(os.path.join(self.directory, name))